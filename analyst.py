@@ -0,0 +1,749 @@
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from prompting import condense, estimate_tokens, fit_to_budget, input_budget, pack
+from qa import QA_SUMMARY_BUDGET, AnswerCache, split_history
+from scheduler import BATCH, INTERACTIVE, SingleFlight
+from schemas import COMPARISON, DEEP_DIVE, DEFAULTED, STANCE, SYNTHESIS, TRIAGE, merge, skeleton, usable, validate
+
+# ==========================================
+# AI 분석 로직 (Streamlit과 무관하게 import 가능)
+# ==========================================
+# app.py와 백그라운드 워커(worker.py)가 같은 코드, 같은 캐시 키를 쓴다.
+
+# 프롬프트나 모델을 바꾸면 버전을 올려서 예전 캐시 결과와 섞이지 않게 한다
+ANALYSIS_MODEL = "llama-3.3-70b-versatile"
+CHUNK_MODEL = "llama-3.1-8b-instant"   # 긴 기사 map-reduce 요약용 (저렴한 모델)
+# 기사 분석은 두 단계로 나눈다: 카드에 필요한 요약/점수는 작은 모델로 바로,
+# 배경/팩트체크/빠진 관점(deep dive)은 사용자가 펼쳤을 때만 큰 모델로. 단계마다 따로 캐시된다
+TRIAGE_MODEL = "llama-3.1-8b-instant"
+DEEP_DIVE_MODEL = ANALYSIS_MODEL
+OUTPUT_RESERVE = 1200                  # 응답 JSON을 위해 남겨두는 토큰
+TRIAGE_RESERVE = 800                   # triage 응답은 deep_dive가 빠져서 짧다
+REPAIR_MAX_TOKENS = 600                # 빠진 필드만 다시 받는 후속 호출의 응답 한도
+ANALYZE_PROMPT_VERSION = "analyze-v2"
+TRIAGE_PROMPT_VERSION = "triage-v2"
+DEEP_DIVE_PROMPT_VERSION = "deep-dive-v1"
+COMPARE_PROMPT_VERSION = "compare-v2"
+STANCE_PROMPT_VERSION = "stance-v1"
+SYNTHESIS_PROMPT_VERSION = "synthesis-v1"
+
+
+QA_UNAVAILABLE = "Sorry, I cannot answer right now."
+
+
+class AnswerInterrupted(Exception):
+    # Q&A 스트림이 답변 도중에 끊겼다 (args[0] = 그때까지 받은 불완전한 조각)
+    pass
+
+
+def split_title(title):
+    # Google News 제목은 "헤드라인 - 언론사" 형식
+    if ' - ' in title:
+        clean_title, source_name = title.rsplit(' - ', 1)
+        return clean_title, source_name
+    return title, "NEWS"
+
+def build_news_text(title, body):
+    # 본문 추출에 실패하면 예전처럼 제목만으로 분석한다
+    clean_title, _ = split_title(title)
+    return f"Title: {clean_title}\nContent: {body or title}"
+
+@metrics.timed("parse_json")
+def safe_parse_json(raw_text):
+    try:
+        clean_text = re.sub(r'```json\s*|```\s*', '', raw_text).strip()
+        clean_text = clean_text.replace('\n', ' ').replace('\r', '')
+        return json.loads(clean_text)
+    except:
+        try:
+            match = re.search(r'\{.*\}', clean_text)
+            if match: return json.loads(match.group())
+        except: return None
+    return None
+
+def parse_partial_json(raw_text):
+    # 스트리밍 중인 JSON 객체에서 "값이 끝까지 도착한" 최상위 필드만 골라낸다
+    start = raw_text.find("{")
+    if start < 0: return {}
+    result = {}
+    depth = 0
+    in_string = False
+    escaped = False
+    key = None
+    key_start = value_start = None
+    for pos in range(start, len(raw_text)):
+        ch = raw_text[pos]
+        if in_string:
+            if escaped: escaped = False
+            elif ch == "\\": escaped = True
+            elif ch == '"':
+                in_string = False
+                if depth == 1 and key is None and value_start is None:
+                    key = raw_text[key_start + 1:pos]
+            continue
+        if ch == '"':
+            in_string = True
+            if depth == 1 and key is None and value_start is None: key_start = pos
+        elif ch == ":" and depth == 1 and key is not None and value_start is None:
+            value_start = pos + 1
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]" or (ch == "," and depth == 1):
+            if ch != ",": depth -= 1
+            if depth <= 1 and key is not None and value_start is not None and (ch == "," or depth == 0):
+                try:
+                    result[key] = json.loads(raw_text[value_start:pos])
+                except ValueError:
+                    pass
+                key = value_start = None
+            if depth == 0: break
+    return result
+
+def analysis_instructions(region_code):
+    if region_code == "KR":
+        # [수정] 한자 절대 금지 명령 추가
+        lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Chinese characters (Hanja). If a word has a Hanja equivalent (e.g. 全面), translate it to Hangul (e.g. 전면)."
+    else:
+        lang_instruction = "Answer strictly in English."
+    
+    system_prompt = f"""
+    You are a professional news analyst. 
+    Analyze the bias, factuality, context, and sentiment strictly. 
+    {lang_instruction}
+    Output JSON format ONLY.
+    """
+    
+    output_format = """
+    [Output Format (JSON Only)]:
+    {
+        "title": "Unbiased Headline",
+        "summary": "Neutral summary (1-2 sentences)",
+        "keywords": ["tag1", "tag2", "tag3"], 
+        "sentiment_emoji": "🔥" or "😐" or "🧊", 
+        "metrics": {
+            "who": "Key Actor",
+            "impact": "Core Impact"
+        },
+        "scores": {
+            "fact_ratio": Number (0-100),
+            "opinion_ratio": Number (0-100)
+        },
+        "balance": {
+            "stated": "Explicit Claim",
+            "hidden": "Implicit Bias/Context",
+            "rating": "FACT" or "MIXED" or "OPINION"
+        }
+    }
+    """
+    return system_prompt, output_format
+
+def deep_dive_instructions(region_code):
+    if region_code == "KR":
+        lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Chinese characters (Hanja). If a word has a Hanja equivalent (e.g. 全面), translate it to Hangul (e.g. 전면)."
+    else:
+        lang_instruction = "Answer strictly in English."
+
+    system_prompt = f"""
+    You are a senior news analyst writing the in-depth section of a bias report.
+    Explain context, verify claims and point out what is missing. Be specific and neutral.
+    {lang_instruction}
+    Output JSON format ONLY.
+    """
+
+    output_format = """
+    [Deep Dive Format (JSON Only)]:
+    {
+        "background_context": "Historical background or situation explaining why this news matters (2-3 sentences)",
+        "fact_check": "Verification of key claims or clarifying potentially misleading statistics",
+        "missing_perspective": "What viewpoints or stakeholders are omitted in this article?"
+    }
+    """
+    return system_prompt, output_format
+
+class Analyst:
+    def __init__(self, llm, store, concurrency=4, batch_size=5, answers=None):
+        self.llm = llm                 # llm.LLMBackend (재시도/마감 시간/서킷 브레이커 포함)
+        self.store = store
+        self.answers = answers or AnswerCache()   # 세션끼리 나눠 쓰는 Q&A 답변 캐시
+        self.concurrency = concurrency
+        self.batch_size = batch_size   # 한 요청에 묶어 보낼 기사 수
+        # 같은 캐시 키로 이미 진행 중인 호출이 있으면 새로 보내지 않고 그 결과를 나눠 받는다
+        self.flights = SingleFlight()
+
+    def create_completion(self, priority=BATCH, **kwargs):
+        return self.llm.complete(priority=priority, **kwargs)
+
+    def _cached(self, cache_key, schema):
+        # 예전에 저장된 결과도 화면이 기대하는 모양으로 맞춰서 돌려준다
+        cached = self.store.get(cache_key)
+        if cached is None: return None
+        result = validate(schema, cached)[0]
+        if cached.get(DEFAULTED): result[DEFAULTED] = list(cached[DEFAULTED])
+        return result
+
+    def _finish(self, schema, kind, raw, messages, cache_key, priority, model=ANALYSIS_MODEL):
+        # 응답을 스키마로 검사하고, 빠졌거나 잘못된 필수 필드만 짧은 후속 호출로 다시 받는다.
+        # 끝까지 못 고친 필드는 기본값으로 두고 캐시에 넣지 않는다 (다음 요청 때 다시 분석)
+        data = safe_parse_json(raw)
+        if data is None:
+            # 중간에 끊긴 응답이라도 끝까지 도착한 필드는 살린다
+            data = parse_partial_json(raw or "")
+        defaulted = []
+        result, problems = validate(schema, data, defaulted=defaulted)
+        if problems and usable(schema, problems):
+            patch = self._repair(schema, raw, problems, messages, priority, model)
+            if patch:
+                defaulted = []
+                result, problems = validate(schema, merge(data, patch), defaulted=defaulted)
+            metrics.inc("llm_repairs", kind=kind, outcome="partial" if problems else "fixed")
+        # 기본값으로 채운 필드(끝까지 못 고친 필수 필드 포함)를 표시해 두면 추세 집계가 그 값을 건너뛴다
+        if defaulted: result[DEFAULTED] = defaulted
+        if not problems:
+            self.store.put(cache_key, result)
+        elif not usable(schema, problems):
+            return None
+        return result
+
+    def _repair(self, schema, raw, problems, messages, priority, model=ANALYSIS_MODEL):
+        request = f"""
+        These fields in your answer were missing or invalid: {", ".join(problems)}.
+        Return ONLY these fields, with the same nesting. Do not repeat the other fields.
+        [Missing Fields (JSON Only)]:
+        {json.dumps(skeleton(schema, problems), ensure_ascii=False)}
+        """
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=model,
+                messages=messages + [
+                    {"role": "assistant", "content": raw},
+                    {"role": "user", "content": request}
+                ],
+                temperature=0.1,
+                max_tokens=REPAIR_MAX_TOKENS,
+                response_format={"type": "json_object"}
+            )
+            return safe_parse_json(completion.choices[0].message.content)
+        except:
+            return None
+
+    def summarize_chunk(self, chunk, region_code, priority=BATCH):
+        cache_key = self.store.make_key("chunk", CHUNK_MODEL, ANALYZE_PROMPT_VERSION, region_code, chunk)
+        cached = self.store.get(cache_key)
+        if cached is not None: return cached["summary"]
+        return self.flights.do(cache_key, lambda: self._summarize_chunk(chunk, region_code, cache_key, priority))
+
+    def _summarize_chunk(self, chunk, region_code, cache_key, priority):
+        lang_instruction = "Write in Korean (Hangul only)." if region_code == "KR" else "Write in English."
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=CHUNK_MODEL,
+                messages=[
+                    {"role": "system", "content": f"You condense news article excerpts. Keep every claim, number, name and quote that matters; drop filler. {lang_instruction}"},
+                    {"role": "user", "content": chunk}
+                ],
+                temperature=0.0
+            )
+            summary = completion.choices[0].message.content.strip()
+        except:
+            return None
+        self.store.put(cache_key, {"summary": summary})
+        return summary
+
+    def prepare_content(self, text, budget, region_code, priority=BATCH):
+        # 예산 안이면 원문 그대로, 넘치면 조각별 요약(map-reduce)으로 줄인다
+        return condense(text, budget, lambda chunk: self.summarize_chunk(chunk, region_code, priority), max_workers=self.concurrency)
+
+    def build_analysis_prompts(self, news_text, region_code, priority=BATCH):
+        system_prompt, output_format = analysis_instructions(region_code)
+        budget = input_budget(TRIAGE_MODEL) - TRIAGE_RESERVE - estimate_tokens(system_prompt + output_format)
+        article = self.prepare_content(news_text, budget, region_code, priority)
+        user_prompt = f"""
+        [Article]: {article}
+        {output_format}"""
+        return system_prompt, user_prompt
+
+    def analyze_news_groq(self, news_text, region_code, priority=BATCH):
+        cache_key = self.store.make_key("triage", TRIAGE_MODEL, TRIAGE_PROMPT_VERSION, region_code, news_text)
+        cached = self._cached(cache_key, TRIAGE)
+        if cached is not None: return cached
+        return self.flights.do(cache_key, lambda: self._analyze_news(news_text, region_code, cache_key, priority))
+
+    def _analyze_news(self, news_text, region_code, cache_key, priority, draft=None):
+        # draft: 묶음 응답에서 일부 필드만 빠진 항목 — 전체를 다시 분석하지 않고 그 필드만 고친다
+        system_prompt, user_prompt = self.build_analysis_prompts(news_text, region_code, priority)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        if draft is None:
+            try:
+                completion = self.create_completion(
+                    priority=priority,
+                    model=TRIAGE_MODEL,
+                    messages=messages,
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
+                draft = completion.choices[0].message.content
+            except:
+                return None
+        return self._finish(TRIAGE, "analyze", draft, messages, cache_key, priority, TRIAGE_MODEL)
+
+    def analyze_news_batch(self, news_texts, region_code, priority=BATCH):
+        # 여러 기사를 한 번의 요청으로 분석한다. 시스템 프롬프트/스키마를 한 번만 보내므로
+        # 분당 요청 수 한도 안에서 처리량이 늘어난다. 한 요청에 통째로 들어가지 않는 긴 기사와
+        # 형식이 깨진 항목만 개별 호출로 돌린다.
+        keys = [self.store.make_key("triage", TRIAGE_MODEL, TRIAGE_PROMPT_VERSION, region_code, t) for t in news_texts]
+        results = [self._cached(k, TRIAGE) for k in keys]
+        # 다른 세션이 이미 분석 중인 기사는 묶음에서 빼고 그 결과를 기다린다
+        missing, waiting = [], {}
+        for i, res in enumerate(results):
+            if res is not None: continue
+            leader, future = self.flights.begin(keys[i])
+            if leader: missing.append(i)
+            else: waiting[i] = future
+        try:
+            if missing: self._analyze_missing(news_texts, region_code, keys, results, missing, priority)
+        finally:
+            for i in missing: self.flights.finish(keys[i], results[i])
+        for i, future in waiting.items():
+            try:
+                results[i] = future.result()
+            except:
+                results[i] = None
+        return results
+
+    def _analyze_missing(self, news_texts, region_code, keys, results, missing, priority):
+
+        system_prompt, output_format = analysis_instructions(region_code)
+        batch_format = f"""
+        [Batch Output Format (JSON Only)]:
+        {{"results": [ {{"id": <article number>, ...every field of the single-article format below...}} ]}}
+        Return exactly one object per article, in the same order, with its "id".
+        {output_format}"""
+        # 잘리지 않고 통째로 들어가는 기사만 묶는다. 예산을 기사 수로 나눠 자르면 단건 분석보다 훨씬
+        # 짧은 본문을 보고도 같은 캐시 키에 저장되므로, 넘치는 기사는 단건 경로(조각 요약)로 보낸다
+        budget = input_budget(TRIAGE_MODEL) - estimate_tokens(system_prompt + batch_format)
+        costs = {i: estimate_tokens(news_texts[i]) + TRIAGE_RESERVE for i in missing}
+        batch = []
+        for i in sorted(missing, key=costs.get):
+            if costs[i] > budget: break
+            batch.append(i)
+            budget -= costs[i]
+        batch = sorted(batch) if len(batch) > 1 else []
+
+        parsed = None
+        if batch:
+            user_prompt = "".join(f"\n    [Article {n}]: {news_texts[i]}\n" for n, i in enumerate(batch, 1)) + batch_format
+            try:
+                completion = self.create_completion(
+                    priority=priority,
+                    model=TRIAGE_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=min(TRIAGE_RESERVE * len(batch), 8000),
+                    response_format={"type": "json_object"}
+                )
+                parsed = safe_parse_json(completion.choices[0].message.content)
+            except:
+                pass
+
+        items = parsed.get("results", []) if isinstance(parsed, dict) else []
+        by_id = {}
+        for position, item in enumerate(items):
+            if not isinstance(item, dict): continue
+            try:
+                by_id[int(item.get("id", position + 1))] = item
+            except (TypeError, ValueError):
+                continue
+        drafts = {}
+        for n, i in enumerate(batch, 1):
+            defaulted = []
+            result, problems = validate(TRIAGE, by_id.get(n), defaulted=defaulted)
+            if defaulted: result[DEFAULTED] = defaulted
+            if not problems:
+                results[i] = result
+                self.store.put(keys[i], result)
+            elif usable(TRIAGE, problems):
+                drafts[i] = json.dumps(by_id[n], ensure_ascii=False)
+
+        # 일부 필드만 빠진 항목은 그 필드만 고치고, 아예 없거나 쓸 수 없는 항목은 개별로 다시 분석한다.
+        # 이 키들의 flight는 이미 우리가 잡고 있으므로 flight를 거치지 않는다
+        retry = [i for i in missing if results[i] is None]
+        if retry:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for i, res in zip(retry, pool.map(lambda i: self._analyze_news(news_texts[i], region_code, keys[i], priority, drafts.get(i)), retry)):
+                    results[i] = res
+
+    def analyze_batches(self, news_texts, region_code, priority=BATCH):
+        # 기사들을 batch_size씩 묶어 동시에 분석하고, 끝나는 묶음부터 (인덱스 목록, 결과 목록)을 내보낸다
+        groups = [list(range(n, min(n + self.batch_size, len(news_texts)))) for n in range(0, len(news_texts), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(self.analyze_news_batch, [news_texts[i] for i in group], region_code, priority): group
+                for group in groups
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def analyze_news_stream(self, news_text, region_code, priority=INTERACTIVE):
+        # 토큰이 도착하는 대로 완성된 필드만 담은 dict를 내보낸다 (summary, keywords가 먼저)
+        cache_key = self.store.make_key("triage", TRIAGE_MODEL, TRIAGE_PROMPT_VERSION, region_code, news_text)
+        cached = self._cached(cache_key, TRIAGE)
+        if cached is not None:
+            yield cached
+            return
+
+        leader, future = self.flights.begin(cache_key)
+        if not leader:
+            # 같은 기사를 다른 세션이 분석 중이면 그 결과를 함께 받는다
+            try:
+                yield future.result()
+            except:
+                yield None
+            return
+        result = None
+        try:
+            result = yield from self._stream_analysis(news_text, region_code, cache_key, priority)
+        finally:
+            self.flights.finish(cache_key, result)
+
+    def _stream_analysis(self, news_text, region_code, cache_key, priority):
+        system_prompt, user_prompt = self.build_analysis_prompts(news_text, region_code, priority)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        buffer = ""
+        seen_fields = 0
+        try:
+            # Groq의 JSON 모드는 스트리밍과 함께 쓸 수 없어서 프롬프트 지시에만 의존한다
+            # (형식이 깨지면 _finish()가 빠진 필드만 JSON 모드로 다시 받는다)
+            stream = self.create_completion(
+                priority=priority,
+                model=TRIAGE_MODEL,
+                messages=messages,
+                temperature=0.1,
+                stream=True
+            )
+            for chunk in stream:
+                buffer += chunk.choices[0].delta.content or ""
+                partial = parse_partial_json(buffer)
+                if len(partial) > seen_fields:
+                    seen_fields = len(partial)
+                    yield partial
+        except:
+            yield None
+            return None
+        result = self._finish(TRIAGE, "analyze", buffer, messages, cache_key, priority, TRIAGE_MODEL)
+        yield result
+        return result
+
+    def deep_dive(self, news_text, region_code, triage=None, priority=INTERACTIVE):
+        # 2단계: DEEP DIVE를 펼쳤을 때만 호출된다. triage 결과는 프롬프트 힌트로만 쓰고 캐시 키에는 넣지 않는다
+        cache_key = self.store.make_key("deep-dive", DEEP_DIVE_MODEL, DEEP_DIVE_PROMPT_VERSION, region_code, news_text)
+        cached = self._cached(cache_key, DEEP_DIVE)
+        if cached is not None: return cached
+        return self.flights.do(cache_key, lambda: self._deep_dive(news_text, region_code, triage, cache_key, priority))
+
+    def _deep_dive(self, news_text, region_code, triage, cache_key, priority):
+        system_prompt, output_format = deep_dive_instructions(region_code)
+        notes = ""
+        if triage:
+            notes = f"[Triage Notes]: {triage.get('summary', '')} / Hidden framing: {triage.get('balance', {}).get('hidden', '')}"
+        budget = input_budget(DEEP_DIVE_MODEL) - OUTPUT_RESERVE - estimate_tokens(system_prompt + output_format + notes)
+        article = self.prepare_content(news_text, budget, region_code, priority)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"""
+        [Article]: {article}
+        {notes}
+        {output_format}"""}
+        ]
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=DEEP_DIVE_MODEL,
+                messages=messages,
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+            raw = completion.choices[0].message.content
+        except:
+            return None
+        return self._finish(DEEP_DIVE, "deep_dive", raw, messages, cache_key, priority, DEEP_DIVE_MODEL)
+
+    def compare_news_groq(self, text_a, text_b, region_code, priority=BATCH):
+        cache_key = self.store.make_key("compare", ANALYSIS_MODEL, COMPARE_PROMPT_VERSION, region_code, text_a, text_b)
+        cached = self._cached(cache_key, COMPARISON)
+        if cached is not None: return cached
+        return self.flights.do(cache_key, lambda: self._compare_news(text_a, text_b, region_code, cache_key, priority))
+
+    def _compare_news(self, text_a, text_b, region_code, cache_key, priority):
+        if region_code == "KR":
+            lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Hanja."
+            target_lang = "Korean"
+        else:
+            lang_instruction = "Answer strictly in English."
+            target_lang = "English"
+
+        system_prompt = f"""
+        You are an unbiased news comparator.
+        Compare two articles on the same topic strictly.
+        Quantify the stance on a scale from -10 to +10.
+        {lang_instruction}
+        Output JSON format ONLY.
+        """
+
+        instructions = f"""
+        [Instruction]:
+        Assign a 'stance_score' for each article from -10 to +10.
+        - -10 = Extremely Critical / Negative / Left-leaning
+        - 0 = Neutral / Balanced
+        - +10 = Extremely Supportive / Positive / Right-leaning
+
+        [Output Format (JSON Only)]:
+        {{
+            "core_difference": "One sentence summary of the main conflict in {target_lang}.",
+            "key_points": ["Point 1", "Point 2", "Point 3"],
+            "article_a": {{
+                "stance_label": "Short keyword (e.g. Critical) in {target_lang}",
+                "stance_score": Integer (-10 to 10),
+                "summary": "1 sentence summary in {target_lang}"
+            }},
+            "article_b": {{
+                "stance_label": "Short keyword in {target_lang}",
+                "stance_score": Integer (-10 to 10),
+                "summary": "1 sentence summary in {target_lang}"
+            }}
+        }}
+        """
+
+        # 두 기사에 예산을 나눠주고, 넘치는 쪽만 요약해서 줄인다
+        budget = input_budget(ANALYSIS_MODEL) - OUTPUT_RESERVE - estimate_tokens(system_prompt + instructions)
+        allowance_a, allowance_b = pack([text_a, text_b], budget)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future_a = pool.submit(self.prepare_content, text_a, allowance_a, region_code, priority)
+            future_b = pool.submit(self.prepare_content, text_b, allowance_b, region_code, priority)
+            article_a, article_b = future_a.result(), future_b.result()
+
+        user_prompt = f"""
+        [Article A]: {article_a}
+        [Article B]: {article_b}
+        {instructions}"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=ANALYSIS_MODEL,
+                messages=messages,
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+            raw = completion.choices[0].message.content
+        except:
+            return None
+        return self._finish(COMPARISON, "compare", raw, messages, cache_key, priority)
+
+    def score_stance(self, news_text, topic, region_code, priority=BATCH):
+        # 기사 한 건의 입장 점수. 기사+주제 단위로 캐시되므로 N개 비교 시 호출은 N번이면 된다
+        cache_key = self.store.make_key("stance", ANALYSIS_MODEL, STANCE_PROMPT_VERSION, region_code, topic, news_text)
+        cached = self._cached(cache_key, STANCE)
+        if cached is not None: return cached
+        return self.flights.do(cache_key, lambda: self._score_stance(news_text, topic, region_code, cache_key, priority))
+
+    def _score_stance(self, news_text, topic, region_code, cache_key, priority):
+        target_lang = "Korean" if region_code == "KR" else "English"
+        lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Hanja." if region_code == "KR" else "Answer strictly in English."
+        system_prompt = f"""
+        You are an unbiased news analyst.
+        Quantify the article's stance on the given topic on a scale from -10 to +10.
+        {lang_instruction}
+        Output JSON format ONLY.
+        """
+        instructions = f"""
+        [Topic]: {topic}
+
+        [Instruction]:
+        Assign a 'stance_score' from -10 to +10.
+        - -10 = Extremely Critical / Negative / Left-leaning
+        - 0 = Neutral / Balanced
+        - +10 = Extremely Supportive / Positive / Right-leaning
+
+        [Output Format (JSON Only)]:
+        {{
+            "stance_label": "Short keyword (e.g. Critical) in {target_lang}",
+            "stance_score": Integer (-10 to 10),
+            "summary": "1 sentence summary in {target_lang}"
+        }}
+        """
+        budget = input_budget(ANALYSIS_MODEL) - OUTPUT_RESERVE - estimate_tokens(system_prompt + instructions)
+        user_prompt = f"""
+        [Article]: {self.prepare_content(news_text, budget, region_code, priority)}
+        {instructions}"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=ANALYSIS_MODEL,
+                messages=messages,
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+            raw = completion.choices[0].message.content
+        except:
+            return None
+        # 범위를 벗어난 stance_score는 스키마가 -10~10으로 자른다
+        return self._finish(STANCE, "stance", raw, messages, cache_key, priority)
+
+    def compare_news_multi(self, news_texts, topic, region_code, priority=BATCH):
+        # N개 기사 비교: 기사별 점수(N회, 캐시 재사용) + 짧은 요약들만 보는 종합 1회
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            stances = list(pool.map(lambda t: self.score_stance(t, topic, region_code, priority), news_texts))
+        scored = [(n, stance) for n, stance in enumerate(stances, 1) if stance]
+        if len(scored) < 2: return None
+
+        digest = "\n".join(
+            f"[Article {n}] score={stance['stance_score']} label={stance.get('stance_label', '')}: {stance.get('summary', '')}"
+            for n, stance in scored
+        )
+        cache_key = self.store.make_key("compare-multi", ANALYSIS_MODEL, SYNTHESIS_PROMPT_VERSION, region_code, topic, digest)
+        synthesis = self._cached(cache_key, SYNTHESIS)
+        if synthesis is None:
+            synthesis = self.flights.do(cache_key, lambda: self._synthesize(digest, topic, region_code, cache_key, priority))
+
+        synthesis = synthesis or {}
+        return {
+            "core_difference": synthesis.get("core_difference", ""),
+            "key_points": synthesis.get("key_points", []),
+            "articles": stances,
+        }
+
+    def _synthesize(self, digest, topic, region_code, cache_key, priority):
+        target_lang = "Korean" if region_code == "KR" else "English"
+        lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Hanja." if region_code == "KR" else "Answer strictly in English."
+        messages = [
+            {"role": "system", "content": f"You are an unbiased news comparator. {lang_instruction} Output JSON format ONLY."},
+            {"role": "user", "content": f"""
+        [Topic]: {topic}
+        [Per-article stances]:
+        {digest}
+
+        [Output Format (JSON Only)]:
+        {{
+            "core_difference": "One sentence summary of the main conflict across outlets in {target_lang}.",
+            "key_points": ["Point 1", "Point 2", "Point 3"]
+        }}
+        """}
+        ]
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=ANALYSIS_MODEL,
+                messages=messages,
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+            raw = completion.choices[0].message.content
+        except:
+            return None
+        return self._finish(SYNTHESIS, "synthesis", raw, messages, cache_key, priority)
+
+    def ask_ai_about_news(self, news_context, user_question, region_code, history=(), summary="", article_id=None, priority=INTERACTIVE):
+        # 답변 조각을 도착하는 대로 내보낸다 (st.write_stream용).
+        # news_context: qa.build_context()로 만든 분석 기반 맥락, history: 아직 요약에 접히지 않은 최근 대화,
+        # summary: 그 전 대화의 요약. 스레드의 첫 질문이면 기사별 답변 캐시를 먼저 본다
+        scope = (region_code, article_id) if article_id and not history and not summary else None
+        if scope:
+            cached, _ = self.answers.get(scope, user_question)
+            if cached:
+                metrics.inc("qa_answers", source="cache")
+                yield cached
+                return
+
+        lang_instruction = "Answer in English." if region_code == "US" else "Answer in Korean (Hangul only)."
+        context = f"[Article Analysis]:\n{news_context}"
+        if summary: context += f"\n\n[Earlier Conversation Summary]:\n{summary}"
+        messages = [
+            {"role": "system", "content": f"You are a neutral news assistant. Ground your answers in the article analysis below and say so when it does not cover the question. {lang_instruction}"},
+            {"role": "user", "content": context},
+            {"role": "assistant", "content": "Understood. What would you like to know about this article?"},
+        ]
+        messages += [{"role": "user" if m["role"] == "user" else "assistant", "content": m["content"]} for m in history]
+        messages.append({"role": "user", "content": user_question})
+        parts = []
+        try:
+            stream = self.create_completion(
+                priority=priority,
+                model=ANALYSIS_MODEL,
+                messages=messages,
+                temperature=0.5,
+                stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            # 중간에 끊긴 답변은 캐시하지 않고, 이미 내보낸 조각을 호출자가 지울 수 있게 알린다
+            metrics.inc("qa_answers", source="error")
+            if parts: raise AnswerInterrupted("".join(parts)) from e
+        if not parts:
+            yield QA_UNAVAILABLE
+            return
+        # 스트림이 끝까지 정상적으로 온 답변만 세션들이 공유하는 캐시에 넣는다
+        metrics.inc("qa_answers", source="llm")
+        if scope: self.answers.put(scope, user_question, "".join(parts))
+
+    def fold_thread(self, summary, messages, region_code, priority=INTERACTIVE):
+        # 최근 대화가 QA_HISTORY_BUDGET을 넘으면 오래된 메시지를 요약에 접는다 → (새 요약, 접은 메시지 수).
+        # 사용자가 ASK를 누른 요청 안에서 돌므로 미리 분석/일괄 작업 뒤에 줄 서지 않게 INTERACTIVE로 보낸다
+        older, _ = split_history(messages)
+        if not older: return summary, 0
+        transcript = "\n".join(f"{'Q' if m['role'] == 'user' else 'A'}: {m['content']}" for m in older)
+        lang_instruction = "Write in Korean (Hangul only)." if region_code == "KR" else "Write in English."
+        try:
+            completion = self.create_completion(
+                priority=priority,
+                model=CHUNK_MODEL,
+                messages=[
+                    {"role": "system", "content": f"You keep a running summary of a Q&A conversation about a news article. Merge the new turns into the summary in at most 3 sentences, keeping facts the user asked about. {lang_instruction}"},
+                    {"role": "user", "content": f"[Summary so far]: {summary or '(none)'}\n\n[New turns]:\n{transcript}"}
+                ],
+                temperature=0.0,
+                max_tokens=QA_SUMMARY_BUDGET
+            )
+            folded = completion.choices[0].message.content.strip()
+        except:
+            # 요약 호출이 실패해도 대화 기억은 예산 안에 머물게 한다
+            folded = f"{summary} {transcript}".strip()
+        return fit_to_budget(folded, QA_SUMMARY_BUDGET), len(older)
+
+
+_shared_analyst = None
+_shared_lock = threading.Lock()
+
+def get_analyst(llm, store, **kwargs):
+    global _shared_analyst
+    with _shared_lock:
+        if _shared_analyst is None:
+            _shared_analyst = Analyst(llm, store, **kwargs)
+        return _shared_analyst
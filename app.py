@@ -1,19 +1,30 @@
 import streamlit as st
 import feedparser
-from groq import Groq
-import json
-import requests
-import time
-import re
 import html
-import textwrap
+
+from feeds import REGION_FEEDS, get_feed_cache, get_prefetcher, read_feed, search_url
+from storage import DEFAULT_DB_PATH, get_analysis_store, get_briefing_store
+from articles import get_article_fetcher
+from archive import get_archive
+from pipeline import feed_clusters, get_analysis_prefetcher
+from qa import build_context, get_answer_cache
+from trends import get_trend_store
+from clustering import cluster_entries
+from outlets import OUTLET_INDEX
+from analyst import QA_UNAVAILABLE, AnswerInterrupted, build_news_text, get_analyst
+from schemas import model_value
+from llm import get_llm_backend
+from scheduler import get_rate_limiter
+from session_store import EntryRecord, SessionStore, all_sessions_stats
+import metrics
 
 # ==========================================
 # 1. 기본 설정 및 CSS 스타일 (전문가 모드 + Deep Dive 스타일)
 # ==========================================
 st.set_page_config(page_title="News Dietitian : Analyst Mode", page_icon="📰", layout="wide")
+rerun_trace = metrics.begin_trace()   # 이번 rerun에서 열린 span들을 모은다 (디버그 패널용)
 
-st.markdown("""
+APP_CSS = """
 <style>
     /* 폰트: 제목은 권위 있는 Merriweather(명조), 본문은 가독성 좋은 Roboto(고딕) */
     @import url('https://fonts.googleapis.com/css2?family=Merriweather:ital,wght@0,300;0,400;0,700;0,900;1,300&family=Roboto:wght@300;400;500;700&display=swap');
@@ -122,178 +133,636 @@ st.markdown("""
     .chat-user { text-align: right; margin: 8px 0; color: #666; font-size: 13px; font-style: italic; }
     .chat-ai { text-align: left; margin: 8px 0; font-weight: 600; color: #111; font-size: 13px; font-family: 'Merriweather', serif; }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # ==========================================
 # 2. 메이저 언론사 리스트
 # ==========================================
-MAJOR_KR = ["조선일보", "중앙일보", "동아일보", "한겨레", "경향신문", "한국일보", "매일경제", "한국경제", "KBS", "MBC", "SBS", "JTBC", "YTN", "연합뉴스"]
-MAJOR_US = ["CNN", "Fox News", "New York Times", "Washington Post", "Reuters", "Associated Press", "BBC", "NBC", "CNBC", "Bloomberg", "USA Today", "Wall Street Journal"]
-
+# 목록(별칭, 등급, 성향)은 data/outlets.json에 있고, import 시 한 번 색인으로 컴파일된다
 def is_major_media(source_name, region_code):
-    target_list = MAJOR_KR if region_code == "KR" else MAJOR_US
-    return any(m.lower() in source_name.lower() for m in target_list)
+    return OUTLET_INDEX.is_major(source_name, region_code)
 
 # ==========================================
 # 3. Groq 설정
 # ==========================================
 try:
     api_key = st.secrets["GROQ_API_KEY"]
-    client = Groq(api_key=api_key)
+    llm_backend = get_llm_backend(
+        api_key,
+        base_url=st.secrets.get("GROQ_BASE_URL"),
+        timeout=float(st.secrets.get("LLM_TIMEOUT", 20)),
+        deadline=float(st.secrets.get("LLM_DEADLINE", 30)),
+        max_retries=int(st.secrets.get("LLM_MAX_RETRIES", 3)),
+        # 모든 세션이 나눠 쓰는 분당 요청/토큰 한도 (Q&A가 일괄 분석보다 먼저 나간다)
+        limiter=get_rate_limiter(
+            requests_per_minute=int(st.secrets.get("LLM_RPM", 30)),
+            tokens_per_minute=int(st.secrets.get("LLM_TPM", 0)) or None,
+        ),
+        queue_timeout=float(st.secrets.get("LLM_QUEUE_TIMEOUT", 60)),
+    )
 except Exception as e:
     st.error(f"⚠️ API Key Error: {e}")
     st.stop()
 
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = {}
-
-def safe_parse_json(raw_text):
-    try:
-        clean_text = re.sub(r'```json\s*|```\s*', '', raw_text).strip()
-        clean_text = clean_text.replace('\n', ' ').replace('\r', '')
-        return json.loads(clean_text)
-    except:
-        try:
-            match = re.search(r'\{.*\}', clean_text)
-            if match: return json.loads(match.group())
-        except: return None
-    return None
-
-# ==========================================
-# 4. AI 분석 로직 (한자 제거 강화)
-# ==========================================
-@st.cache_data(show_spinner=False)
-def analyze_news_groq(news_text, region_code):
-    
-    if region_code == "KR":
-        # [수정] 한자 절대 금지 명령 추가
-        lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Chinese characters (Hanja). If a word has a Hanja equivalent (e.g. 全面), translate it to Hangul (e.g. 전면)."
-    else:
-        lang_instruction = "Answer strictly in English."
-    
-    system_prompt = f"""
-    You are a professional news analyst. 
-    Analyze the bias, factuality, context, and sentiment strictly. 
-    {lang_instruction}
-    Output JSON format ONLY.
+feed_cache = get_feed_cache(
+    ttl=int(st.secrets.get("FEED_CACHE_TTL", 300)),
+    stale_ttl=int(st.secrets.get("FEED_CACHE_STALE_TTL", 3600)),
+    max_entries=int(st.secrets.get("FEED_CACHE_MAX_ENTRIES", 256)),
+)
+prefetcher = get_prefetcher(interval=int(st.secrets.get("FEED_PREFETCH_INTERVAL", 120)))
+
+# 세션마다 하나: 분석 결과/열림 상태/Q&A 스레드를 LRU로 들고, 오래 안 본 기사부터 밀어낸다
+if "store" not in st.session_state:
+    st.session_state.store = SessionStore(
+        max_articles=int(st.secrets.get("SESSION_MAX_ARTICLES", 200)),
+        max_threads=int(st.secrets.get("SESSION_MAX_THREADS", 20)),
+        max_messages=int(st.secrets.get("SESSION_MAX_MESSAGES", 40)),
+    )
+session = st.session_state.store
+
+analysis_store = get_analysis_store(
+    path=st.secrets.get("ANALYSIS_DB_PATH", DEFAULT_DB_PATH),
+    ttl=int(st.secrets.get("ANALYSIS_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=int(st.secrets.get("ANALYSIS_CACHE_MAX_ENTRIES", 20000)),
+    max_bytes=int(st.secrets.get("ANALYSIS_CACHE_MAX_MB", 200)) * 1024 * 1024,
+)
+
+article_fetcher = get_article_fetcher(
+    store=analysis_store,
+    max_bytes=int(st.secrets.get("ARTICLE_MAX_BYTES", 1_500_000)),
+    max_workers=int(st.secrets.get("ARTICLE_FETCH_CONCURRENCY", 6)),
+)
+
+analyst = get_analyst(
+    llm_backend,
+    analysis_store,
+    concurrency=int(st.secrets.get("ANALYZE_CONCURRENCY", 4)),
+    batch_size=int(st.secrets.get("ANALYZE_BATCH_SIZE", 5)),
+    # 인기 기사의 같은/비슷한 질문은 모든 세션이 한 번 받은 답변을 재사용한다
+    answers=get_answer_cache(
+        ttl=int(st.secrets.get("QA_CACHE_TTL", 6 * 3600)),
+        threshold=float(st.secrets.get("QA_SIMILARITY", 0.83)),
+    ),
+)
+
+# 지금까지 본 기사/분석 결과를 모두 색인해 두고 비교 검색은 여기서 먼저 찾는다
+archive = get_archive(st.secrets.get("ANALYSIS_DB_PATH", DEFAULT_DB_PATH))
+SEARCH_REFRESH = int(st.secrets.get("SEARCH_REFRESH", 300))   # 같은 검색어를 RSS로 다시 받는 간격
+COMPARE_PAGE_SIZE = int(st.secrets.get("COMPARE_PAGE_SIZE", 20))
+# 분석 점수를 언론사/토픽/날짜별로 쌓아 추세 탭이 바로 읽는다
+trend_store = get_trend_store(st.secrets.get("ANALYSIS_DB_PATH", DEFAULT_DB_PATH))
+
+# 브리핑은 피드 전체를 페이지로 나눠 보여주고, 보이는 페이지와 다음 페이지만 뒤에서 미리 분석한다
+BRIEFING_PAGE_SIZE = int(st.secrets.get("BRIEFING_PAGE_SIZE", 10))
+PREFETCH_ANALYSIS = bool(st.secrets.get("PREFETCH_ANALYSIS", True))
+
+def record_prefetched(region_code, topic, records, results):
+    # 백그라운드에서 끝난 분석도 검색 색인과 추세 집계에 넣는다
+    for record, res in zip(records, results):
+        if res: archive.set_analysis([record.link], res)
+    trend_store.add_analyses([(r.link, r.source_name, r.published, res) for r, res in zip(records, results)], region_code, topic)
+
+analysis_prefetcher = get_analysis_prefetcher(
+    analyst,
+    article_fetcher,
+    max_pending=int(st.secrets.get("PREFETCH_MAX_PAGES", 4)),
+    on_result=record_prefetched,
+)
+
+# 워커(worker.py)가 미리 계산해 둔 브리핑이 이 시간 안이면 그대로 읽어서 쓴다
+briefing_store = get_briefing_store(st.secrets.get("ANALYSIS_DB_PATH", DEFAULT_DB_PATH))
+BRIEFING_MAX_AGE = int(st.secrets.get("BRIEFING_MAX_AGE", 1800))
+
+# 지표 내보내기: METRICS_PORT를 주면 /metrics(Prometheus), /metrics.json 엔드포인트를 띄우고
+# METRICS_FILE을 주면 주기적으로 파일에 덤프한다 (.json이면 JSON, 아니면 Prometheus 텍스트)
+if st.secrets.get("METRICS_PORT"):
+    metrics.serve_metrics(int(st.secrets["METRICS_PORT"]))
+METRICS_FILE = st.secrets.get("METRICS_FILE")
+
+def render_debug_panel(trace):
+    # ?debug=1 또는 DEBUG_PANEL 시크릿으로 켠다
+    with st.sidebar.expander("🛠 DEBUG · TIMINGS", expanded=False):
+        st.caption(f"This rerun: {trace.elapsed * 1000:.0f} ms")
+        rows = [
+            {"span": "  " * depth + name, "start (ms)": round(start * 1000, 1), "duration (ms)": round(duration * 1000, 1)}
+            for name, start, duration, depth in sorted(trace.spans, key=lambda span: span[1])
+        ]
+        if rows: st.dataframe(rows, hide_index=True, use_container_width=True)
+        store_summary = analysis_store.summary()
+        fetch_stats = article_fetcher.stats
+        fetch_total = fetch_stats["hits"] + fetch_stats["misses"]
+        st.caption("CACHE HIT RATES")
+        st.markdown(
+            f"- Feed cache: **{feed_cache.hit_rate():.0%}** · {feed_cache.stats}\n"
+            f"- Analysis store: **{store_summary.get('hit_rate', 0):.0%}** · {store_summary.get('entries', 0)} entries\n"
+            f"- Article bodies: **{(fetch_stats['hits'] / fetch_total if fetch_total else 0):.0%}** · {fetch_stats}\n"
+            f"- Archive: {archive.summary()}\n"
+            f"- Trends: {trend_store.summary()}\n"
+        )
+        st.caption("LLM")
+        st.markdown(
+            f"- Backend: {llm_backend.stats} · circuit **{llm_backend.breaker.state}**\n"
+            f"- Rate limiter: {llm_backend.limiter.stats if llm_backend.limiter else '-'} · queue {llm_backend.limiter.queue_depth() if llm_backend.limiter else 0}\n"
+            f"- Single-flight: {analyst.flights.stats}\n"
+            f"- Q&A answers: {analyst.answers.summary()}\n"
+            f"- Analysis prefetch: {analysis_prefetcher.stats} · queue {analysis_prefetcher.queue_depth()}\n"
+        )
+        session_stats = session.stats()
+        totals = all_sessions_stats()
+        st.caption("SESSION MEMORY")
+        st.markdown(
+            f"- This session: **{session_stats['bytes'] / 1024:.0f} KB** · {session_stats['articles']} articles · "
+            f"{session_stats['threads']} threads · {session_stats['evicted']} evicted\n"
+            f"- All sessions: **{totals['bytes'] / 1e6:.2f} MB** across {totals['sessions']} sessions\n"
+        )
+        st.download_button("metrics.prom", metrics.REGISTRY.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+        st.download_button("metrics.json", metrics.REGISTRY.to_json(), file_name="metrics.json", mime="application/json")
+
+def render_analysis_preview(placeholder, partial):
+    # 스트리밍 중 먼저 도착한 요약/키워드를 보여준다 (balance가 마지막 필드)
+    with placeholder.container():
+        if partial.get("keywords"):
+            tags_html = "".join([f"<span style='background:#f0f0f0; padding:2px 6px; font-size:11px; margin-right:4px; color:#666;'>#{tag}</span>" for tag in partial["keywords"]])
+            st.markdown(f"<div style='margin-bottom:15px;'>{tags_html}</div>", unsafe_allow_html=True)
+        if partial.get("summary"):
+            st.markdown(f"<div class='insight-box'><b>EXECUTIVE SUMMARY {partial.get('sentiment_emoji', '')}</b><br>{partial['summary']}</div>", unsafe_allow_html=True)
+        if "balance" not in partial:
+            st.caption("Processing Analyst Report...")
+
+SPECTRUM_COLORS = ["#2c3e50", "#c0392b", "#27ae60", "#8e44ad", "#e67e22", "#16a085", "#d35400", "#7f8c8d", "#2980b9", "#b03a2e"]
+
+def render_multi_comparison(res, entries):
+    core_diff_safe = html.escape(res.get("core_difference", ""))
+    st.markdown(f"""
+    <div style="text-align: center; margin-bottom: 40px; padding: 20px;">
+        <div style="font-size: 11px; color: #888; text-transform: uppercase; letter-spacing: 2px; margin-bottom: 15px; font-weight:700;">Comparative Analysis Report · {len(entries)} Outlets</div>
+        <div style="font-family: 'Merriweather', serif; font-size: 28px; font-weight: 900; color: #111; line-height:1.3;">
+            "{core_diff_safe}"
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    markers = ""
+    for n, (entry, stance) in enumerate(zip(entries, res["articles"]), 1):
+        color = SPECTRUM_COLORS[(n - 1) % len(SPECTRUM_COLORS)]
+        clean_title, source_name = entry.title, entry.source_name
+        with st.container(border=True):
+            if not stance:
+                st.markdown(f"<span style='color:{color}; font-weight:800;'>● {n}</span> <span class='badge-source'>{html.escape(source_name)}</span> {html.escape(clean_title)}", unsafe_allow_html=True)
+                st.caption("Stance unavailable")
+                continue
+            score = stance.get("stance_score", 0)
+            st.markdown(f"""
+            <div class="news-meta"><span style="color:{color}; font-weight:800;">● {n}</span> <span class='badge-source'>{html.escape(source_name)}</span></div>
+            <div class="news-title" style="border-bottom-color: {color};">{html.escape(clean_title)}</div>
+            <div class="news-summary">{html.escape(stance.get("summary", ""))}</div>
+            <div class="stat-box">
+                <span>STANCE: <b>{html.escape(stance.get("stance_label", ""))}</b></span>
+                <span style="background: #f0f0f0; padding: 4px 8px; border-radius: 2px; font-weight:bold;">Score: {score}</span>
+            </div>
+            """.replace("\n", ""), unsafe_allow_html=True)
+            st.link_button("ORIGINAL SOURCE ↗", entry.link, use_container_width=True)
+        markers += f"""
+        <div style="position: absolute; left: {(score + 10) * 5}%; top: 50%; transform: translate(-50%, -50%);">
+            <div style="width: 14px; height: 14px; background: {color}; border-radius: 50%; border: 3px solid #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>
+            <div style="position: absolute; top: -25px; left: 50%; transform: translateX(-50%); font-size: 11px; font-weight: 800; color: {color};">{n}</div>
+        </div>
+        """
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    st.caption("POLITICAL COMPASS / STANCE SPECTRUM")
+    spectrum_html = f"""
+    <div style="position: relative; height: 50px; margin-top: 20px; width: 100%;">
+        <div style="position: absolute; top: 50%; width: 100%; height: 1px; background: #bbb;"></div>
+        <div style="position: absolute; top: 35%; left: 50%; width: 1px; height: 15px; background: #999;"></div>
+        {markers}
+    </div>
+    <div style="display: flex; justify-content: space-between; font-size: 10px; color: #888; font-weight:500; margin-top: 5px;">
+        <span>◀ CRITICAL / LEFT (-10)</span>
+        <span>NEUTRAL (0)</span>
+        <span>SUPPORTIVE / RIGHT (+10) ▶</span>
+    </div>
     """
-    
-    user_prompt = f"""
-    [Article]: {news_text[:3000]}
-    
-    [Output Format (JSON Only)]:
-    {{
-        "title": "Unbiased Headline",
-        "summary": "Neutral summary (1-2 sentences)",
-        "keywords": ["tag1", "tag2", "tag3"], 
-        "sentiment_emoji": "🔥" or "😐" or "🧊", 
-        "metrics": {{
-            "who": "Key Actor",
-            "impact": "Core Impact"
-        }},
-        "scores": {{
-            "fact_ratio": Number (0-100),
-            "opinion_ratio": Number (0-100)
-        }},
-        "balance": {{
-            "stated": "Explicit Claim",
-            "hidden": "Implicit Bias/Context",
-            "rating": "FACT" or "MIXED" or "OPINION"
-        }},
-        "deep_dive": {{
-            "background_context": "Historical background or situation explaining why this news matters (2-3 sentences)",
-            "fact_check": "Verification of key claims or clarifying potentially misleading statistics",
-            "missing_perspective": "What viewpoints or stakeholders are omitted in this article?"
-        }}
-    }}
+    st.markdown(spectrum_html.replace("\n", ""), unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("### 📌 Analytic Notes")
+    for point in res.get("key_points", []):
+        safe_point = html.escape(point)
+        st.markdown(f"<div style='margin-bottom:8px; color:#444;'>• {safe_point}</div>", unsafe_allow_html=True)
+
+def render_pair_comparison(res, art_a, art_b):
+    core_diff_safe = html.escape(res['core_difference'])
+    st.markdown(f"""
+    <div style="text-align: center; margin-bottom: 40px; padding: 20px;">
+        <div style="font-size: 11px; color: #888; text-transform: uppercase; letter-spacing: 2px; margin-bottom: 15px; font-weight:700;">Comparative Analysis Report</div>
+        <div style="font-family: 'Merriweather', serif; font-size: 28px; font-weight: 900; color: #111; line-height:1.3;">
+            "{core_diff_safe}"
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    score_a = res['article_a'].get('stance_score', 0)
+    score_b = res['article_b'].get('stance_score', 0)
+
+    src_a = html.escape(art_a.source or "Source A")
+    src_b = html.escape(art_b.source or "Source B")
+    title_a = html.escape(art_a.headline)
+    title_b = html.escape(art_b.headline)
+    summary_a = html.escape(res['article_a']['summary'])
+    summary_b = html.escape(res['article_b']['summary'])
+    label_a = html.escape(res['article_a']['stance_label'])
+    label_b = html.escape(res['article_b']['stance_label'])
+
+    html_content = f"""
+    <div class="compare-container">
+        <div class="paper-card">
+            <div class="news-meta">
+                <span style="color: #2c3e50;">● ARTICLE A</span>
+                <span style="margin: 0 10px; color: #ddd;">|</span>
+                {src_a}
+            </div>
+            <div class="news-title">{title_a}</div>
+            <div class="news-summary">
+                {summary_a}
+            </div>
+            <div class="stat-box">
+                <span>STANCE: <b>{label_a}</b></span>
+                <span style="background: #f0f0f0; padding: 4px 8px; border-radius: 2px; font-weight:bold;">Score: {score_a}</span>
+            </div>
+        </div>
+
+        <div class="divider-vertical">
+            <div class="vs-badge-minimal">VS</div>
+        </div>
+
+        <div class="paper-card">
+            <div class="news-meta">
+                <span style="color: #c0392b;">● ARTICLE B</span>
+                <span style="margin: 0 10px; color: #ddd;">|</span>
+                {src_b}
+            </div>
+            <div class="news-title" style="border-bottom-color: #c0392b;">{title_b}</div>
+            <div class="news-summary">
+                {summary_b}
+            </div>
+            <div class="stat-box">
+                <span>STANCE: <b>{label_b}</b></span>
+                <span style="background: #f0f0f0; padding: 4px 8px; border-radius: 2px; font-weight:bold;">Score: {score_b}</span>
+            </div>
+        </div>
+    </div>
     """
-    
+    st.markdown(html_content.replace("\n", ""), unsafe_allow_html=True)
+
+    c1, c2, c3 = st.columns([1, 0.1, 1])
+    c1.link_button(f"Read Full Article (A)", art_a.link, use_container_width=True)
+    c3.link_button(f"Read Full Article (B)", art_b.link, use_container_width=True)
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    st.caption("POLITICAL COMPASS / STANCE SPECTRUM")
+
+    pos_a = (score_a + 10) * 5 
+    pos_b = (score_b + 10) * 5
+
+    spectrum_html = f"""
+    <div style="position: relative; height: 50px; margin-top: 20px; width: 100%;">
+        <div style="position: absolute; top: 50%; width: 100%; height: 1px; background: #bbb;"></div>
+        <div style="position: absolute; top: 35%; left: 50%; width: 1px; height: 15px; background: #999;"></div>
+
+        <div style="position: absolute; left: {pos_a}%; top: 50%; transform: translate(-50%, -50%); transition: left 1s;">
+            <div style="width: 14px; height: 14px; background: #2c3e50; border-radius: 50%; border: 3px solid #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>
+            <div style="position: absolute; top: -25px; left: 50%; transform: translateX(-50%); font-size: 11px; font-weight: 800; color: #2c3e50;">A</div>
+        </div>
+
+        <div style="position: absolute; left: {pos_b}%; top: 50%; transform: translate(-50%, -50%); transition: left 1s;">
+            <div style="width: 14px; height: 14px; background: #c0392b; border-radius: 50%; border: 3px solid #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>
+            <div style="position: absolute; top: -25px; left: 50%; transform: translateX(-50%); font-size: 11px; font-weight: 800; color: #c0392b;">B</div>
+        </div>
+    </div>
+    <div style="display: flex; justify-content: space-between; font-size: 10px; color: #888; font-weight:500; margin-top: 5px;">
+        <span>◀ CRITICAL / LEFT (-10)</span>
+        <span>NEUTRAL (0)</span>
+        <span>SUPPORTIVE / RIGHT (+10) ▶</span>
+    </div>
+    """
+    st.markdown(spectrum_html.replace("\n", ""), unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("### 📌 Analytic Notes")
+    for point in res.get("key_points", []):
+        safe_point = html.escape(point)
+        st.markdown(f"<div style='margin-bottom:8px; color:#444;'>• {safe_point}</div>", unsafe_allow_html=True)
+
+def render_analysis_report(res, entry, duplicates, region_code):
+    # Keywords
+    if "keywords" in res and res["keywords"]:
+        tags_html = "".join([f"<span style='background:#f0f0f0; padding:2px 6px; font-size:11px; margin-right:4px; color:#666;'>#{tag}</span>" for tag in res["keywords"]])
+        st.markdown(f"<div style='margin-bottom:15px;'>{tags_html}</div>", unsafe_allow_html=True)
+
+    # Fact Score Bar
+    fact_score = res['scores'].get('fact_ratio', 50)
+    st.caption(f"FACTUALITY INDEX: {fact_score}/100")
+    st.markdown(f"""
+    <div style="width: 100%; background-color: #eee; height: 4px; margin-bottom: 15px;">
+        <div style="width: {fact_score}%; background-color: #2c3e50; height: 4px;"></div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    sentiment_emoji = res.get("sentiment_emoji", "🧐")
+    st.markdown(f"""
+    <div class='insight-box'>
+        <b>EXECUTIVE SUMMARY {sentiment_emoji}</b><br>{res['summary']}<br><br>
+        <b>CONTEXT & BIAS</b><br>{res['balance']['hidden']}
+    </div>
+    """, unsafe_allow_html=True)
+
+    # [UPDATE] Deep Dive UI (줄바꿈 제거 트릭 적용)
+    # deep dive는 펼쳤을 때만 큰 모델로 만든다 (예전에 한 번에 분석된 결과에는 이미 들어 있다)
+    st.markdown("<br>", unsafe_allow_html=True)
+    expander = st.expander("🔍 DEEP DIVE (Context & Facts)", key=f"deep_{entry.link}", on_change="rerun")
+    with expander:
+        deep_dive = res.get("deep_dive") or session.deep_dive(entry.link)
+        if deep_dive is None and expander.open:
+            with st.spinner("Consulting Senior Analyst..."):
+                body = article_fetcher.fetch_text(entry.link)
+                deep_dive = analyst.deep_dive(build_news_text(entry.headline, body), region_code, res)
+            if deep_dive: session.set_deep_dive([member.link for member in [entry] + duplicates], deep_dive)
+        if deep_dive is None:
+            if expander.open: st.error("Deep Dive Unavailable")
+            return
+
+        # HTML을 한 덩어리로 만든 후 줄바꿈 제거
+        html_content = f"""
+        <div class="deep-dive-box">
+            <div class="deep-dive-header">📖 Context & Background</div>
+            <div class="deep-dive-content">
+                {deep_dive.get("background_context", "N/A")}
+            </div>
+
+            <div class="deep-dive-header" style="color:#27ae60;">✅ Fact Check & Clarification</div>
+            <div class="deep-dive-content">
+                {deep_dive.get("fact_check", "N/A")}
+            </div>
+
+            <div class="deep-dive-header" style="color:#e67e22;">⚖️ Missing Perspectives</div>
+            <div class="deep-dive-content">
+                {deep_dive.get("missing_perspective", "N/A")}
+            </div>
+            <div style="font-size:11px; color:#999; text-align:right; margin-top:10px;">
+                Generated by News Dietitian AI Analyst
+            </div>
+        </div>
+        """
+        st.markdown(html_content.replace("\n", ""), unsafe_allow_html=True)
+
+# 카드, Q&A 스레드, 비교 탭은 각자 fragment다: 그 안의 버튼/폼을 누르면
+# 피드 읽기와 CSS, 나머지 카드들을 건너뛰고 해당 조각만 다시 실행된다
+def rerun_fragment():
+    # 조각 단독 rerun 중이면 그 조각만, 앱 전체 rerun 중(AppTest 등)이면 앱 전체를 다시 그린다
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile", 
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
-        )
-        return safe_parse_json(completion.choices[0].message.content)
-    except:
-        return None
+        st.rerun(scope="fragment")
+    except st.errors.StreamlitAPIException:
+        st.rerun()
+
+@st.fragment
+def render_qa_thread(i, article_id, clean_title, region_code):
+    with metrics.span("render.qa"):
+        st.markdown("<div style='margin-top:20px; font-size:11px; font-weight:700; color:#ccc; letter-spacing:1px;'>INTERACTIVE Q&A</div>", unsafe_allow_html=True)
+        for chat in session.thread(article_id):
+            role_class = "chat-user" if chat["role"] == "user" else "chat-ai"
+            st.markdown(f"<div class='{role_class}'>{chat['content']}</div>", unsafe_allow_html=True)
+
+        with st.form(key=f"chat_form_{i}", clear_on_submit=True):
+            c1, c2 = st.columns([4, 1])
+            uq = c1.text_input("Q", placeholder="Inquire about this article...", label_visibility="collapsed")
+            if c2.form_submit_button("ASK", use_container_width=True) and uq:
+                # 맥락 = 저장된 분석 결과 + 예전 대화 요약 + 요약에 아직 안 들어간 최근 대화
+                summary, folded = session.thread_summary(article_id)
+                history = session.thread(article_id)[folded:]
+                context = build_context(clean_title, session.analysis(article_id), session.deep_dive(article_id))
+                session.add_message(article_id, "user", uq)
+                st.markdown(f"<div class='chat-user'>{uq}</div>", unsafe_allow_html=True)
+                answer_box = st.empty()
+                try:
+                    with answer_box.container():
+                        ans = st.write_stream(analyst.ask_ai_about_news(context, uq, region_code, history, summary, article_id))
+                except (AnswerInterrupted, Exception):
+                    # Streamlit의 rerun/stop 신호(BaseException)는 잡지 않고 그대로 올려 보낸다
+                    # 답변이 중간에 끊기면 잘린 조각 대신 오류 문구를 보여주고 스레드에도 그것만 남긴다
+                    ans = QA_UNAVAILABLE
+                    answer_box.markdown(f"<div class='chat-ai'>{ans}</div>", unsafe_allow_html=True)
+                session.add_message(article_id, "ai", ans)
+                # 메시지를 넣으면서 스레드가 잘리면 접힌 개수도 줄어드므로 다시 읽는다
+                summary, folded = session.thread_summary(article_id)
+                summary, folded_now = analyst.fold_thread(summary, session.thread(article_id)[folded:], region_code)
+                if folded_now: session.set_thread_summary(article_id, summary, folded + folded_now)
+                rerun_fragment()
+
+@st.fragment
+def render_briefing_card(i, entry, duplicates, region_code, topic):
+    with st.container(border=True), metrics.span("render.card"):
+        clean_title, source_name = entry.title, entry.source_name
+
+        st.markdown(f"<span class='badge-source'>{source_name}</span> <span style='color:#bbb; font-size:11px;'>{entry.published[:16]}</span>", unsafe_allow_html=True)
+        st.markdown(f"<h3 style='margin-top: 10px; font-size: 20px; line-height: 1.4; margin-bottom: 20px;'>{clean_title}</h3>", unsafe_allow_html=True)
+        if duplicates:
+            also = ", ".join(d.source_name for d in duplicates)
+            st.caption(f"ALSO IN: {also}")
+
+        article_id = entry.link
+        is_open = session.is_open(article_id)
+
+        if is_open:
+            btn_label = "CLOSE REPORT"
+            btn_type = "secondary"
+        else:
+            btn_label = "ANALYZE BIAS"
+            btn_type = "primary"
+
+        if st.button(btn_label, key=f"btn_{i}", type=btn_type, use_container_width=True):
+            session.set_open(article_id, not is_open)
+            if not is_open and not session.has_analysis(article_id):
+                preview = st.empty()
+                preview.caption("Processing Analyst Report...")
+                res = None
+                body = article_fetcher.fetch_text(entry.link)
+                for res in analyst.analyze_news_stream(build_news_text(entry.headline, body), region_code):
+                    if res: render_analysis_preview(preview, res)
+                session.set_analysis([member.link for member in [entry] + duplicates], res)
+                archive.set_analysis([member.link for member in [entry] + duplicates], res)
+                trend_store.add_analyses([(entry.link, entry.source_name, entry.published, res)], region_code, topic)
+            rerun_fragment()
+
+        if is_open and session.has_analysis(article_id):
+            res = session.analysis(article_id)
+            if res:
+                st.markdown("---")
+                render_analysis_report(res, entry, duplicates, region_code)
+                render_qa_thread(i, article_id, clean_title, region_code)
+        st.link_button("ORIGINAL SOURCE ↗", entry.link, use_container_width=True)
+
+@st.fragment
+def render_compare_tab(region_code):
+    with metrics.span("render.compare"):
+        if region_code == "KR":
+            txt = {
+                "info": "💡 비교할 주제를 입력하세요. (예: 금리 인상, 선거, 부동산 정책)",
+                "placeholder": "키워드 입력...",
+                "search_btn": "검색 (SEARCH)",
+                "compare_btn": "선택한 기사 비교 분석 (RUN COMPARISON, 2개 이상)",
+                "analyzing": "심층 비교 분석 보고서를 작성 중입니다...",
+                "found": "개의 관련 기사 검색됨",
+                "major": "Major"
+            }
+        else:
+            txt = {
+                "info": "💡 Enter topic to compare perspectives (e.g., Fed Rates, Elections)",
+                "placeholder": "Enter Keyword...",
+                "search_btn": "SEARCH",
+                "compare_btn": "RUN COMPARISON (Select 2+)",
+                "analyzing": "Generating Comparative Analyst Report...",
+                "found": "articles found.",
+                "major": "Major"
+            }
+
+        st.info(txt["info"])
+
+        col_search, col_btn = st.columns([4, 1])
+        with col_search:
+            search_query = st.text_input("Search Keyword", placeholder=txt["placeholder"], label_visibility="collapsed")
+        with col_btn:
+            run_search = st.button(txt["search_btn"], type="primary", use_container_width=True)
+
+        if run_search and search_query:
+            # 아카이브에서 먼저 찾는다. 이 검색어를 최근에 RSS로 받은 적이 없을 때만 새 기사를 받아 넣는데,
+            # 예전에 받아 둔 RSS 결과가 있으면 받기는 뒤에서 돌리고 바로 보여준다 (처음 검색은 RSS를 기다린다.
+            # RSS 결과는 제목에 검색어가 그대로 없어도 항상 결과에 들어간다)
+            url = search_url(search_query, region_code)
+            prefetcher.remember_search(url)
+            if archive.search_due(search_query, region_code, SEARCH_REFRESH):
+                fetch = lambda query: feed_cache.get(url)
+                if archive.has_results(search_query, region_code):
+                    archive.refresh(search_query, region_code, fetch, wait=False)
+                else:
+                    with st.spinner("Accessing Wire Services..."):
+                        archive.refresh(search_query, region_code, fetch)
+            session.set_comparison([], {}, search_query)
 
-@st.cache_data(show_spinner=False)
-def compare_news_groq(text_a, text_b, region_code):
-    if region_code == "KR":
-        lang_instruction = "Answer strictly in Korean. Use Hangul ONLY. NEVER use Hanja."
-        target_lang = "Korean"
-    else:
-        lang_instruction = "Answer strictly in English."
-        target_lang = "English"
-
-    system_prompt = f"""
-    You are an unbiased news comparator.
-    Compare two articles on the same topic strictly.
-    Quantify the stance on a scale from -10 to +10.
-    {lang_instruction}
-    Output JSON format ONLY.
-    """
+        if session.comparison_query:
+            with metrics.span("archive.search"):
+                hits, total = archive.search(session.comparison_query, region_code, limit=COMPARE_PAGE_SIZE, offset=session.comparison_page * COMPARE_PAGE_SIZE)
+            major_entries = []
+            minor_entries = []
 
-    user_prompt = f"""
-    [Article A]: {text_a[:2000]}
-    [Article B]: {text_b[:2000]}
+            for e in hits:
+                src = e["title"].rsplit(' - ', 1)[1] if ' - ' in e["title"] else ""
+                if is_major_media(src, region_code):
+                    major_entries.append(e)
+                else:
+                    minor_entries.append(e)
 
-    [Instruction]:
-    Assign a 'stance_score' for each article from -10 to +10.
-    - -10 = Extremely Critical / Negative / Left-leaning
-    - 0 = Neutral / Balanced
-    - +10 = Extremely Supportive / Positive / Right-leaning
-    
-    [Output Format (JSON Only)]:
-    {{
-        "core_difference": "One sentence summary of the main conflict in {target_lang}.",
-        "key_points": ["Point 1", "Point 2", "Point 3"],
-        "article_a": {{
-            "stance_label": "Short keyword (e.g. Critical) in {target_lang}",
-            "stance_score": Integer (-10 to 10),
-            "summary": "1 sentence summary in {target_lang}"
-        }},
-        "article_b": {{
-            "stance_label": "Short keyword in {target_lang}",
-            "stance_score": Integer (-10 to 10),
-            "summary": "1 sentence summary in {target_lang}"
-        }}
-    }}
-    """
-    
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
-        )
-        return safe_parse_json(completion.choices[0].message.content)
-    except:
-        return None
+            # 같은 기사의 전재본은 하나만 남기고 (메이저 언론사 우선) 나머지는 개수로만 표시
+            comparison_news = []
+            comparison_duplicates = {}
+            for members in cluster_entries([feedparser.FeedParserDict(e) for e in major_entries + minor_entries]):
+                comparison_news.append(EntryRecord.from_entry(members[0]))
+                comparison_duplicates[members[0].link] = len(members) - 1
+            session.set_comparison(comparison_news, comparison_duplicates, session.comparison_query, session.comparison_page, total)
+
+        if session.comparison_query and not session.comparison:
+            st.caption("No archived articles match this query yet.")
+
+        if session.comparison:
+            pages = max(1, -(-session.comparison_total // COMPARE_PAGE_SIZE))
+            st.write(f"Query Results: {session.comparison_total} {txt['found']}")
+            if pages > 1:
+                c_prev, c_page, c_next = st.columns([1, 3, 1])
+                if c_prev.button("◀ PREV", disabled=session.comparison_page == 0, use_container_width=True):
+                    session.set_comparison([], {}, session.comparison_query, session.comparison_page - 1)
+                    rerun_fragment()
+                c_page.caption(f"Page {session.comparison_page + 1} / {pages}")
+                if c_next.button("NEXT ▶", disabled=session.comparison_page + 1 >= pages, use_container_width=True):
+                    session.set_comparison([], {}, session.comparison_query, session.comparison_page + 1)
+                    rerun_fragment()
+
+            with st.form("compare_form"):
+                selected_indices = []
+                for idx, entry in enumerate(session.comparison):
+                    clean_title, source_name = entry.title, entry.source_name
+
+                    is_major = is_major_media(source_name, region_code)
+                    label_prefix = "⭐ " if is_major else ""
+                    label = f"{label_prefix}**[{source_name}]** {clean_title}"
+                    dup_count = session.comparison_duplicates.get(entry.link, 0)
+                    if dup_count: label += f" (+{dup_count})"
+
+                    if st.checkbox(label, key=f"chk_{entry.link}"): 
+                        selected_indices.append(entry)
+
+                st.markdown("---")
+                if st.form_submit_button(txt["compare_btn"], type="primary", use_container_width=True):
+                    if len(selected_indices) == 2:
+                        art_a, art_b = selected_indices[0], selected_indices[1]
+
+                        with st.spinner(txt["analyzing"]):
+                            bodies = article_fetcher.fetch_many([art_a.link, art_b.link])
+                            res = analyst.compare_news_groq(
+                                build_news_text(art_a.headline, bodies.get(art_a.link)),
+                                build_news_text(art_b.headline, bodies.get(art_b.link)),
+                                region_code
+                            )
+                            if res:
+                                trend_store.add_stances([
+                                    (art.link, art.source_name, art.published, model_value(res, f"{side}.stance_score"))
+                                    for art, side in ((art_a, "article_a"), (art_b, "article_b"))
+                                ], region_code, "COMPARE")
+                                render_pair_comparison(res, art_a, art_b)
+                    elif len(selected_indices) > 2:
+                        with st.spinner(txt["analyzing"]):
+                            bodies = article_fetcher.fetch_many([e.link for e in selected_indices])
+                            res = analyst.compare_news_multi(
+                                [build_news_text(e.headline, bodies.get(e.link)) for e in selected_indices],
+                                session.comparison_query,
+                                region_code
+                            )
+                        if res:
+                            trend_store.add_stances([
+                                (e.link, e.source_name, e.published, model_value(stance, "stance_score"))
+                                for e, stance in zip(selected_indices, res["articles"]) if stance
+                            ], region_code, "COMPARE")
+                            render_multi_comparison(res, selected_indices)
+                        else:
+                            st.error("Comparison Unavailable")
 
-def ask_ai_about_news(news_context, user_question, region_code):
-    lang_instruction = "Answer in English." if region_code == "US" else "Answer in Korean (Hangul only)."
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": f"You are a neutral news assistant. {lang_instruction}"},
-                {"role": "user", "content": f"Context: {news_context}\n\nQuestion: {user_question}"}
-            ],
-            temperature=0.5
-        )
-        return completion.choices[0].message.content
-    except:
-        return "Sorry, I cannot answer right now."
+                    else:
+                        st.warning("⚠️ 2개 이상의 기사를 선택해주세요. (Please select at least 2 articles)")
+
+@st.fragment
+def render_trends_tab(region_code):
+    with metrics.span("render.trends"):
+        st.markdown("### Outlet Report Card")
+        st.caption("Aggregated from every analysis and comparison recorded so far (percentiles are ±2 points).")
+        c_topic, c_window, c_min = st.columns(3)
+        topic = c_topic.selectbox("TOPIC", ["ALL"] + list(REGION_FEEDS[region_code]) + ["COMPARE"], key="trend_topic")
+        days = c_window.selectbox("WINDOW", [7, 30, 90, 365], index=1, format_func=lambda d: f"Last {d} days", key="trend_days")
+        min_articles = c_min.number_input("MIN ARTICLES", min_value=1, max_value=1000, value=3, key="trend_min")
+        topic = None if topic == "ALL" else topic
+
+        rows = trend_store.outlets(region_code, topic, days=days, min_articles=min_articles)
+        if not rows:
+            st.info("No analyses recorded for this selection yet.")
+            return
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+        outlet = st.selectbox("OUTLET TREND", [row["outlet"] for row in rows], key="trend_outlet")
+        series = trend_store.series(outlet, region_code, topic, days=days)
+        if series:
+            st.line_chart(series, x="day", y=["fact_ratio", "opinion_ratio"])
+            if any(point["stance"] is not None for point in series):
+                st.caption("STANCE (-10 ~ +10)")
+                st.line_chart(series, x="day", y="stance")
 
 # ==========================================
 # 5. UI Layout
@@ -304,326 +773,118 @@ st.sidebar.markdown("---")
 region = st.sidebar.selectbox("REGION / EDITION", ("🇰🇷 Korea (KR)", "🇺🇸 USA (US)"), index=1)
 st.sidebar.caption("CURATED FEEDS")
 
-if "Korea" in region:
-    region_code = "KR"
-    rss_categories = {
-        "HEADLINES": "https://news.google.com/rss?hl=ko&gl=KR&ceid=KR:ko",
-        "POLITICS": "https://news.google.com/rss/headlines/section/topic/POLITICS?hl=ko&gl=KR&ceid=KR:ko",
-        "BUSINESS": "https://news.google.com/rss/headlines/section/topic/BUSINESS?hl=ko&gl=KR&ceid=KR:ko",
-        "WORLD": "https://news.google.com/rss/headlines/section/topic/WORLD?hl=ko&gl=KR&ceid=KR:ko",
-        "TECH": "https://news.google.com/rss/headlines/section/topic/TECHNOLOGY?hl=ko&gl=KR&ceid=KR:ko"
-    }
-else:
-    region_code = "US"
-    rss_categories = {
-        "HEADLINES": "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en",
-        "POLITICS": "https://news.google.com/rss/headlines/section/topic/POLITICS?hl=en-US&gl=US&ceid=US:en",
-        "BUSINESS": "https://news.google.com/rss/headlines/section/topic/BUSINESS?hl=en-US&gl=US&ceid=US:en",
-        "WORLD": "https://news.google.com/rss/headlines/section/topic/WORLD?hl=en-US&gl=US&ceid=US:en",
-        "TECH": "https://news.google.com/rss/headlines/section/topic/TECHNOLOGY?hl=en-US&gl=US&ceid=US:en"
-    }
+region_code = "KR" if "Korea" in region else "US"
+rss_categories = REGION_FEEDS[region_code]
 
 category = st.sidebar.radio("TOPICS", list(rss_categories.keys()))
 st.markdown(f"<h1 style='border-bottom: 2px solid #2c3e50; padding-bottom: 15px; margin-bottom: 30px;'>{category} <span style='font-size:18px; color:#888; font-weight:400;'>| {region_code} Edition</span></h1>", unsafe_allow_html=True)
 
-try:
-    headers = {"User-Agent": "Mozilla/5.0"}
-    resp = requests.get(rss_categories.get(category), headers=headers, timeout=5)
-    news = feedparser.parse(resp.content)
-except:
-    st.error("Feed Unavailable")
-    news = None
+# 워커가 만들어 둔 브리핑이 있으면 첫 페이지는 피드를 다시 가져오지 않는다
+# (메모리에 이미 있는 피드만 꺼내서 페이지 수와 다음 페이지 미리 분석에 쓴다)
+feed_key = f"{region_code}/{category}"
+page = session.page(feed_key)
+with metrics.span("briefing.load"):
+    briefing = briefing_store.latest(region_code, category, max_age=BRIEFING_MAX_AGE)
+news = None
+if briefing and page == 0:
+    news = feed_cache.peek(rss_categories.get(category))
+else:
+    try:
+        with metrics.span("feed.read"):
+            news = read_feed(rss_categories.get(category))
+    except:
+        st.error("Feed Unavailable")
+if news is not None:
+    # 검색 색인은 부가 기능이다: 아카이브(SQLite)가 실패해도 멀쩡히 받은 피드는 그대로 보여준다
+    try:
+        archive.add_feed(news, region_code)
+    except:
+        metrics.inc("archive_errors", op="add_feed")
 
 # ==========================================
-# 6. TABS (Feed / Comparison)
+# 6. TABS (Feed / Comparison / Trends)
 # ==========================================
-tab1, tab2 = st.tabs(["📰 Daily Briefing", "⚖️ Analyst Compare"])
+tab1, tab2, tab3 = st.tabs(["📰 Daily Briefing", "⚖️ Analyst Compare", "📈 Outlet Trends"])
 
 # --- TAB 1: Daily Feed (Deep Dive UI Fix Applied) ---
-with tab1:
-    if news and news.entries:
+with tab1, metrics.span("render.briefing"):
+    # 같은 기사(통신사 전재 등)는 한 카드로 묶고, 분석 결과는 묶음 전체에 나눠준다.
+    # 카드(fragment)에는 화면에 필요한 필드만 담은 가벼운 레코드를 넘긴다
+    all_clusters = feed_clusters(news) if news and news.entries else []
+    if briefing and briefing["items"] and page == 0:
+        # 미리 계산된 브리핑: 분석 결과까지 들어 있으므로 읽기만 한다
+        for item in briefing["items"]:
+            if item["analysis"] and not session.has_analysis(item["link"]):
+                session.set_analysis([member["link"] for member in [item] + item["duplicates"]], item["analysis"])
+        clusters = [[EntryRecord.from_entry(member) for member in [item] + item["duplicates"]] for item in briefing["items"]]
+        total = max(len(all_clusters), briefing.get("clusters", len(clusters)))
+    else:
+        # 피드가 다시 받아져 짧아졌으면 마지막 페이지를 보여준다
+        total = len(all_clusters)
+        page = min(page, max(0, -(-total // BRIEFING_PAGE_SIZE) - 1))
+        clusters = all_clusters[page * BRIEFING_PAGE_SIZE:(page + 1) * BRIEFING_PAGE_SIZE]
+    pages = max(1, -(-total // BRIEFING_PAGE_SIZE))
+
+    if clusters:
+        visible_entries = [members[0] for members in clusters]
+        duplicates = {members[0].link: members[1:] for members in clusters}
+        # 다른 세션이나 백그라운드에서 이미 끝난 분석은 가져오고, 나머지는 이 페이지와 다음 페이지만 미리 분석한다
+        for e in visible_entries:
+            if not session.has_analysis(e.link) and analysis_prefetcher.result(e.link):
+                session.set_analysis([member.link for member in [e] + duplicates[e.link]], analysis_prefetcher.result(e.link))
+        pending = [e for e in visible_entries if not session.has_analysis(e.link)]
+        if PREFETCH_ANALYSIS:
+            next_page = all_clusters[(page + 1) * BRIEFING_PAGE_SIZE:(page + 2) * BRIEFING_PAGE_SIZE]
+            analysis_prefetcher.request(pending, region_code, category)
+            analysis_prefetcher.request([members[0] for members in next_page], region_code, category)
+        if st.button(f"ANALYZE ALL ({len(pending)})", key="analyze_all", disabled=not pending, use_container_width=True):
+            progress = st.progress(0.0, text="Processing Analyst Reports...")
+            bodies = article_fetcher.fetch_many([e.link for e in pending])
+            news_texts = [build_news_text(e.headline, bodies.get(e.link)) for e in pending]
+            done = 0
+            for indices, results in analyst.analyze_batches(news_texts, region_code):
+                for i, res in zip(indices, results):
+                    e = pending[i]
+                    session.set_analysis([member.link for member in [e] + duplicates[e.link]], res)
+                    archive.set_analysis([member.link for member in [e] + duplicates[e.link]], res)
+                    session.set_open(e.link, True)
+                trend_store.add_analyses([(pending[i].link, pending[i].source_name, pending[i].published, res) for i, res in zip(indices, results)], region_code, category)
+                done += len(indices)
+                progress.progress(done / len(pending), text=f"Processing Analyst Reports... ({done}/{len(pending)})")
+            progress.empty()
+            st.rerun()
+
         cols = st.columns(2)
-        for i, entry in enumerate(news.entries[:10]):
+        for i, entry in enumerate(visible_entries):
             with cols[i % 2]:
-                with st.container(border=True):
-                    if ' - ' in entry.title:
-                        clean_title = entry.title.rsplit(' - ', 1)[0]
-                        source_name = entry.title.rsplit(' - ', 1)[1]
-                    else:
-                        clean_title = entry.title
-                        source_name = "NEWS"
-                    
-                    st.markdown(f"<span class='badge-source'>{source_name}</span> <span style='color:#bbb; font-size:11px;'>{entry.published[:16]}</span>", unsafe_allow_html=True)
-                    st.markdown(f"<h3 style='margin-top: 10px; font-size: 20px; line-height: 1.4; margin-bottom: 20px;'>{clean_title}</h3>", unsafe_allow_html=True)
-                    
-                    article_id = entry.link
-                    view_key = f"view_{article_id}"
-                    if view_key not in st.session_state: st.session_state[view_key] = False
-
-                    if st.session_state[view_key]:
-                        btn_label = "CLOSE REPORT"
-                        btn_type = "secondary"
-                    else:
-                        btn_label = "ANALYZE BIAS"
-                        btn_type = "primary"
-
-                    if st.button(btn_label, key=f"btn_{i}", type=btn_type, use_container_width=True):
-                        st.session_state[view_key] = not st.session_state[view_key]
-                        if st.session_state[view_key] and f"analysis_{article_id}" not in st.session_state:
-                            with st.spinner("Processing Analyst Report..."):
-                                res = analyze_news_groq(f"Title: {clean_title}\nContent: {entry.title}", region_code)
-                                st.session_state[f"analysis_{article_id}"] = res
-                        st.rerun()
-                    
-                    if st.session_state[view_key] and f"analysis_{article_id}" in st.session_state:
-                        res = st.session_state[f"analysis_{article_id}"]
-                        if res:
-                            st.markdown("---")
-                            # Keywords
-                            if "keywords" in res and res["keywords"]:
-                                tags_html = "".join([f"<span style='background:#f0f0f0; padding:2px 6px; font-size:11px; margin-right:4px; color:#666;'>#{tag}</span>" for tag in res["keywords"]])
-                                st.markdown(f"<div style='margin-bottom:15px;'>{tags_html}</div>", unsafe_allow_html=True)
-
-                            # Fact Score Bar
-                            fact_score = res['scores'].get('fact_ratio', 50)
-                            st.caption(f"FACTUALITY INDEX: {fact_score}/100")
-                            st.markdown(f"""
-                            <div style="width: 100%; background-color: #eee; height: 4px; margin-bottom: 15px;">
-                                <div style="width: {fact_score}%; background-color: #2c3e50; height: 4px;"></div>
-                            </div>
-                            """, unsafe_allow_html=True)
-
-                            sentiment_emoji = res.get("sentiment_emoji", "🧐")
-                            st.markdown(f"""
-                            <div class='insight-box'>
-                                <b>EXECUTIVE SUMMARY {sentiment_emoji}</b><br>{res['summary']}<br><br>
-                                <b>CONTEXT & BIAS</b><br>{res['balance']['hidden']}
-                            </div>
-                            """, unsafe_allow_html=True)
-
-                            # [UPDATE] Deep Dive UI (줄바꿈 제거 트릭 적용)
-                            st.markdown("<br>", unsafe_allow_html=True)
-                            with st.expander("🔍 DEEP DIVE (Context & Facts)"):
-                                deep_dive = res.get("deep_dive", {})
-                                
-                                # HTML을 한 덩어리로 만든 후 줄바꿈 제거
-                                html_content = f"""
-                                <div class="deep-dive-box">
-                                    <div class="deep-dive-header">📖 Context & Background</div>
-                                    <div class="deep-dive-content">
-                                        {deep_dive.get("background_context", "N/A")}
-                                    </div>
-
-                                    <div class="deep-dive-header" style="color:#27ae60;">✅ Fact Check & Clarification</div>
-                                    <div class="deep-dive-content">
-                                        {deep_dive.get("fact_check", "N/A")}
-                                    </div>
-
-                                    <div class="deep-dive-header" style="color:#e67e22;">⚖️ Missing Perspectives</div>
-                                    <div class="deep-dive-content">
-                                        {deep_dive.get("missing_perspective", "N/A")}
-                                    </div>
-                                    <div style="font-size:11px; color:#999; text-align:right; margin-top:10px;">
-                                        Generated by News Dietitian AI Analyst
-                                    </div>
-                                </div>
-                                """
-                                st.markdown(html_content.replace("\n", ""), unsafe_allow_html=True)
-
-                            st.markdown("<div style='margin-top:20px; font-size:11px; font-weight:700; color:#ccc; letter-spacing:1px;'>INTERACTIVE Q&A</div>", unsafe_allow_html=True)
-                            if article_id not in st.session_state.chat_history: st.session_state.chat_history[article_id] = []
-                            
-                            for chat in st.session_state.chat_history[article_id]:
-                                role_class = "chat-user" if chat["role"] == "user" else "chat-ai"
-                                st.markdown(f"<div class='{role_class}'>{chat['content']}</div>", unsafe_allow_html=True)
-
-                            with st.form(key=f"chat_form_{i}", clear_on_submit=True):
-                                c1, c2 = st.columns([4, 1])
-                                uq = c1.text_input("Q", placeholder="Inquire about this article...", label_visibility="collapsed")
-                                if c2.form_submit_button("ASK", use_container_width=True) and uq:
-                                    st.session_state.chat_history[article_id].append({"role": "user", "content": uq})
-                                    with st.spinner("Analyst is typing..."):
-                                        ans = ask_ai_about_news(f"Title: {clean_title}", uq, region_code)
-                                        st.session_state.chat_history[article_id].append({"role": "ai", "content": ans})
-                                    st.rerun()
-                    st.link_button("ORIGINAL SOURCE ↗", entry.link, use_container_width=True)
+                render_briefing_card(i, entry, duplicates[entry.link], region_code, category)
+
+    if pages > 1:
+        c_prev, c_page, c_next = st.columns([1, 3, 1])
+        if c_prev.button("◀ PREV", key="feed_prev", disabled=page == 0, use_container_width=True):
+            session.set_page(feed_key, page - 1)
+            st.rerun()
+        c_page.markdown(f"<div style='text-align:center; color:#888; font-size:13px; padding-top:8px;'>Page {page + 1} / {pages} · {total} stories</div>", unsafe_allow_html=True)
+        if c_next.button("NEXT ▶", key="feed_next", disabled=page + 1 >= pages, use_container_width=True):
+            session.set_page(feed_key, page + 1)
+            st.rerun()
 
 # --- TAB 2: Comparison Mode (HTML Fix Applied) ---
 with tab2:
-    if region_code == "KR":
-        txt = {
-            "info": "💡 비교할 주제를 입력하세요. (예: 금리 인상, 선거, 부동산 정책)",
-            "placeholder": "키워드 입력...",
-            "search_btn": "검색 (SEARCH)",
-            "compare_btn": "선택한 2개 기사 비교 분석 (RUN COMPARISON)",
-            "analyzing": "심층 비교 분석 보고서를 작성 중입니다...",
-            "found": "개의 관련 기사 검색됨",
-            "major": "Major"
-        }
-    else:
-        txt = {
-            "info": "💡 Enter topic to compare perspectives (e.g., Fed Rates, Elections)",
-            "placeholder": "Enter Keyword...",
-            "search_btn": "SEARCH",
-            "compare_btn": "RUN COMPARISON (Select 2)",
-            "analyzing": "Generating Comparative Analyst Report...",
-            "found": "articles found.",
-            "major": "Major"
-        }
-
-    st.info(txt["info"])
-    
-    col_search, col_btn = st.columns([4, 1])
-    with col_search:
-        search_query = st.text_input("Search Keyword", placeholder=txt["placeholder"], label_visibility="collapsed")
-    with col_btn:
-        run_search = st.button(txt["search_btn"], type="primary", use_container_width=True)
-
-    if "comparison_news" not in st.session_state: st.session_state.comparison_news = []
-
-    if run_search and search_query:
-        with st.spinner("Accessing Wire Services..."):
-            url = f"https://news.google.com/rss/search?q={search_query}&hl=ko&gl=KR&ceid=KR:ko" if region_code == "KR" else f"https://news.google.com/rss/search?q={search_query}&hl=en-US&gl=US&ceid=US:en"
-            feed = feedparser.parse(url)
-            
-            all_entries = feed.entries[:20] 
-            major_entries = []
-            minor_entries = []
-            
-            for e in all_entries:
-                src = e.title.rsplit(' - ', 1)[1] if ' - ' in e.title else ""
-                if is_major_media(src, region_code):
-                    major_entries.append(e)
-                else:
-                    minor_entries.append(e)
-            
-            st.session_state.comparison_news = major_entries + minor_entries
-
-    if st.session_state.comparison_news:
-        st.write(f"Query Results: {len(st.session_state.comparison_news)} {txt['found']}")
-        
-        with st.form("compare_form"):
-            selected_indices = []
-            for idx, entry in enumerate(st.session_state.comparison_news):
-                clean_title = entry.title.rsplit(' - ', 1)[0] if ' - ' in entry.title else entry.title
-                source_name = entry.title.rsplit(' - ', 1)[1] if ' - ' in entry.title else "NEWS"
-                
-                is_major = is_major_media(source_name, region_code)
-                label_prefix = "⭐ " if is_major else ""
-                label = f"{label_prefix}**[{source_name}]** {clean_title}"
-                
-                if st.checkbox(label, key=f"chk_{idx}"): 
-                    selected_indices.append(entry)
-            
-            st.markdown("---")
-            if st.form_submit_button(txt["compare_btn"], type="primary", use_container_width=True):
-                if len(selected_indices) == 2:
-                    art_a, art_b = selected_indices[0], selected_indices[1]
-                    
-                    with st.spinner(txt["analyzing"]):
-                        res = compare_news_groq(art_a.title, art_b.title, region_code)
-                        if res:
-                            core_diff_safe = html.escape(res['core_difference'])
-                            st.markdown(f"""
-                            <div style="text-align: center; margin-bottom: 40px; padding: 20px;">
-                                <div style="font-size: 11px; color: #888; text-transform: uppercase; letter-spacing: 2px; margin-bottom: 15px; font-weight:700;">Comparative Analysis Report</div>
-                                <div style="font-family: 'Merriweather', serif; font-size: 28px; font-weight: 900; color: #111; line-height:1.3;">
-                                    "{core_diff_safe}"
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            score_a = res['article_a'].get('stance_score', 0)
-                            score_b = res['article_b'].get('stance_score', 0)
-                            
-                            src_a = html.escape(art_a.title.rsplit(' - ', 1)[1]) if ' - ' in art_a.title else "Source A"
-                            src_b = html.escape(art_b.title.rsplit(' - ', 1)[1]) if ' - ' in art_b.title else "Source B"
-                            title_a = html.escape(art_a.title)
-                            title_b = html.escape(art_b.title)
-                            summary_a = html.escape(res['article_a']['summary'])
-                            summary_b = html.escape(res['article_b']['summary'])
-                            label_a = html.escape(res['article_a']['stance_label'])
-                            label_b = html.escape(res['article_b']['stance_label'])
-                            
-                            html_content = f"""
-                            <div class="compare-container">
-                                <div class="paper-card">
-                                    <div class="news-meta">
-                                        <span style="color: #2c3e50;">● ARTICLE A</span>
-                                        <span style="margin: 0 10px; color: #ddd;">|</span>
-                                        {src_a}
-                                    </div>
-                                    <div class="news-title">{title_a}</div>
-                                    <div class="news-summary">
-                                        {summary_a}
-                                    </div>
-                                    <div class="stat-box">
-                                        <span>STANCE: <b>{label_a}</b></span>
-                                        <span style="background: #f0f0f0; padding: 4px 8px; border-radius: 2px; font-weight:bold;">Score: {score_a}</span>
-                                    </div>
-                                </div>
-
-                                <div class="divider-vertical">
-                                    <div class="vs-badge-minimal">VS</div>
-                                </div>
-
-                                <div class="paper-card">
-                                    <div class="news-meta">
-                                        <span style="color: #c0392b;">● ARTICLE B</span>
-                                        <span style="margin: 0 10px; color: #ddd;">|</span>
-                                        {src_b}
-                                    </div>
-                                    <div class="news-title" style="border-bottom-color: #c0392b;">{title_b}</div>
-                                    <div class="news-summary">
-                                        {summary_b}
-                                    </div>
-                                    <div class="stat-box">
-                                        <span>STANCE: <b>{label_b}</b></span>
-                                        <span style="background: #f0f0f0; padding: 4px 8px; border-radius: 2px; font-weight:bold;">Score: {score_b}</span>
-                                    </div>
-                                </div>
-                            </div>
-                            """
-                            st.markdown(html_content.replace("\n", ""), unsafe_allow_html=True)
-
-                            c1, c2, c3 = st.columns([1, 0.1, 1])
-                            c1.link_button(f"Read Full Article (A)", art_a.link, use_container_width=True)
-                            c3.link_button(f"Read Full Article (B)", art_b.link, use_container_width=True)
-
-                            st.markdown("<br><br>", unsafe_allow_html=True)
-                            st.caption("POLITICAL COMPASS / STANCE SPECTRUM")
-                            
-                            pos_a = (score_a + 10) * 5 
-                            pos_b = (score_b + 10) * 5
-                            
-                            spectrum_html = f"""
-                            <div style="position: relative; height: 50px; margin-top: 20px; width: 100%;">
-                                <div style="position: absolute; top: 50%; width: 100%; height: 1px; background: #bbb;"></div>
-                                <div style="position: absolute; top: 35%; left: 50%; width: 1px; height: 15px; background: #999;"></div>
-                                
-                                <div style="position: absolute; left: {pos_a}%; top: 50%; transform: translate(-50%, -50%); transition: left 1s;">
-                                    <div style="width: 14px; height: 14px; background: #2c3e50; border-radius: 50%; border: 3px solid #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>
-                                    <div style="position: absolute; top: -25px; left: 50%; transform: translateX(-50%); font-size: 11px; font-weight: 800; color: #2c3e50;">A</div>
-                                </div>
-                                
-                                <div style="position: absolute; left: {pos_b}%; top: 50%; transform: translate(-50%, -50%); transition: left 1s;">
-                                    <div style="width: 14px; height: 14px; background: #c0392b; border-radius: 50%; border: 3px solid #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>
-                                    <div style="position: absolute; top: -25px; left: 50%; transform: translateX(-50%); font-size: 11px; font-weight: 800; color: #c0392b;">B</div>
-                                </div>
-                            </div>
-                            <div style="display: flex; justify-content: space-between; font-size: 10px; color: #888; font-weight:500; margin-top: 5px;">
-                                <span>◀ CRITICAL / LEFT (-10)</span>
-                                <span>NEUTRAL (0)</span>
-                                <span>SUPPORTIVE / RIGHT (+10) ▶</span>
-                            </div>
-                            """
-                            st.markdown(spectrum_html.replace("\n", ""), unsafe_allow_html=True)
-
-                            st.markdown("<br>", unsafe_allow_html=True)
-                            st.markdown("### 📌 Analytic Notes")
-                            for point in res.get("key_points", []):
-                                safe_point = html.escape(point)
-                                st.markdown(f"<div style='margin-bottom:8px; color:#444;'>• {safe_point}</div>", unsafe_allow_html=True)
+    render_compare_tab(region_code)
 
-                else:
-                    st.warning("⚠️ 정확히 2개의 기사를 선택해주세요. (Please select exactly 2 articles)")
\ No newline at end of file
+# --- TAB 3: Outlet Trends (미리 집계된 롤업만 읽는다) ---
+with tab3:
+    render_trends_tab(region_code)
+
+# ==========================================
+# 7. 계측 (디버그 패널 / 지표 덤프)
+# ==========================================
+if st.secrets.get("DEBUG_PANEL", False) or st.query_params.get("debug") == "1":
+    render_debug_panel(rerun_trace)
+metrics.observe("stage_seconds", rerun_trace.elapsed, stage="rerun")
+if METRICS_FILE:
+    try:
+        metrics.REGISTRY.dump_if_due(METRICS_FILE, interval=int(st.secrets.get("METRICS_DUMP_INTERVAL", 10)))
+    except:
+        pass
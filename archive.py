@@ -0,0 +1,280 @@
+import calendar
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from storage import DEFAULT_DB_PATH
+
+# ==========================================
+# 로컬 기사 아카이브 (SQLite FTS5 전문 검색)
+# ==========================================
+# 앱과 워커가 받아 온 모든 피드 항목과 분석 결과를 쌓아 두고, 비교 검색은 여기부터 찾는다.
+# 한국어는 띄어쓰기 단위가 아니라 조사가 붙은 어절("금리를", "금리가")이라 단어 토큰으로는
+# 안 걸리므로, 한글 덩어리는 음절 bigram("금리를" → 금리 리를)으로 색인하고 검색어도 같은
+# 방식으로 쪼갠다. 영문은 소문자 단어(끝의 s 제거) + 접두 검색.
+# 검색은 토큰 중 하나라도 걸리면(OR) bm25로 순위를 매기고, RSS 검색이 돌려준 기사는 제목에 검색어가
+# 글자 그대로 없어도 항상 앞에 둔다 (refresh마다 검색어 → 링크를 기록). 한 글자 한글 검색어("북")는
+# bigram 색인에 안 걸리므로 접두 검색 + 제목 LIKE로 찾는다.
+
+_HANGUL_RUN = re.compile(r"[가-힣]+")
+_LATIN_WORD = re.compile(r"[a-z0-9]+")
+_PARTICLE = re.compile(r"(을|를|이|가|은|는|의|에|에서|으로|로|과|와|도)$")
+_STOPWORDS = {"the", "a", "an", "of", "to", "in", "on", "and", "or", "for", "is", "at", "by", "with"}
+
+
+def _latin(word):
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def tokenize(text):
+    # (토큰, 한글 여부) 목록. 한 글자짜리 한글 덩어리는 그대로 둔다
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for run in _HANGUL_RUN.findall(text):
+        if len(run) == 1: tokens.append((run, True))
+        else: tokens.extend((run[i:i + 2], True) for i in range(len(run) - 1))
+    for word in _LATIN_WORD.findall(text):
+        if word not in _STOPWORDS: tokens.append((_latin(word), False))
+    return tokens
+
+
+def index_text(text):
+    return " ".join(token for token, _ in tokenize(text))
+
+
+def _query_words(query):
+    # 검색어 끝의 조사는 떼어 낸다 ("금리를" → "금리"; 기사에는 "금리가"로 나올 수 있다)
+    return [_PARTICLE.sub("", word) if _HANGUL_RUN.fullmatch(word) and len(word) > 2 else word for word in (query or "").split()]
+
+
+def match_query(query):
+    # 토큰 중 하나라도 포함하는 기사 (많이 걸릴수록 bm25가 높다). 영문과 한 글자 한글은 접두어 일치
+    # (rate → rates, rated / 북 → 북한, 북미)
+    terms = dict.fromkeys(
+        f'"{token}"' if hangul and len(token) > 1 else f'"{token}"*'
+        for token, hangul in tokenize(" ".join(_query_words(query)))
+    )
+    return " OR ".join(terms)
+
+
+def short_terms(query):
+    # bigram 색인에서 접두어로도 못 찾는 한 글자 한글 검색어 ("남북"의 "북") — 제목 LIKE로 찾는다
+    return list(dict.fromkeys(token for token, hangul in tokenize(" ".join(_query_words(query))) if hangul and len(token) == 1))
+
+
+def published_ts(entry):
+    parsed = entry.get("published_parsed")
+    if parsed: return float(calendar.timegm(parsed))
+    try:
+        return parsedate_to_datetime(entry.get("published", "")).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class NewsArchive:
+    def __init__(self, path=DEFAULT_DB_PATH, max_entries=200000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive_articles (
+                id INTEGER PRIMARY KEY,
+                link TEXT NOT NULL UNIQUE,
+                region TEXT NOT NULL,
+                title TEXT NOT NULL,
+                published TEXT NOT NULL,
+                published_ts REAL,
+                first_seen REAL NOT NULL,
+                analysis TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_first_seen ON archive_articles(first_seen)")
+        # title: 제목+언론사 토큰, body: 분석 요약/키워드 토큰 (rowid = archive_articles.id)
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS archive_fts USING fts5(title, body, tokenize='unicode61')")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive_searches (
+                region TEXT NOT NULL,
+                query TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (region, query)
+            )
+        """)
+        # 마지막 RSS 검색이 돌려준 기사 (rank = RSS 순서). 검색 결과 페이지에 항상 들어간다
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive_search_hits (
+                region TEXT NOT NULL,
+                query TEXT NOT NULL,
+                link TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                PRIMARY KEY (region, query, link)
+            )
+        """)
+        self._conn.commit()
+        self._seen_feeds = OrderedDict()   # 이미 넣은 피드 객체 (rerun마다 같은 피드를 다시 넣지 않게)
+        self._refreshing = set()
+        self.stats = {"ingested": 0, "searches": 0, "refreshes": 0, "pruned": 0}
+
+    def add_entries(self, entries, region_code):
+        now = time.time()
+        added = 0
+        with self._lock:
+            for entry in entries:
+                link, title = entry.get("link"), entry.get("title")
+                if not link or not title: continue
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO archive_articles (link, region, title, published, published_ts, first_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                    (link, region_code, title, entry.get("published", ""), published_ts(entry), now),
+                )
+                if cur.rowcount:
+                    self._conn.execute("INSERT INTO archive_fts (rowid, title, body) VALUES (?, ?, '')", (cur.lastrowid, index_text(title)))
+                    added += 1
+            if added:
+                self.stats["ingested"] += added
+                self._prune()
+            self._conn.commit()
+        return added
+
+    def add_feed(self, feed, region_code):
+        # FeedCache는 다시 받기 전까지 같은 피드 객체를 돌려준다 → 처음 볼 때만 넣는다
+        entries = feed.entries
+        marker = (id(feed), len(entries), entries[0].get("link") if entries else None)
+        with self._lock:
+            if marker in self._seen_feeds: return 0
+            self._seen_feeds[marker] = True
+            while len(self._seen_feeds) > 64: self._seen_feeds.popitem(last=False)
+        try:
+            return self.add_entries(entries, region_code)
+        except Exception:
+            # 넣지 못한 피드는 본 것으로 치지 않는다 (다음 rerun에 다시 넣는다)
+            with self._lock:
+                self._seen_feeds.pop(marker, None)
+            raise
+
+    def set_analysis(self, links, result):
+        if not result: return
+        payload = json.dumps(result, ensure_ascii=False)
+        body = index_text(" ".join([result.get("summary", "")] + list(result.get("keywords", []))))
+        with self._lock:
+            for link in links:
+                row = self._conn.execute("SELECT id FROM archive_articles WHERE link = ?", (link,)).fetchone()
+                if row is None: continue
+                self._conn.execute("UPDATE archive_articles SET analysis = ? WHERE id = ?", (payload, row[0]))
+                self._conn.execute("UPDATE archive_fts SET body = ? WHERE rowid = ?", (body, row[0]))
+            self._conn.commit()
+
+    def search(self, query, region_code, limit=20, offset=0):
+        # (RSS 검색 결과 → bm25 순위 → 최신순으로 정렬한 한 페이지, 전체 건수)
+        # 후보: 마지막 RSS 검색이 돌려준 기사 ∪ FTS OR 일치 ∪ 한 글자 검색어의 제목 LIKE 일치 (이것만 전체를 훑는다)
+        expression, likes = match_query(query), short_terms(query)
+        sources = ["SELECT a.id, h.rank AS hit, NULL AS score FROM archive_search_hits h JOIN archive_articles a ON a.link = h.link "
+                   "WHERE h.region = ? AND h.query = ?"]
+        params = [region_code, index_text(query)]
+        if expression:
+            sources.append("SELECT rowid, NULL, bm25(archive_fts, 2.0, 1.0) FROM archive_fts WHERE archive_fts MATCH ?")
+            params.append(expression)
+        for term in likes:
+            sources.append("SELECT id, NULL, NULL FROM archive_articles WHERE title LIKE ?")
+            params.append(f"%{term}%")
+        candidates = (
+            f"SELECT c.id, MIN(c.hit) AS hit, MIN(c.score) AS score FROM ({' UNION ALL '.join(sources)}) c "
+            f"JOIN archive_articles a ON a.id = c.id WHERE a.region = ? GROUP BY c.id"
+        )
+        params.append(region_code)
+        with self._lock:
+            self.stats["searches"] += 1
+            total = self._conn.execute(f"SELECT COUNT(*) FROM ({candidates})", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT a.title, a.link, a.published, a.analysis FROM ({candidates}) m JOIN archive_articles a ON a.id = m.id "
+                "ORDER BY m.hit IS NULL, m.hit, m.score IS NULL, m.score, a.published_ts DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        hits = [
+            {"title": title, "link": link, "published": published, "analysis": json.loads(analysis) if analysis else None}
+            for title, link, published, analysis in rows
+        ]
+        return hits, total
+
+    def has_results(self, query, region_code):
+        # 이 검색어를 RSS로 받아 기록해 둔 적이 있는가 (없으면 첫 검색은 RSS를 기다린다)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM archive_search_hits WHERE region = ? AND query = ? LIMIT 1", (region_code, index_text(query))
+            ).fetchone()
+        return row is not None
+
+    def search_due(self, query, region_code, max_age):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM archive_searches WHERE region = ? AND query = ?", (region_code, index_text(query))
+            ).fetchone()
+        return row is None or time.time() - row[0] > max_age
+
+    def refresh(self, query, region_code, fetch, wait=True):
+        # fetch(query) → 피드. RSS 검색 결과 중 처음 보는 기사만 아카이브에 더한다.
+        # 같은 검색어를 여러 세션이 동시에 새로 받지 않도록 진행 중이면 건너뛴다
+        key = (region_code, index_text(query))
+        with self._lock:
+            if key in self._refreshing: return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                entries = fetch(query).entries
+                self.add_entries(entries, region_code)
+                links = list(dict.fromkeys(entry.get("link") for entry in entries if entry.get("link")))
+                with self._lock:
+                    self.stats["refreshes"] += 1
+                    self._conn.execute("INSERT OR REPLACE INTO archive_searches (region, query, fetched_at) VALUES (?, ?, ?)", (*key, time.time()))
+                    # 이번 RSS 결과로 교체한다 (지난번에만 나왔던 기사는 FTS 일치로만 남는다)
+                    self._conn.execute("DELETE FROM archive_search_hits WHERE region = ? AND query = ?", key)
+                    self._conn.executemany(
+                        "INSERT INTO archive_search_hits (region, query, link, rank) VALUES (?, ?, ?, ?)",
+                        [(*key, link, rank) for rank, link in enumerate(links)],
+                    )
+                    self._conn.commit()
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        if wait: run()
+        else: threading.Thread(target=run, daemon=True).start()
+
+    def _prune(self):
+        # 한도를 10% 넘으면 가장 먼저 들어온 기사부터 지운다 (매 삽입마다 세지 않도록 여유를 둔다)
+        count = self._conn.execute("SELECT COUNT(*) FROM archive_articles").fetchone()[0]
+        if count <= self.max_entries * 1.1: return
+        victims = self._conn.execute(
+            "SELECT id, link FROM archive_articles ORDER BY first_seen ASC LIMIT ?", (count - self.max_entries,)
+        ).fetchall()
+        self._conn.executemany("DELETE FROM archive_fts WHERE rowid = ?", [(id_,) for id_, _ in victims])
+        self._conn.executemany("DELETE FROM archive_articles WHERE id = ?", [(id_,) for id_, _ in victims])
+        self._conn.executemany("DELETE FROM archive_search_hits WHERE link = ?", [(link,) for _, link in victims])
+        self.stats["pruned"] += len(victims)
+
+    def summary(self):
+        with self._lock:
+            entries, analyzed = self._conn.execute("SELECT COUNT(*), COUNT(analysis) FROM archive_articles").fetchone()
+            stats = dict(self.stats)
+        stats.update(entries=entries, analyzed=analyzed)
+        return stats
+
+
+_shared_archive = None
+_shared_lock = threading.Lock()
+
+def get_archive(path=DEFAULT_DB_PATH, **kwargs):
+    global _shared_archive
+    with _shared_lock:
+        if _shared_archive is None:
+            _shared_archive = NewsArchive(path, **kwargs)
+        return _shared_archive
@@ -0,0 +1,248 @@
+import html
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+import requests
+
+import metrics
+from storage import content_hash
+
+# ==========================================
+# 기사 본문 수집 및 추출
+# ==========================================
+# Google News 링크 → 원문 URL → (용량/시간 제한을 둔) HTML 스트리밍 → 본문 추출 → URL별 캐시
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+MAX_BYTES = 1_500_000      # 기사 한 건당 내려받을 최대 바이트
+TIMEOUT = 6                # 연결/읽기 타임아웃 (초)
+DEADLINE = 10              # 기사 한 건 전체에 쓸 수 있는 최대 시간 (초)
+MIN_PARAGRAPH = 40         # 이보다 짧은 문단은 메뉴/캡션으로 보고 버린다
+
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figure", "figcaption", "svg", "button"}
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "li", "blockquote"}
+LOOSE_BREAK_TAGS = {"div", "section", "table", "tr", "td"}   # 컨테이너 안 맨 텍스트를 끊는 태그
+VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr", "area", "base", "col", "embed", "param", "track"}
+
+GOOGLE_NEWS_HOST = "news.google.com"
+_REDIRECT_PATTERNS = [
+    re.compile(r'data-n-au="([^"]+)"'),
+    re.compile(r'<meta[^>]+http-equiv=["\']refresh["\'][^>]+url=([^"\'>]+)', re.I),
+    re.compile(r'<link[^>]+rel=["\']canonical["\'][^>]+href=["\']([^"\']+)', re.I),
+]
+_BODY_HINT = re.compile(r"article[-_]?body|articleBody|news[-_]?body|content[-_]?body|article[-_]?content")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.containers = []   # 열린 본문 컨테이너 [태그, 안쪽에 열린 같은 태그 수]. 안 닫힌 <p>가 흔해서 깊이 대신 닫는 태그로 짝을 맞춘다
+        self.current = None    # 열린 블록(p/li/...)의 텍스트 조각
+        self.loose = []        # 컨테이너 안, 블록 밖의 텍스트 (<div>본문<br>본문</div> 형태)
+        self.paragraphs = []   # (본문 컨테이너 안쪽 여부, 텍스트)
+
+    def _emit(self, parts, inside):
+        text = " ".join("".join(parts).split())
+        if text: self.paragraphs.append((inside, text))
+
+    def _flush_block(self):
+        if self.current is not None:
+            self._emit(self.current, bool(self.containers))
+            self.current = None
+
+    def _flush_loose(self):
+        if self.loose:
+            self._emit(self.loose, True)
+            self.loose = []
+
+    def _container(self, tag):
+        for container in reversed(self.containers):
+            if container[0] == tag: return container
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "br":
+            # 블록 안의 <br>은 줄바꿈일 뿐이고, 블록 밖의 <br>은 문단 경계로 본다
+            if self.current is None: self._flush_loose()
+            return
+        if tag in VOID_TAGS: return
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if tag == "article" or any(k in ("itemprop", "id", "class") and v and _BODY_HINT.search(v) for k, v in attrs):
+            self._flush_block()
+            self._flush_loose()
+            self.containers.append([tag, 0])
+            return
+        container = self._container(tag)
+        if container is not None: container[1] += 1
+        if tag in BLOCK_TAGS and self.skip_depth == 0:
+            # 앞 블록이 닫히지 않았어도 새 블록이 시작되면 거기서 끝난 것으로 본다
+            self._flush_block()
+            self._flush_loose()
+            self.current = []
+        elif tag in LOOSE_BREAK_TAGS:
+            self._flush_loose()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS: return
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        container = self._container(tag)
+        if container is not None and container[1] == 0:
+            self._flush_block()
+            self._flush_loose()
+            del self.containers[self.containers.index(container):]
+            return
+        if container is not None: container[1] -= 1
+        if tag in BLOCK_TAGS:
+            self._flush_block()
+        elif tag in LOOSE_BREAK_TAGS:
+            self._flush_loose()
+
+    def handle_data(self, data):
+        if self.skip_depth: return
+        if self.current is not None: self.current.append(data)
+        elif self.containers: self.loose.append(data)
+
+    def close(self):
+        # 문서가 끝났는데 닫히지 않은 블록/컨테이너가 남아 있으면 마지막 문단까지 넣는다
+        try:
+            super().close()
+        finally:
+            self._flush_block()
+            self._flush_loose()
+
+
+def extract_text(raw_html, min_paragraph=MIN_PARAGRAPH):
+    parser = _TextExtractor()
+    try:
+        parser.feed(raw_html)
+    except Exception:
+        pass
+    try:
+        parser.close()
+    except Exception:
+        pass
+    paragraphs = parser.paragraphs
+    # <article>/본문 컨테이너 안의 문단이 있으면 그것만, 없으면 페이지 전체 문단을 쓴다
+    if any(inside for inside, _ in paragraphs):
+        paragraphs = [p for p in paragraphs if p[0]]
+    texts = [t for _, t in paragraphs if len(t) >= min_paragraph]
+    return "\n\n".join(texts)
+
+
+class ArticleFetcher:
+    def __init__(self, store=None, session=None, max_bytes=MAX_BYTES, timeout=TIMEOUT, deadline=DEADLINE,
+                 memory_size=500, failure_ttl=300, max_workers=6):
+        self.store = store
+        self.session = session or requests.Session()
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.deadline = deadline
+        self.memory_size = memory_size
+        self.failure_ttl = failure_ttl
+        self._memory = OrderedDict()   # url -> (text, 저장 시각)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="article-fetch")
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "truncated": 0, "bytes": 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _download(self, url):
+        # 스트리밍으로 받으면서 바이트 상한과 전체 마감 시간을 넘으면 즉시 끊는다
+        started = time.monotonic()
+        with self.session.get(url, headers=DEFAULT_HEADERS, timeout=self.timeout, stream=True, allow_redirects=True) as resp:
+            resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type and "xml" not in content_type:
+                return resp.url, ""
+            chunks = []
+            size = 0
+            for chunk in resp.iter_content(chunk_size=16384):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes or time.monotonic() - started > self.deadline:
+                    self._count("truncated")
+                    break
+            self._count("bytes", size)
+            body = b"".join(chunks)[:self.max_bytes]
+            encoding = resp.encoding if resp.encoding and resp.encoding.lower() != "iso-8859-1" else "utf-8"
+            return resp.url, body.decode(encoding, errors="replace")
+
+    def resolve(self, url):
+        # Google News 중계 페이지면 원문 링크를 찾아 한 번 더 따라간다
+        final_url, body = self._download(url)
+        if urlparse(final_url).netloc != GOOGLE_NEWS_HOST:
+            return final_url, body
+        for pattern in _REDIRECT_PATTERNS:
+            match = pattern.search(body)
+            if match:
+                target = html.unescape(match.group(1)).strip()
+                if target.startswith("http") and urlparse(target).netloc != GOOGLE_NEWS_HOST:
+                    return self._download(target)
+        return final_url, body
+
+    def _remember(self, url, text):
+        with self._lock:
+            self._memory[url] = (text, time.time())
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def fetch_text(self, url):
+        # 추출한 본문, 받지 못했거나 본문이 없으면 None (호출자는 제목만으로 분석한다)
+        with self._lock:
+            cached = self._memory.get(url)
+            if cached is not None:
+                text, stored_at = cached
+                if text or time.time() - stored_at < self.failure_ttl:
+                    self._memory.move_to_end(url)
+                    self.stats["hits"] += 1
+                    return text or None
+
+        store_key = f"article:{content_hash(url)}"
+        if self.store is not None:
+            stored = self.store.get(store_key)
+            if stored:
+                self._count("hits")
+                self._remember(url, stored["text"])
+                return stored["text"]
+
+        self._count("misses")
+        try:
+            with metrics.span("article.fetch"):
+                final_url, body = self.resolve(url)
+            with metrics.span("article.extract"):
+                text = extract_text(body)
+        except Exception:
+            self._count("errors")
+            text = ""
+        # 실패는 메모리에만 짧게 기억하고, 디스크에는 성공한 결과만 남긴다
+        self._remember(url, text)
+        if text and self.store is not None:
+            self.store.put(store_key, {"url": url, "text": text})
+        return text or None
+
+    def fetch_many(self, urls):
+        unique = list(dict.fromkeys(urls))
+        return dict(zip(unique, self._pool.map(self.fetch_text, unique)))
+
+
+_shared_fetcher = None
+_shared_lock = threading.Lock()
+
+def get_article_fetcher(store=None, **kwargs):
+    global _shared_fetcher
+    with _shared_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = ArticleFetcher(store=store, **kwargs)
+        return _shared_fetcher
@@ -0,0 +1,56 @@
+"""Microbenchmark: linear substring scan vs. the compiled outlet index.
+
+    python bench/bench_outlets.py [--sizes 12 500 5000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outlets import Outlet, OutletIndex  # noqa: E402
+
+REAL_US = ["CNN", "Fox News", "New York Times", "Washington Post", "Reuters", "Associated Press", "BBC", "NBC", "CNBC", "Bloomberg", "USA Today", "Wall Street Journal"]
+
+
+def synthetic_names(n, rng):
+    names = list(REAL_US)
+    while len(names) < n:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3))]
+        names.append(" ".join(w.capitalize() for w in words) + rng.choice([" Times", " Post", " News", " Herald", " Daily", ""]))
+    return names[:n]
+
+
+def linear_is_major(source_name, names):
+    # app.py가 예전에 하던 방식: 호출마다 전체 목록을 소문자로 바꿔 가며 부분 문자열 검사
+    return any(m.lower() in source_name.lower() for m in names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 500, 5000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'outlets':>8} {'linear us/call':>15} {'index us/call':>14} {'speedup':>8}")
+    for size in args.sizes:
+        names = synthetic_names(size, rng)
+        index = OutletIndex(Outlet(name, region="US", tier="major") for name in names)
+        queries = [rng.choice(names) if rng.random() < 0.5 else "Some Local Blog " + str(i) for i in range(args.queries)]
+
+        # 두 방식이 같은 답을 내는지 먼저 확인
+        for q in queries[:200]:
+            assert linear_is_major(q, names) == index.is_major(q, "US"), q
+
+        linear = min(timeit.repeat(lambda: [linear_is_major(q, names) for q in queries], number=1, repeat=args.repeat))
+        indexed = min(timeit.repeat(lambda: [index.is_major(q, "US") for q in queries], number=1, repeat=args.repeat))
+        print(f"{size:>8} {linear / len(queries) * 1e6:>15.2f} {indexed / len(queries) * 1e6:>14.2f} {linear / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
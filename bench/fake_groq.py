@@ -0,0 +1,237 @@
+"""Local OpenAI-compatible stand-in for the Groq chat-completions API.
+
+Serves deterministic responses shaped like the app's prompts (triage,
+batch triage, deep dive, comparison, stance, Q&A), with configurable latency,
+error injection and malformed JSON (fields dropped, to exercise the
+analyst's repair call). Point the app or worker at it with GROQ_BASE_URL.
+
+    python bench/fake_groq.py --port 8765 --latency 0.3 --error-rate 0.1 --malformed-rate 0.2
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=x python worker.py --once
+
+In-process use:
+
+    server = FakeGroqServer(latency=0.2).start()
+    backend = LLMBackend.create("x", base_url=server.base_url)
+    ...
+    server.stop()
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+
+
+def _seed(text):
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _analysis(rng, n=None):
+    fact = rng.randint(20, 90)
+    result = {
+        "title": "Neutral headline",
+        "summary": "A neutral one-sentence summary of the article.",
+        "keywords": ["policy", "economy", "politics"][: rng.randint(1, 3)],
+        "sentiment_emoji": rng.choice(["🔥", "😐", "🧊"]),
+        "metrics": {"who": "Key actor", "impact": "Core impact"},
+        "scores": {"fact_ratio": fact, "opinion_ratio": 100 - fact},
+        "balance": {"stated": "Explicit claim", "hidden": "Implicit framing", "rating": rng.choice(["FACT", "MIXED", "OPINION"])},
+    }
+    if n is not None: result["id"] = n
+    return result
+
+
+def _deep_dive():
+    return {
+        "background_context": "Background for why this matters.",
+        "fact_check": "Key claims are consistent with public records.",
+        "missing_perspective": "Affected stakeholders are not quoted.",
+    }
+
+
+def _stance(rng):
+    return {"stance_label": rng.choice(["Critical", "Neutral", "Supportive"]), "stance_score": rng.randint(-10, 10), "summary": "One-sentence stance summary."}
+
+
+def _fill(template):
+    # 다시 물어본 필드의 형식 설명을 그럴듯한 값으로 바꾼다
+    if isinstance(template, dict): return {k: _fill(v) for k, v in template.items()}
+    if isinstance(template, list): return template
+    if "Number" in template or "Integer" in template: return 0
+    if '" or "' in template: return template.split('"')[1]
+    return f"Repaired: {template[:40]}"
+
+
+def drop_fields(content, rng):
+    # 최상위 필드 한두 개를 빼거나 하위 객체 하나를 비워서 스키마 검사에 걸리게 한다
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content
+    target = data["results"][0] if isinstance(data.get("results"), list) and data["results"] else data
+    names = [k for k in target if k != "id"]
+    for name in rng.sample(names, min(len(names), rng.randint(1, 2))):
+        if isinstance(target[name], dict): target[name] = {}
+        else: del target[name]
+    return json.dumps(data)
+
+
+def fake_content(messages, json_mode):
+    # 프롬프트 모양을 보고 앱이 기대하는 스키마로 결정론적인 응답을 만든다
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+    rng = random.Random(_seed(system + user))
+    if not json_mode and "JSON" not in system:
+        return "This is a deterministic stand-in answer. " * rng.randint(1, 3)
+    if "[Missing Fields (JSON Only)]:" in user:
+        return json.dumps(_fill(json.loads(user.split("[Missing Fields (JSON Only)]:", 1)[1])))
+    if "Batch Output" in user:
+        count = len(re.findall(r"\[Article \d+\]", user))
+        return json.dumps({"results": [_analysis(rng, n) for n in range(1, count + 1)]})
+    if "[Article A]" in user:
+        return json.dumps({
+            "core_difference": "The outlets disagree on the policy's impact.",
+            "key_points": ["Point 1", "Point 2", "Point 3"],
+            "article_a": _stance(rng),
+            "article_b": _stance(rng),
+        })
+    if "[Deep Dive Format" in user:
+        return json.dumps(_deep_dive())
+    if "Per-article stances" in user:
+        return json.dumps({"core_difference": "Outlets split on the policy's impact.", "key_points": ["Point 1", "Point 2"]})
+    if "stance_score" in user:
+        return json.dumps(_stance(rng))
+    return json.dumps(_analysis(rng))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server.fake
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path not in COMPLETION_PATHS:
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        server.record(request)
+        time.sleep(server.latency + (server.rng.uniform(0, server.jitter) if server.jitter else 0))
+        if server.rng.random() < server.error_rate:
+            status = server.error_status
+            headers = {"retry-after": str(server.retry_after)} if status == 429 and server.retry_after is not None else None
+            self._send_json(status, {"error": {"message": "injected failure", "type": "fake_error"}}, headers)
+            return
+
+        content = fake_content(request.get("messages", []), bool(request.get("response_format")))
+        if server.malformed_rate and server.rng.random() < server.malformed_rate:
+            content = drop_fields(content, server.rng)
+        prompt_tokens = sum(len(m.get("content", "")) // 4 for m in request.get("messages", []))
+        completion_tokens = len(content) // 4
+        base = {"id": f"fake-{server.calls}", "created": int(time.time()), "model": request.get("model", "fake")}
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+            for n, piece in enumerate(pieces):
+                chunk = dict(base, object="chat.completion.chunk", choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                if n == len(pieces) - 1:
+                    chunk["x_groq"] = {"usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                if server.stream_delay: time.sleep(server.stream_delay)
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        self._send_json(200, dict(
+            base,
+            object="chat.completion",
+            choices=[{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        ))
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeGroqServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 retry_after=None, stream_delay=0.0, seed=0, malformed_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.stream_delay = stream_delay
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, request):
+        with self._lock:
+            self.calls += 1
+            self.requests.append({"model": request.get("model"), "stream": bool(request.get("stream"))})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--stream-delay", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of JSON answers with fields dropped")
+    args = parser.parse_args()
+    server = FakeGroqServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status, args.retry_after,
+                            args.stream_delay, malformed_rate=args.malformed_rate)
+    print(f"fake Groq listening on {server.base_url}")
+    server._httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
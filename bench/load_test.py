@@ -0,0 +1,286 @@
+"""Multi-session load test: N concurrent app.py sessions against local stand-ins.
+
+    python bench/load_test.py --sessions 8 --duration 60
+    python bench/load_test.py --sessions 4 16 32 --duration 30 --latency 0.4 --out load_report.json
+
+Every session is a streamlit AppTest driving app.py in its own thread, all
+in one process, so they share the module-level caches and the LLM
+backend exactly as sessions on one Streamlit server do. Sessions pick
+weighted random actions (open a card, switch topic/region, ask a
+question, search + compare, plain rerun) until the duration runs out.
+Feeds come from bench/fixtures via the replay session; LLM calls go to
+bench/fake_groq.py.
+
+Reported per level of concurrency: reruns/s, p50/p95/p99 rerun latency
+(overall and per action), LLM calls, errors, and memory per session
+(RSS growth over a warmed-up baseline divided by the session count; with
+--tracemalloc, Python heap growth instead).
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit as st  # noqa: E402
+from streamlit.runtime.secrets import Secrets  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.util import patch_config_options  # noqa: E402
+
+from fake_groq import FakeGroqServer  # noqa: E402
+from feeds import REGION_FEEDS  # noqa: E402
+from replay import install_app_fixtures, search_queries  # noqa: E402
+from run_bench import APP_PATH, percentile  # noqa: E402
+
+REGIONS = {"US": "🇺🇸 USA (US)", "KR": "🇰🇷 Korea (KR)"}
+QUESTIONS = ["Who benefits from this?", "What is missing from this story?", "Is the headline accurate?", "이 기사의 배경은?"]
+ACTIONS = {"rerun": 1, "switch_topic": 2, "switch_region": 1, "page": 1, "analyze": 3, "ask": 2, "compare": 1}
+
+
+def pin_runtime():
+    # AppTest는 실행마다 가짜 Runtime을 전역으로 걸었다가 끝나면 None으로 지운다.
+    # 세션 여러 개가 동시에 돌면 먼저 끝난 쪽이 남의 Runtime을 지워 버리므로,
+    # 실제 서버처럼 프로세스에 Runtime 하나를 고정해 둔다.
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    try:
+        from streamlit.components.v2.component_manager import BidiComponentManager
+        runtime.bidi_component_registry = BidiComponentManager()
+        runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    except ImportError:
+        pass
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+
+def share_script_cache():
+    # AppTest는 실행마다 ScriptCache를 새로 만들어 app.py를 다시 컴파일한다. 여러 스레드가
+    # 동시에 ast.parse를 돌리면 CPython 3.11에서 깨지기도 하고, 실제 서버는 컴파일 결과를
+    # 공유하므로 한 번만 컴파일해 두고 같이 쓴다.
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    compiled = {}
+    lock = threading.Lock()
+    original = ScriptCache.get_bytecode
+
+    def get_bytecode(self, script_path):
+        with lock:
+            if script_path not in compiled:
+                compiled[script_path] = original(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = get_bytecode
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Session:
+    def __init__(self, n, seed, think):
+        self.n = n
+        self.rng = random.Random(seed)
+        self.think = think
+        self.region = "US"
+        self.at = AppTest.from_file(APP_PATH, default_timeout=120)
+        self.samples = []   # (action, seconds)
+        self.errors = []
+
+    def state_bytes(self):
+        # 앱의 세션 저장소(session_store.SessionStore)가 세는 이 세션의 메모리
+        try:
+            return self.at.session_state["store"].nbytes()
+        except Exception:
+            return None
+
+    def _timed(self, action, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+            if self.at.exception:
+                self.errors.append(f"{action}: {self.at.exception[0].value}")
+        except Exception as e:
+            self.errors.append(f"{action}: {type(e).__name__}: {e}")
+        self.samples.append((action, time.perf_counter() - started))
+
+    def _button(self, predicate):
+        return next((b for b in self.at.button if predicate(b.label) and not b.disabled), None)
+
+    def open(self):
+        self._timed("open", self.at.run)
+
+    def rerun(self):
+        self._timed("rerun", self.at.run)
+
+    def switch_topic(self):
+        topic = self.rng.choice(list(REGION_FEEDS[self.region]))
+        self._timed("switch_topic", lambda: self.at.sidebar.radio[0].set_value(topic).run())
+
+    def switch_region(self):
+        self.region = "KR" if self.region == "US" else "US"
+        self._timed("switch_region", lambda: self.at.sidebar.selectbox[0].select(REGIONS[self.region]).run())
+
+    def page(self):
+        # 다음 페이지가 있으면 넘기고, 마지막 페이지면 앞으로 돌아간다
+        button = self._button(lambda label: label == "NEXT ▶") or self._button(lambda label: label == "◀ PREV")
+        if button is None: return self.rerun()
+        self._timed("page", lambda: button.click().run())
+
+    def analyze(self):
+        buttons = [b for b in self.at.button if b.label.startswith("ANALYZE BIAS")]
+        if not buttons: return self.rerun()
+        button = self.rng.choice(buttons)
+        self._timed("analyze", lambda: button.click().run())
+
+    def ask(self):
+        box = next((t for t in self.at.text_input if t.placeholder == "Inquire about this article..."), None)
+        if box is None: return self.analyze()
+        question = self.rng.choice(QUESTIONS)
+
+        def submit():
+            box.input(question)
+            self._button(lambda label: label == "ASK").click().run()
+        self._timed("ask", submit)
+
+    def compare(self):
+        queries = [s["query"] for s in search_queries() if s["region"] == self.region]
+        if not queries: return self.rerun()
+        query = self.rng.choice(queries)
+
+        def search():
+            next(t for t in self.at.text_input if t.label == "Search Keyword").input(query)
+            self._button(lambda label: "SEARCH" in label).click().run()
+        self._timed("search", search)
+
+        def run_comparison():
+            for checkbox in self.at.checkbox[: self.rng.choice([2, 3, 4])]: checkbox.check()
+            self._button(lambda label: "COMPARISON" in label).click().run()
+        self._timed("compare", run_comparison)
+
+    def run(self, deadline):
+        self.open()
+        names, weights = zip(*ACTIONS.items())
+        while time.monotonic() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+            if self.think: time.sleep(self.rng.uniform(0, 2 * self.think))
+
+
+def run_level(args, server, sessions_count, seed):
+    gc.collect()
+    base_rss = rss_bytes()
+    base_heap = tracemalloc.get_traced_memory()[0] if args.tracemalloc else 0
+    calls_before = server.calls
+
+    sessions = [Session(n, seed + n, args.think) for n in range(sessions_count)]
+    deadline = time.monotonic() + args.duration
+    started = time.perf_counter()
+    threads = [threading.Thread(target=s.run, args=(deadline,), daemon=True) for s in sessions]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    wall = time.perf_counter() - started
+
+    # 세션 객체(AppTest + session_state)가 살아 있는 상태에서 잰다
+    gc.collect()
+    rss_growth = rss_bytes() - base_rss
+    heap_growth = tracemalloc.get_traced_memory()[0] - base_heap if args.tracemalloc else None
+
+    samples = [sec for s in sessions for _, sec in s.samples]
+    by_action = {}
+    for s in sessions:
+        for action, sec in s.samples: by_action.setdefault(action, []).append(sec)
+    errors = [e for s in sessions for e in s.errors]
+    state_sizes = [size for size in (s.state_bytes() for s in sessions) if size is not None]
+    result = {
+        "sessions": sessions_count,
+        "wall_seconds": wall,
+        "reruns": len(samples),
+        "throughput_reruns_per_sec": len(samples) / wall if wall else 0.0,
+        "latency": {"p50": percentile(samples, 0.5), "p95": percentile(samples, 0.95), "p99": percentile(samples, 0.99), "max": max(samples, default=None)},
+        "latency_by_action": {
+            action: {"n": len(v), "p50": percentile(v, 0.5), "p95": percentile(v, 0.95), "p99": percentile(v, 0.99)}
+            for action, v in sorted(by_action.items())
+        },
+        "llm_calls": server.calls - calls_before,
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "memory_per_session_bytes": (heap_growth if heap_growth is not None else rss_growth) / sessions_count,
+        "session_state_bytes": {"mean": sum(state_sizes) / len(state_sizes) if state_sizes else None, "max": max(state_sizes, default=None)},
+        "rss_growth_bytes": rss_growth,
+        "rss_bytes": rss_bytes(),
+    }
+    del sessions
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[4], help="concurrency levels to run, one after another")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between actions (s)")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Groq latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-delay", type=float, default=0.0)
+    parser.add_argument("--tracemalloc", action="store_true", help="report Python heap growth per session instead of RSS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="load_report.json")
+    args = parser.parse_args()
+
+    server = FakeGroqServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            stream_delay=args.stream_delay, seed=args.seed).start()
+    if args.tracemalloc: tracemalloc.start()
+    report = {"generated_at": time.time(), "config": vars(args), "levels": []}
+    with tempfile.TemporaryDirectory() as workdir:
+        _, _, _, secrets = install_app_fixtures(os.path.join(workdir, "app.db"), server.base_url)
+        # AppTest는 실행할 때마다 st.secrets와 설정을 바꿨다 되돌리는데, 여러 스레드가 동시에 돌면
+        # 서로 되돌려 버린다. 그래서 프로세스 전체에 한 번만 걸어 두고 세션에는 넘기지 않는다.
+        st.secrets = Secrets()
+        st.secrets._secrets = secrets
+        pin_runtime()
+        share_script_cache()
+        with patch_config_options({"global.appTest": True}):
+            # 싱글톤과 모듈 import를 미리 데워서 첫 레벨의 수치가 초기화 비용을 떠안지 않게 한다
+            warmup = AppTest.from_file(APP_PATH, default_timeout=120)
+            warmup.run()
+            del warmup
+            for level, count in enumerate(args.sessions):
+                result = run_level(args, server, count, args.seed + 1000 * level)
+                report["levels"].append(result)
+                lat = result["latency"]
+                print(
+                    f"{count:>4} sessions: {result['throughput_reruns_per_sec']:6.2f} reruns/s · "
+                    f"p50 {lat['p50'] * 1000:6.0f} ms · p95 {lat['p95'] * 1000:6.0f} ms · p99 {lat['p99'] * 1000:6.0f} ms · "
+                    f"{result['memory_per_session_bytes'] / 1e6:6.1f} MB/session "
+                    f"(state {(result['session_state_bytes']['mean'] or 0) / 1e3:.0f} KB) · {result['errors']} errors"
+                )
+    server.stop()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"report -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
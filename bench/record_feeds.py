@@ -0,0 +1,220 @@
+"""Record Google News RSS payloads into bench/fixtures for offline replay.
+
+    python bench/record_feeds.py                 # live: every REGION_FEEDS topic + the search queries
+    python bench/record_feeds.py --articles 5    # also record the first 5 article pages per feed
+    python bench/record_feeds.py --synthetic     # deterministic stand-in feeds, no network
+
+The committed fixtures were produced with --synthetic so the suite is
+reproducible and carries no third-party article text. They follow the
+Google News RSS layout (title "Headline - Outlet", news.google.com article
+links, <source> element) and include near-duplicate stories so clustering
+and the outlet index see realistic input.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+
+import feedparser
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from articles import ArticleFetcher  # noqa: E402
+from feeds import DEFAULT_HEADERS, REGION_FEEDS, search_url  # noqa: E402
+from replay import FIXTURES_DIR  # noqa: E402
+
+SEARCHES = [
+    {"region": "US", "query": "federal reserve rates"},
+    {"region": "US", "query": "election"},
+    {"region": "KR", "query": "금리"},
+    {"region": "KR", "query": "반도체"},
+]
+
+# --synthetic 용 재료
+MAJORS = {
+    "US": ["CNN", "Fox News", "The New York Times", "The Washington Post", "Reuters", "Associated Press", "BBC", "NBC News", "CNBC", "Bloomberg", "USA TODAY", "The Wall Street Journal"],
+    "KR": ["조선일보", "중앙일보", "동아일보", "한겨레", "경향신문", "한국일보", "매일경제", "한국경제", "KBS 뉴스", "MBC 뉴스", "SBS 뉴스", "JTBC 뉴스", "YTN", "연합뉴스"],
+}
+MINORS = {
+    "US": ["Yahoo News", "The Hill", "Politico", "Axios", "NPR", "Newsweek", "Business Insider", "The Verge", "TechCrunch", "Local 12 WKRC", "KTLA", "MarketWatch"],
+    "KR": ["뉴시스", "뉴스1", "머니투데이", "이데일리", "아시아경제", "헤럴드경제", "서울신문", "세계일보", "국민일보", "노컷뉴스", "오마이뉴스", "전자신문"],
+}
+SUBJECTS = {
+    "US": {
+        "HEADLINES": ["the Senate", "the White House", "the Supreme Court", "FEMA", "the governor of Texas", "New York City"],
+        "POLITICS": ["House Republicans", "Senate Democrats", "the president", "the speaker", "state election officials", "a federal judge"],
+        "BUSINESS": ["the Federal Reserve", "Apple", "oil prices", "the housing market", "Boeing", "retail sales"],
+        "WORLD": ["Ukraine", "the European Union", "China", "Israel", "the United Nations", "Brazil"],
+        "TECH": ["OpenAI", "Google", "Nvidia", "Microsoft", "Tesla", "Meta"],
+    },
+    "KR": {
+        "HEADLINES": ["정부", "서울시", "국회", "대법원", "기상청", "경찰"],
+        "POLITICS": ["여당", "야당", "대통령실", "국회의장", "선관위", "법무부"],
+        "BUSINESS": ["한국은행", "삼성전자", "코스피", "부동산 시장", "현대차", "수출"],
+        "WORLD": ["미국", "중국", "일본", "유럽연합", "우크라이나", "북한"],
+        "TECH": ["네이버", "카카오", "SK하이닉스", "LG전자", "반도체 업계", "통신 3사"],
+    },
+}
+TEMPLATES = {
+    "US": [
+        "{s} unveils plan to overhaul {o} amid growing pressure",
+        "{s} faces backlash over {o} decision",
+        "What {s}'s move on {o} means for you",
+        "{s} warns of risks as {o} talks stall",
+        "{s} signals shift on {o} after weeks of debate",
+        "Live updates: {s} responds to {o} report",
+        "{s} and {o}: 5 takeaways from Tuesday",
+        "{s} sued over {o} policy",
+    ],
+    "KR": [
+        "{s}, {o} 개편안 발표…업계 반발",
+        "{s} '{o}' 결정에 비판 확산",
+        "{s}의 {o} 방침, 무엇이 달라지나",
+        "{s}, {o} 협상 난항에 우려 표명",
+        "[속보] {s}, {o} 관련 입장 발표",
+        "{s} {o} 논란…여론 엇갈려",
+        "{s}, {o} 대책 이번 주 확정",
+        "{s} 상대로 {o} 소송 제기",
+    ],
+}
+OBJECTS = {
+    "US": ["tariffs", "student loans", "immigration", "AI safety", "interest rates", "the budget", "energy prices", "chip exports", "healthcare", "housing"],
+    "KR": ["금리", "의대 정원", "부동산 세제", "AI 규제", "전기요금", "반도체 지원", "최저임금", "연금 개혁", "저출산 대책", "수출 규제"],
+}
+SEARCH_ANGLES = {
+    "US": ["{q}: what to know", "Markets react to {q} news", "{q} debate heats up in Washington", "Opinion: the truth about {q}", "{q} decision expected this week"],
+    "KR": ["{q} 결정 앞두고 시장 촉각", "[사설] {q} 논란, 이대로 괜찮나", "{q} 관련 정부 발표 임박", "{q} 전망 엇갈려…전문가 분석", "{q} 여파 확산"],
+}
+VARIANTS = {
+    "US": [lambda t: t, lambda t: t + " - report", lambda t: "Breaking: " + t, lambda t: t.replace(" amid ", " as ")],
+    "KR": [lambda t: t, lambda t: t + "(종합)", lambda t: "[단독] " + t, lambda t: t.replace("…", ", ")],
+}
+
+
+def google_article_link(rng, region_code):
+    token = "CBMi" + "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-", k=90))
+    hl = "ko" if region_code == "KR" else "en-US"
+    return f"https://news.google.com/rss/articles/{token}?oc=5&hl={hl}"
+
+
+def render_rss(title, region_code, items):
+    lang = "ko" if region_code == "KR" else "en-US"
+    out = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>',
+        "<generator>NFE/5.0</generator>",
+        f"<title>{escape(title)}</title>",
+        f"<link>https://news.google.com/?hl={lang}</link>",
+        f"<language>{lang}</language>",
+        "<description>Google News</description>",
+    ]
+    for item in items:
+        description = f'<a href="{item["link"]}">{item["title"]}</a>'
+        out.append(
+            "<item>"
+            f"<title>{escape(item['title'])}</title>"
+            f"<link>{escape(item['link'])}</link>"
+            f"<guid isPermaLink=\"false\">{escape(item['link'].split('/')[-1].split('?')[0])}</guid>"
+            f"<pubDate>{item['published']}</pubDate>"
+            f"<description>{escape(description)}</description>"
+            f"<source url=\"https://{hashlib.sha1(item['source'].encode()).hexdigest()[:8]}.example\">{escape(item['source'])}</source>"
+            "</item>"
+        )
+    out.append("</channel></rss>")
+    return "\n".join(out)
+
+
+def synthetic_items(rng, region_code, headlines, count, now):
+    # 한 이야기를 여러 언론사가 조금씩 다른 제목으로 싣는다 (묶기 대상)
+    items = []
+    outlets = MAJORS[region_code] + MINORS[region_code]
+    while len(items) < count:
+        headline = rng.choice(headlines)
+        copies = rng.choices([1, 2, 3, 4], weights=[5, 3, 2, 1])[0]
+        for source in rng.sample(outlets, copies):
+            title = rng.choice(VARIANTS[region_code])(headline)
+            items.append({
+                "title": f"{title} - {source}",
+                "link": google_article_link(rng, region_code),
+                "published": formatdate(now - rng.randint(0, 36 * 3600), usegmt=True),
+                "source": source,
+            })
+    return items[:count]
+
+
+def build_synthetic(out_dir, count, seed=7, now=1760745600):
+    rng = random.Random(seed)
+    manifest = {"recorded_with": "synthetic", "feeds": {}, "articles": {}, "targets": {}, "searches": SEARCHES}
+    for region_code, topics in REGION_FEEDS.items():
+        for topic, url in topics.items():
+            headlines = list(dict.fromkeys(
+                t.format(s=s, o=rng.choice(OBJECTS[region_code]))
+                for s in SUBJECTS[region_code][topic] for t in rng.sample(TEMPLATES[region_code], 4)
+            ))
+            items = synthetic_items(rng, region_code, headlines, count, now)
+            name = f"feeds/{region_code}_{topic}.xml"
+            write(out_dir, name, render_rss(f"{topic} - Google News", region_code, items))
+            manifest["feeds"][url] = name
+    for search in SEARCHES:
+        region_code, query = search["region"], search["query"]
+        headlines = [a.format(q=query) for a in SEARCH_ANGLES[region_code]]
+        items = synthetic_items(rng, region_code, headlines, count // 2, now)
+        name = f"feeds/search_{region_code}_{hashlib.sha1(query.encode()).hexdigest()[:8]}.xml"
+        write(out_dir, name, render_rss(f'"{query}" - Google News', region_code, items))
+        manifest["feeds"][search_url(query, region_code)] = name
+    return manifest
+
+
+def build_live(out_dir, articles):
+    session = requests.Session()
+    fetcher = ArticleFetcher(session=session)
+    manifest = {"recorded_with": "live", "feeds": {}, "articles": {}, "targets": {}, "searches": SEARCHES}
+    urls = [(f"{r}_{t}", u) for r, topics in REGION_FEEDS.items() for t, u in topics.items()]
+    urls += [(f"search_{s['region']}_{hashlib.sha1(s['query'].encode()).hexdigest()[:8]}", search_url(s["query"], s["region"])) for s in SEARCHES]
+    for stem, url in urls:
+        resp = session.get(url, headers=DEFAULT_HEADERS, timeout=10)
+        resp.raise_for_status()
+        name = f"feeds/{stem}.xml"
+        write(out_dir, name, resp.content)
+        manifest["feeds"][url] = name
+        print(f"{name}: {len(resp.content)} bytes")
+        for entry in feedparser.parse(resp.content).entries[:articles]:
+            try:
+                final_url, body = fetcher.resolve(entry.link)
+            except Exception as e:
+                print(f"  skip {entry.link}: {e}")
+                continue
+            article_name = f"articles/{hashlib.sha1(final_url.encode()).hexdigest()[:16]}.html"
+            write(out_dir, article_name, body)
+            manifest["targets"][entry.link] = final_url
+            manifest["articles"][final_url] = article_name
+    return manifest
+
+
+def write(out_dir, name, data):
+    path = os.path.join(out_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=FIXTURES_DIR)
+    parser.add_argument("--synthetic", action="store_true", help="generate deterministic feeds instead of recording")
+    parser.add_argument("--items", type=int, default=40, help="entries per synthetic topic feed")
+    parser.add_argument("--articles", type=int, default=0, help="live mode: article pages to record per feed")
+    args = parser.parse_args()
+
+    manifest = build_synthetic(args.out, args.items) if args.synthetic else build_live(args.out, args.articles)
+    write(args.out, "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    print(f"{len(manifest['feeds'])} feeds, {len(manifest['articles'])} articles -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
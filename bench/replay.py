@@ -0,0 +1,159 @@
+"""Offline replay of recorded Google News payloads.
+
+ReplaySession is a requests.Session whose transport serves recorded RSS
+feeds (bench/fixtures/manifest.json) instead of the network. Article links
+that were not recorded get a deterministic synthetic article page, so the
+article fetcher's redirect-resolve and extraction paths still run.
+
+    session = ReplaySession()
+    cache = FeedCache(session=session)
+    fetcher = ArticleFetcher(session=session)
+"""
+import hashlib
+import json
+import os
+import random
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+GOOGLE_NEWS_HOST = "news.google.com"
+
+_FILLER = {
+    "en": [
+        "Officials said the decision followed months of review and consultation with industry groups.",
+        "Critics argued the measure would fall hardest on small businesses and low-income households.",
+        "Supporters countered that the change was overdue and would pay for itself within a few years.",
+        "Analysts expect markets to react cautiously until more details are published next week.",
+        "The announcement came hours after a closed-door meeting between senior lawmakers.",
+        "Data released on Tuesday showed a modest rise compared with the same period last year.",
+    ],
+    "ko": [
+        "관계자는 수개월간의 검토와 업계 의견 수렴을 거쳐 이번 결정을 내렸다고 밝혔다.",
+        "비판론자들은 이번 조치가 중소기업과 저소득층에 가장 큰 부담이 될 것이라고 주장했다.",
+        "찬성 측은 이번 변화가 늦었지만 몇 년 안에 효과를 낼 것이라고 반박했다.",
+        "전문가들은 다음 주 세부 내용이 공개될 때까지 시장이 신중한 태도를 보일 것으로 내다봤다.",
+        "이번 발표는 여야 지도부의 비공개 회동 직후에 나왔다.",
+        "화요일 발표된 자료에 따르면 전년 같은 기간보다 소폭 증가한 것으로 나타났다.",
+    ],
+}
+
+
+def fixture_key(url):
+    # 같은 피드 URL이면 파라미터 순서와 무관하게 같은 키가 되도록 정규화
+    parsed = urlparse(url)
+    query = "&".join(sorted(parsed.query.split("&"))) if parsed.query else ""
+    return f"{parsed.netloc}{parsed.path}?{query}"
+
+
+def synthetic_article(url, paragraphs=8):
+    rng = random.Random(hashlib.sha256(url.encode("utf-8")).hexdigest())
+    lang = "ko" if ".kr/" in url or "/ko/" in url else "en"
+    body = "".join(f"<p>{' '.join(rng.sample(_FILLER[lang], 3))}</p>" for _ in range(paragraphs))
+    return (
+        "<html><head><title>Article</title></head><body>"
+        "<nav>Home · World · Business</nav>"
+        f"<article class=\"article-body\">{body}</article>"
+        "<footer>© Example Media</footer></body></html>"
+    )
+
+
+def google_redirect_page(target):
+    # Google News 중계 페이지 모양 (articles._REDIRECT_PATTERNS가 원문 링크를 찾는다)
+    return f'<html><body><c-wiz><div jscontroller="x" data-n-au="{target}"></div></c-wiz></body></html>'
+
+
+class FixtureAdapter(BaseAdapter):
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+        with open(os.path.join(fixtures_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.feeds = {fixture_key(url): name for url, name in manifest.get("feeds", {}).items()}
+        self.articles = {url: name for url, name in manifest.get("articles", {}).items()}
+        self.targets = manifest.get("targets", {})   # Google News 링크 → 원문 URL
+        self._payloads = {}
+        self.requests = 0
+        self.misses = []
+
+    def _read(self, name):
+        payload = self._payloads.get(name)
+        if payload is None:
+            with open(os.path.join(self.fixtures_dir, name), "rb") as f:
+                payload = self._payloads[name] = f.read()
+        return payload
+
+    def _response(self, request, status, body, content_type):
+        resp = requests.Response()
+        resp.status_code = status
+        resp.url = request.url
+        resp.request = request
+        resp.headers = CaseInsensitiveDict({"Content-Type": content_type, "Content-Length": str(len(body))})
+        resp.encoding = "utf-8"
+        resp._content = body
+        resp._content_consumed = True
+        resp.raw = None
+        resp.reason = "OK" if status == 200 else "Not Found"
+        return resp
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests += 1
+        url = request.url
+        name = self.feeds.get(fixture_key(url))
+        if name is not None:
+            return self._response(request, 200, self._read(name), "application/xml; charset=utf-8")
+        name = self.articles.get(url)
+        if name is not None:
+            return self._response(request, 200, self._read(name), "text/html; charset=utf-8")
+        host = urlparse(url).netloc
+        if host == GOOGLE_NEWS_HOST and "/rss/articles/" in url:
+            lang = "ko" if "hl=ko" in url else "en"
+            target = self.targets.get(url) or f"https://example-news.test/{lang}/{hashlib.sha1(url.encode()).hexdigest()[:16]}"
+            return self._response(request, 200, google_redirect_page(target).encode("utf-8"), "text/html; charset=utf-8")
+        if host == GOOGLE_NEWS_HOST:
+            self.misses.append(url)
+            return self._response(request, 404, b"", "text/plain")
+        return self._response(request, 200, synthetic_article(url).encode("utf-8"), "text/html; charset=utf-8")
+
+    def close(self):
+        pass
+
+
+class ReplaySession(requests.Session):
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        super().__init__()
+        self.adapter = FixtureAdapter(fixtures_dir)
+        self.mount("https://", self.adapter)
+        self.mount("http://", self.adapter)
+
+
+def search_queries(fixtures_dir=FIXTURES_DIR):
+    with open(os.path.join(fixtures_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f).get("searches", [])
+
+
+def install_app_fixtures(db_path, llm_base_url, fixtures_dir=FIXTURES_DIR):
+    """Prime app.py's process-wide singletons with the replay session.
+
+    Call before the first AppTest run: app.py's get_*() helpers then hand
+    back these objects instead of building network-backed ones. Returns
+    the secrets app.py should run with.
+    """
+    import articles
+    import feeds
+    import storage
+
+    session = ReplaySession(fixtures_dir)
+    feed_cache = feeds.get_feed_cache(session=session)
+    store = storage.get_analysis_store(path=db_path)
+    articles.get_article_fetcher(store=store, session=session)
+    secrets = {
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": llm_base_url,
+        "ANALYSIS_DB_PATH": db_path,
+        "LLM_RPM": 100000,
+    }
+    return session, feed_cache, store, secrets
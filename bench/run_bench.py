@@ -0,0 +1,313 @@
+"""Offline benchmark suite: recorded feeds + fake Groq, no network.
+
+    python bench/run_bench.py                                   # all suites -> bench_report.json
+    python bench/run_bench.py --suites parse briefing --latency 0.3 --error-rate 0.05
+    python bench/run_bench.py --baseline old_report.json        # print deltas against an earlier run
+
+Suites:
+    parse      feedparser.parse, title split + outlet classification, clustering throughput
+    briefing   end-to-end briefing build for every region/topic (cold, then warm cache)
+    pageviews  scripted app.py session via streamlit AppTest: LLM calls and time per page view
+
+Feeds come from bench/fixtures (see record_feeds.py); article pages are
+synthesized by the replay session; LLM calls go to bench/fake_groq.py.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser  # noqa: E402
+
+import metrics  # noqa: E402
+from analyst import Analyst, split_title  # noqa: E402
+from articles import ArticleFetcher  # noqa: E402
+from clustering import cluster_entries  # noqa: E402
+from fake_groq import FakeGroqServer  # noqa: E402
+from feeds import REGION_FEEDS, FeedCache  # noqa: E402
+from llm import LLMBackend  # noqa: E402
+from outlets import OUTLET_INDEX  # noqa: E402
+from pipeline import BRIEFING_SIZE, build_briefing  # noqa: E402
+from replay import FIXTURES_DIR, ReplaySession, install_app_fixtures, search_queries  # noqa: E402
+from storage import AnalysisStore  # noqa: E402
+
+SUITES = ("parse", "briefing", "pageviews")
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def percentile(values, q):
+    if not values: return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(values):
+    return {
+        "n": len(values),
+        "mean": statistics.fmean(values) if values else None,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": max(values) if values else None,
+    }
+
+
+def fixture_payloads():
+    with open(os.path.join(FIXTURES_DIR, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    payloads = {}
+    for url, name in manifest["feeds"].items():
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            payloads[name] = f.read()
+    return manifest, payloads
+
+
+# ==========================================
+# parse: 파싱 / 분류 / 묶기 처리량
+# ==========================================
+def bench_parse(args):
+    _, payloads = fixture_payloads()
+    total_bytes = sum(len(p) for p in payloads.values())
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        parsed = {name: feedparser.parse(p) for name, p in payloads.items()}
+    parse_seconds = (time.perf_counter() - started) / args.repeat
+    entries = [(name, e) for name, feed in parsed.items() for e in feed.entries]
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        majors = 0
+        for name, entry in entries:
+            _, source = split_title(entry.title)
+            region_code = "KR" if os.path.basename(name).startswith(("KR_", "search_KR")) else "US"
+            majors += OUTLET_INDEX.is_major(source, region_code)
+    classify_seconds = (time.perf_counter() - started) / args.repeat
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        clusters = {name: cluster_entries(feed.entries) for name, feed in parsed.items()}
+    cluster_seconds = (time.perf_counter() - started) / args.repeat
+
+    return {
+        "feeds": len(payloads),
+        "entries": len(entries),
+        "bytes": total_bytes,
+        "parse_seconds": parse_seconds,
+        "parse_entries_per_sec": len(entries) / parse_seconds,
+        "parse_mb_per_sec": total_bytes / parse_seconds / 1e6,
+        "classify_entries_per_sec": len(entries) / classify_seconds,
+        "major_ratio": majors / len(entries),
+        "cluster_entries_per_sec": len(entries) / cluster_seconds,
+        "clusters": sum(len(c) for c in clusters.values()),
+    }
+
+
+# ==========================================
+# briefing: 피드 → 본문 → 분석까지 한 브리핑 단위 시간 (콜드/웜)
+# ==========================================
+def bench_briefing(args, server, workdir):
+    session = ReplaySession()
+    store = AnalysisStore(os.path.join(workdir, "briefing.db"))
+    cache = FeedCache(session=session)
+    fetcher = ArticleFetcher(store=store, session=session)
+    backend = LLMBackend.create("bench", base_url=server.base_url)
+    analyst = Analyst(backend, store, concurrency=args.concurrency)
+
+    passes = {}
+    for label in ("cold", "warm"):
+        calls_before = server.calls
+        timings = []
+        analyzed = items = 0
+        started = time.perf_counter()
+        for region_code, topics in REGION_FEEDS.items():
+            for category, url in topics.items():
+                t0 = time.perf_counter()
+                feed = cache.get(url)
+                briefing = build_briefing(analyst, fetcher, feed, region_code, category, args.limit)
+                timings.append(time.perf_counter() - t0)
+                items += len(briefing["items"])
+                analyzed += sum(1 for item in briefing["items"] if item["analysis"])
+        passes[label] = {
+            "total_seconds": time.perf_counter() - started,
+            "briefing_seconds": summarize(timings),
+            "items": items,
+            "analyzed": analyzed,
+            "llm_calls": server.calls - calls_before,
+        }
+
+    summary = store.summary()
+    return {
+        "passes": passes,
+        "feed_cache_hit_rate": cache.hit_rate(),
+        "analysis_store_hit_rate": summary["hit_rate"],
+        "article_stats": dict(fetcher.stats),
+        "llm_backend": dict(backend.stats),
+        "replay_misses": session.adapter.misses[:10],
+    }
+
+
+# ==========================================
+# pageviews: app.py를 AppTest로 돌려 사용자 동선 하나를 재현
+# ==========================================
+def bench_pageviews(args, server, workdir):
+    from streamlit.testing.v1 import AppTest
+
+    # app.py의 get_*() 싱글톤보다 먼저 만들어 두면 앱이 재생 세션을 그대로 쓴다
+    _, feed_cache, store, secrets = install_app_fixtures(os.path.join(workdir, "app.db"), server.base_url)
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets.update(secrets)
+    # 백그라운드 선분석은 끄고 돈다: 켜 두면 화면마다 세는 LLM 호출 수가 실행마다 달라진다
+    at.secrets["PREFETCH_ANALYSIS"] = False
+
+    views = []
+
+    def view(name, action):
+        calls_before = server.calls
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        errors = [e.value for e in at.exception]
+        views.append({"view": name, "seconds": elapsed, "llm_calls": server.calls - calls_before, "exceptions": errors})
+
+    def button(prefix):
+        return next(b for b in at.button if b.label.startswith(prefix))
+
+    view("open US/HEADLINES", at.run)
+    view("analyze all", lambda: button("ANALYZE ALL").click().run())
+    view("revisit US/HEADLINES", at.run)
+    view("next page", lambda: button("NEXT ▶").click().run())
+    view("switch to US/POLITICS", lambda: at.sidebar.radio[0].set_value("POLITICS").run())
+    view("analyze one card", lambda: button("ANALYZE BIAS").click().run())
+
+    def open_deep_dive():
+        # 펼친 상태는 expander 키로 세션에 들어간다 (AppTest에는 펼치기 동작이 없다)
+        store = at.session_state["store"]
+        link = next((link for link, state in reversed(store.articles.items()) if state.open and state.analysis), None)
+        if link is None: return
+        at.session_state[f"deep_{link}"] = True
+        at.run()
+    view("open deep dive", open_deep_dive)
+    view("switch to KR/HEADLINES", lambda: at.sidebar.selectbox[0].select("🇰🇷 Korea (KR)").run())
+
+    query = next((s["query"] for s in search_queries() if s["region"] == "KR"), None)
+    if query:
+        def search():
+            next(t for t in at.text_input if t.label == "Search Keyword").input(query)
+            next(b for b in at.button if "SEARCH" in b.label).click().run()
+        view(f"search '{query}'", search)
+
+        def compare():
+            for checkbox in at.checkbox[:3]: checkbox.check()
+            next(b for b in at.button if "COMPARISON" in b.label).click().run()
+        view("compare 3 articles", compare)
+
+    seconds = [v["seconds"] for v in views]
+    calls = sum(v["llm_calls"] for v in views)
+    return {
+        "views": views,
+        "view_seconds": summarize(seconds),
+        "llm_calls_total": calls,
+        "llm_calls_per_view": calls / len(views),
+        "feed_cache_hit_rate": feed_cache.hit_rate(),
+        "analysis_store_hit_rate": store.summary()["hit_rate"],
+    }
+
+
+# ==========================================
+# 보고서
+# ==========================================
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def flatten(value, prefix=""):
+    # 기준 보고서와 비교할 수 있게 숫자 값만 "a.b.c" 키로 편다
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items(): out.update(flatten(v, f"{prefix}{k}."))
+        return out
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix[:-1]: value}
+    return {}
+
+
+def print_comparison(report, baseline):
+    current = flatten(report["results"])
+    previous = flatten(baseline.get("results", {}))
+    print(f"\n{'metric':<58} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key in sorted(current):
+        if key not in previous: continue
+        old, new = previous[key], current[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:<58} {old:>12.4g} {new:>12.4g} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--out", default="bench_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Groq latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of fake JSON answers with fields dropped")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=BRIEFING_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions for the parse suite")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, "manifest.json"), encoding="utf-8") as f:
+        recorded_with = json.load(f).get("recorded_with")
+
+    report = {
+        "generated_at": time.time(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixtures": recorded_with,
+        "config": vars(args),
+        "results": {},
+    }
+    server = FakeGroqServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            error_status=args.error_status, seed=args.seed, malformed_rate=args.malformed_rate).start()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for suite in args.suites:
+                started = time.perf_counter()
+                if suite == "parse": result = bench_parse(args)
+                elif suite == "briefing": result = bench_briefing(args, server, workdir)
+                else: result = bench_pageviews(args, server, workdir)
+                result["suite_seconds"] = time.perf_counter() - started
+                report["results"][suite] = result
+                print(f"{suite}: {result['suite_seconds']:.2f}s")
+    finally:
+        server.stop()
+
+    report["stages"] = [
+        dict(h["labels"], count=h["count"], sum=h["sum"], p50=h["p50"], p95=h["p95"])
+        for h in metrics.REGISTRY.snapshot()["histograms"] if h["name"] == "stage_seconds"
+    ]
+    report["repairs"] = [dict(c["labels"], count=c["value"]) for c in metrics.REGISTRY.snapshot()["counters"] if c["name"] == "llm_repairs"]
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"report -> {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import hashlib
+import re
+import unicodedata
+
+# ==========================================
+# 중복 기사 묶기 (SimHash)
+# ==========================================
+# 같은 통신사 기사가 여러 언론사 이름으로 실리면 제목이 거의 같다.
+# 제목을 문자 3-gram으로 쪼개 64비트 SimHash를 만들고, 해밍 거리가 가까운 것끼리 묶는다.
+# 문자 n-gram이라 띄어쓰기가 불규칙한 한국어에도 그대로 통한다.
+
+HASH_BITS = 64
+MAX_DISTANCE = 10
+MIN_JACCARD = 0.7   # 짧은 제목은 해시가 흔들리므로 후보 쌍은 n-gram 겹침으로 한 번 더 확인
+SHINGLE_SIZE = 3
+
+_NON_WORD = re.compile(r"[^\w]+")
+_BRACKETED = re.compile(r"^\s*[\[【(][^\]】)]{1,12}[\]】)]\s*")   # [속보], (종합) 같은 말머리
+
+
+def normalize_title(title):
+    title = unicodedata.normalize("NFKC", title or "")
+    if " - " in title: title = title.rsplit(" - ", 1)[0]
+    title = _BRACKETED.sub("", title)
+    return _NON_WORD.sub(" ", title.casefold()).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    compact = text.replace(" ", "_")
+    if len(compact) <= size: return {compact} if compact else set()
+    return {compact[i:i + size] for i in range(len(compact) - size + 1)}
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text):
+    return simhash_features(shingles(text))
+
+
+def simhash_features(features):
+    weights = [0] * HASH_BITS
+    for feature in features:
+        h = _feature_hash(feature)
+        for bit in range(HASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0: value |= 1 << bit
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def cluster_titles(titles, max_distance=MAX_DISTANCE, min_jaccard=MIN_JACCARD):
+    # union-find로 가까운 해시끼리 합친다. 반환값은 원래 순서를 유지한 인덱스 묶음 목록
+    features = [shingles(normalize_title(t)) for t in titles]
+    hashes = [simhash_features(f) for f in features]
+    parent = list(range(len(titles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(hashes)):
+        for j in range(i):
+            if hamming(hashes[i], hashes[j]) <= max_distance and jaccard(features[i], features[j]) >= min_jaccard:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j: parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i in range(len(titles)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda members: members[0])
+
+
+def cluster_entries(entries, max_distance=MAX_DISTANCE, min_jaccard=MIN_JACCARD):
+    # feedparser 항목 목록 → [[대표 항목, 중복 항목...], ...]
+    clusters = cluster_titles([e.title for e in entries], max_distance, min_jaccard)
+    return [[entries[i] for i in members] for members in clusters]
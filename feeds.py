@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+import feedparser
+import requests
+
+import metrics
+
+# ==========================================
+# 공유 피드 캐시 (프로세스 전체에서 공유)
+# ==========================================
+# Streamlit은 상호작용마다 app.py 전체를 다시 실행하지만, import된 모듈은
+# 프로세스 당 한 번만 로드된다. 그래서 캐시 상태는 여기에 둔다.
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+DEFAULT_TTL = 300          # 신선(fresh)하다고 보는 시간 (초)
+DEFAULT_STALE_TTL = 3600   # 만료 후에도 재검증 동안 그대로 내어줄 수 있는 시간 (초)
+
+REGION_FEEDS = {
+    "KR": {
+        "HEADLINES": "https://news.google.com/rss?hl=ko&gl=KR&ceid=KR:ko",
+        "POLITICS": "https://news.google.com/rss/headlines/section/topic/POLITICS?hl=ko&gl=KR&ceid=KR:ko",
+        "BUSINESS": "https://news.google.com/rss/headlines/section/topic/BUSINESS?hl=ko&gl=KR&ceid=KR:ko",
+        "WORLD": "https://news.google.com/rss/headlines/section/topic/WORLD?hl=ko&gl=KR&ceid=KR:ko",
+        "TECH": "https://news.google.com/rss/headlines/section/topic/TECHNOLOGY?hl=ko&gl=KR&ceid=KR:ko"
+    },
+    "US": {
+        "HEADLINES": "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en",
+        "POLITICS": "https://news.google.com/rss/headlines/section/topic/POLITICS?hl=en-US&gl=US&ceid=US:en",
+        "BUSINESS": "https://news.google.com/rss/headlines/section/topic/BUSINESS?hl=en-US&gl=US&ceid=US:en",
+        "WORLD": "https://news.google.com/rss/headlines/section/topic/WORLD?hl=en-US&gl=US&ceid=US:en",
+        "TECH": "https://news.google.com/rss/headlines/section/topic/TECHNOLOGY?hl=en-US&gl=US&ceid=US:en"
+    },
+}
+
+def search_url(query, region_code):
+    q = quote_plus(query)
+    if region_code == "KR":
+        return f"https://news.google.com/rss/search?q={q}&hl=ko&gl=KR&ceid=KR:ko"
+    return f"https://news.google.com/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en"
+
+
+class FeedEntry:
+    __slots__ = ("feed", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, feed, etag=None, last_modified=None, fetched_at=0.0):
+        self.feed = feed
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+
+class FeedCache:
+    def __init__(self, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL, timeout=5, headers=None, session=None, max_entries=256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.session = session or requests.Session()
+        self._entries = OrderedDict()   # url -> FeedEntry (최근에 쓴 것이 뒤)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "revalidated": 0, "errors": 0, "evicted": 0, "peeks": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _fetch(self, url):
+        with self._lock:
+            cached = self._entries.get(url)
+        headers = dict(self.headers)
+        if cached is not None:
+            if cached.etag: headers["If-None-Match"] = cached.etag
+            if cached.last_modified: headers["If-Modified-Since"] = cached.last_modified
+
+        started = time.perf_counter()
+        with metrics.span("feed.fetch"):
+            resp = self.session.get(url, headers=headers, timeout=self.timeout)
+        metrics.observe("feed_fetch_seconds", time.perf_counter() - started, status=resp.status_code)
+        now = time.time()
+        if resp.status_code == 304 and cached is not None:
+            # 본문이 바뀌지 않았으므로 파싱 결과를 그대로 재사용하고 시각만 갱신
+            entry = FeedEntry(cached.feed, cached.etag, cached.last_modified, now)
+            self._count("revalidated")
+        else:
+            resp.raise_for_status()
+            with metrics.span("feed.parse"):
+                parsed = feedparser.parse(resp.content)
+            entry = FeedEntry(
+                parsed,
+                resp.headers.get("ETag"),
+                resp.headers.get("Last-Modified"),
+                now,
+            )
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            self._evict(now)
+        return entry
+
+    def _evict(self, now):
+        # 검색어마다 URL이 달라서 그대로 두면 파싱된 피드가 끝없이 쌓인다.
+        # stale_ttl까지 지난 항목은 더 이상 내어줄 수 없으니 버리고, 개수는 LRU로 묶는다 (락 안에서 호출)
+        expired = [url for url, e in self._entries.items() if now - e.fetched_at >= self.ttl + self.stale_ttl]
+        for url in expired: del self._entries[url]
+        evicted = len(expired)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        self.stats["evicted"] += evicted
+
+    def _lookup(self, url):
+        with self._lock:
+            cached = self._entries.get(url)
+            if cached is not None: self._entries.move_to_end(url)
+        return cached
+
+    def _refresh_in_background(self, url):
+        with self._lock:
+            if url in self._refreshing: return
+            self._refreshing.add(url)
+
+        def run():
+            try:
+                self._fetch(url)
+            except Exception:
+                self._count("errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get(self, url):
+        cached = self._lookup(url)
+        age = time.time() - cached.fetched_at if cached is not None else None
+
+        if cached is not None and age < self.ttl:
+            self._count("hits")
+            return cached.feed
+
+        if cached is not None and age < self.ttl + self.stale_ttl:
+            # stale-while-revalidate: 오래된 결과를 즉시 돌려주고 뒤에서 갱신
+            self._count("stale_hits")
+            self._refresh_in_background(url)
+            return cached.feed
+
+        self._count("misses")
+        try:
+            return self._fetch(url).feed
+        except Exception:
+            self._count("errors")
+            if cached is not None: return cached.feed
+            raise
+
+    def peek(self, url):
+        # 네트워크를 타지 않는 읽기 (백그라운드 프리페처가 채워둔 값). 더 이상 내어줄 수 없을 만큼
+        # 오래됐으면 None을 돌려 호출자가 get()으로 가게 한다. hit_rate를 부풀리지 않도록 따로 센다
+        cached = self._lookup(url)
+        if cached is None: return None
+        age = time.time() - cached.fetched_at
+        if age >= self.ttl + self.stale_ttl: return None
+        self._count("peeks")
+        if age >= self.ttl: self._refresh_in_background(url)
+        return cached.feed
+
+    def refresh(self, url):
+        return self._fetch(url).feed
+
+    def invalidate(self, url=None):
+        with self._lock:
+            if url is None: self._entries.clear()
+            else: self._entries.pop(url, None)
+
+    def hit_rate(self):
+        with self._lock:
+            served = self.stats["hits"] + self.stats["stale_hits"]
+            total = served + self.stats["misses"]
+        return served / total if total else 0.0
+
+
+# ==========================================
+# 백그라운드 프리페처 (지역 × 토픽 피드 + 최근 검색어)
+# ==========================================
+class FeedPrefetcher:
+    def __init__(self, cache, interval=120, max_workers=4, max_searches=20):
+        self.cache = cache
+        self.interval = interval
+        self.max_searches = max_searches
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-prefetch")
+        self._searches = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_cycle = None
+
+    def urls(self):
+        urls = [url for feeds in REGION_FEEDS.values() for url in feeds.values()]
+        with self._lock:
+            urls.extend(self._searches)
+        return urls
+
+    def remember_search(self, url):
+        with self._lock:
+            self._searches[url] = time.time()
+            self._searches.move_to_end(url)
+            while len(self._searches) > self.max_searches:
+                self._searches.popitem(last=False)
+
+    def _refresh(self, url):
+        try:
+            self.cache.refresh(url)
+        except Exception:
+            self.cache._count("errors")
+
+    def run_once(self, pool=None):
+        # 느린 피드 하나가 나머지를 막지 않도록 풀에 흩뿌리고 전부 끝날 때까지 대기
+        list((pool or self._pool).map(self._refresh, self.urls()))
+        self.last_cycle = time.time()
+
+    def _loop(self, stop, pool):
+        # stop/pool은 이 루프가 시작될 때의 것 (stop() 뒤 다시 start()하면 새 루프는 새 것을 받는다)
+        while not stop.is_set():
+            try:
+                self.run_once(pool)
+            except (RuntimeError, CancelledError):
+                # stop()이 풀을 닫으면 남은 갱신은 취소된다
+                if stop.is_set(): break
+                raise
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        with self._lock:
+            if self._stop.is_set():
+                # stop() 뒤에 다시 시작: 닫힌 풀과 멈춤 신호를 새로 만든다
+                self._stop = threading.Event()
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="feed-prefetch")
+                self._wake.clear()
+            elif self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, args=(self._stop, self._pool), name="feed-prefetcher", daemon=True)
+            self._thread.start()
+
+    def trigger(self):
+        self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            self._wake.set()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_cache = None
+_shared_prefetcher = None
+_shared_lock = threading.Lock()
+
+def get_feed_cache(ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL, **kwargs):
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FeedCache(ttl=ttl, stale_ttl=stale_ttl, **kwargs)
+        return _shared_cache
+
+def get_prefetcher(interval=120, max_workers=4):
+    global _shared_prefetcher
+    cache = get_feed_cache()
+    with _shared_lock:
+        if _shared_prefetcher is None:
+            _shared_prefetcher = FeedPrefetcher(cache, interval=interval, max_workers=max_workers)
+    _shared_prefetcher.start()
+    return _shared_prefetcher
+
+def read_feed(url):
+    # UI용 읽기: 메모리에 쓸 만한 값이 있으면 즉시 반환, 콜드 스타트이거나 stale_ttl까지 지났을 때만 직접 가져온다
+    cache = get_feed_cache()
+    feed = cache.peek(url)
+    if feed is not None: return feed
+    return cache.get(url)
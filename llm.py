@@ -0,0 +1,210 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+from groq import APIConnectionError, APIStatusError, Groq
+
+import metrics
+from prompting import estimate_tokens
+from scheduler import BATCH
+
+# ==========================================
+# LLM 백엔드 (연결 풀 + 마감 시간 + 재시도 + 서킷 브레이커)
+# ==========================================
+# 세 호출 지점(분석/비교/Q&A)이 모두 이 객체를 거친다. 공급자가 느려지거나 죽으면
+# 재시도를 무한히 쌓는 대신 마감 시간 안에서만 재시도하고, 연속 실패가 쌓이면
+# 일정 시간 동안 즉시 실패시켜 꼬리 지연을 끊는다.
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None: return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout: return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None: return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                raise CircuitOpenError("LLM backend circuit is open")
+            # half-open: 한 건만 시험 삼아 통과시킨다
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None: return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _request_cost(kwargs):
+    # 분당 토큰 한도용 추정치: 입력 토큰 + 응답 상한
+    prompt = sum(estimate_tokens(m.get("content") or "") for m in kwargs.get("messages", []))
+    return prompt + kwargs.get("max_tokens", 1000)
+
+
+def _outcome(error):
+    if isinstance(error, APIStatusError): return str(error.status_code)
+    if isinstance(error, APIConnectionError): return "connection"
+    return "error"
+
+
+def _observe_usage(model, usage):
+    if usage is None: return
+    for direction in ("prompt", "completion"):
+        tokens = getattr(usage, f"{direction}_tokens", None)
+        if tokens is not None:
+            metrics.observe("llm_tokens", tokens, buckets=metrics.TOKEN_BUCKETS, model=model, direction=direction)
+
+
+def _observe_stream(stream, model, started):
+    # 스트리밍은 첫 응답 헤더까지만 llm_request_seconds에 잡히므로 끝까지 읽은 시간과 토큰은 여기서 잰다
+    usage = None
+    for chunk in stream:
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+            usage = x_groq.usage
+        yield chunk
+    metrics.observe("stage_seconds", time.perf_counter() - started, stage="llm.stream", model=model)
+    _observe_usage(model, usage)
+
+
+def _is_retryable(error):
+    if isinstance(error, APIConnectionError): return True   # 타임아웃 포함
+    if isinstance(error, APIStatusError): return error.status_code in RETRYABLE_STATUS
+    return False
+
+
+class LLMBackend:
+    def __init__(self, client, max_retries=3, deadline=30.0, base_delay=0.5, max_delay=8.0, breaker=None,
+                 limiter=None, queue_timeout=60.0):
+        self.client = client
+        self.limiter = limiter             # scheduler.PriorityRateLimiter (없으면 제한 없음)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+
+    @classmethod
+    def create(cls, api_key, base_url=None, timeout=20.0, max_connections=20, **kwargs):
+        # keep-alive 연결을 재사용하는 httpx 클라이언트 하나를 모든 호출이 공유한다.
+        # SDK 자체 재시도는 끄고 여기서 마감 시간 기준으로 재시도한다.
+        http_client = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=60.0),
+        )
+        client = Groq(api_key=api_key, base_url=base_url or os.environ.get("GROQ_BASE_URL") or None, http_client=http_client, max_retries=0)
+        return cls(client, **kwargs)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _backoff(self, attempt, error):
+        retry_after = _retry_after(error)
+        if retry_after is not None: return min(retry_after, self.max_delay)
+        # full jitter: 동시에 실패한 요청들이 같은 순간에 다시 몰리지 않게 흩뜨린다
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _acquire(self, priority, cost, timeout):
+        if self.limiter is not None:
+            self.limiter.acquire(priority, cost_tokens=cost, timeout=timeout)
+
+    def complete(self, priority=BATCH, deadline=None, **kwargs):
+        cost = _request_cost(kwargs)
+        # 할당량 대기열에서 기다린 시간은 마감 시간에서 빼지 않는다 (첫 호출이 나간 뒤부터 잰다)
+        self._acquire(priority, cost, self.queue_timeout)
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count("short_circuited")
+                raise
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("LLM call deadline exceeded")
+            if attempt > 0:
+                self._acquire(priority, cost, remaining)   # 재시도도 할당량을 쓴다
+                remaining = deadline_at - time.monotonic()
+            self._count("calls")
+            model = kwargs.get("model", "")
+            started = time.perf_counter()
+            try:
+                with metrics.span("llm.request", model=model):
+                    result = self.client.chat.completions.create(timeout=remaining, **kwargs)
+            except Exception as e:
+                metrics.observe("llm_request_seconds", time.perf_counter() - started, model=model, outcome=_outcome(e))
+                if not _is_retryable(e):
+                    # 요청 자체가 잘못된 경우(400 등)는 공급자 장애가 아니므로 브레이커에 넣지 않는다
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self._count("failures")
+                delay = self._backoff(attempt, e)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline_at:
+                    raise
+                attempt += 1
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            metrics.observe("llm_request_seconds", time.perf_counter() - started, model=model, outcome="ok")
+            self.breaker.record_success()
+            if kwargs.get("stream"):
+                return _observe_stream(result, model, started)
+            _observe_usage(model, getattr(result, "usage", None))
+            return result
+
+
+_shared_backend = None
+_shared_lock = threading.Lock()
+
+def get_llm_backend(api_key, **kwargs):
+    global _shared_backend
+    with _shared_lock:
+        if _shared_backend is None:
+            _shared_backend = LLMBackend.create(api_key, **kwargs)
+        return _shared_backend
@@ -0,0 +1,231 @@
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================================
+# 단계별 지연 시간 측정 (span) + 히스토그램 + 내보내기
+# ==========================================
+# span("feed.fetch") 같은 이름 붙은 구간을 재서 프로세스 전역 히스토그램에 쌓는다.
+# 현재 rerun의 trace가 열려 있으면 같은 스레드의 span을 순서대로 함께 기록한다
+# (풀 스레드에서 돈 span은 히스토그램에만 들어간다).
+# 내보내기: Prometheus 텍스트 / JSON 문자열, 파일 덤프, 선택적 HTTP 엔드포인트.
+
+PREFIX = "news_dietitian_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+HELP = {
+    "stage_seconds": "Duration of named pipeline stages (spans).",
+    "llm_request_seconds": "Groq round-trip time per attempt, by model and outcome.",
+    "llm_tokens": "Tokens per LLM call, by model and direction.",
+    "feed_fetch_seconds": "RSS download time per feed request.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # 버킷 경계 기준 근사치 (대시보드용)
+        if not self.count: return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target: return bound
+        return None   # +Inf 칸에 걸리면 상한을 알 수 없다
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def fmt_labels(labels, extra=None):
+    items = list(labels.items()) + (extra or [])
+    if not items: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []    # (이름, 시작 오프셋, 걸린 시간, 깊이)
+        self.depth = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+_current_trace = contextvars.ContextVar("news_dietitian_trace", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._last_dump = 0.0
+
+    def _histogram(self, name, labels, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        hist = self._histograms.get(key)
+        if hist is None:
+            hist = self._histograms[key] = Histogram(buckets)
+        return hist
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        with self._lock:
+            self._histogram(name, labels, buckets).observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, name, **labels):
+        trace = _current_trace.get()
+        depth = 0
+        if trace is not None:
+            depth = trace.depth
+            trace.depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            self.observe("stage_seconds", duration, stage=name, **labels)
+            if trace is not None:
+                trace.depth -= 1
+                trace.spans.append((name, started - trace.started, duration, depth))
+
+    def timed(self, name):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def begin_trace(self, name="rerun"):
+        trace = Trace(name)
+        _current_trace.set(trace)
+        return trace
+
+    def snapshot(self):
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), "buckets": list(h.buckets), "counts": list(h.counts),
+                 "sum": h.sum, "count": h.count, "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+                for (name, labels), h in self._histograms.items()
+            ]
+            counters = [{"name": name, "labels": dict(labels), "value": v} for (name, labels), v in self._counters.items()]
+        return {"generated_at": time.time(), "histograms": histograms, "counters": counters}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+    def to_prometheus(self):
+        snap = self.snapshot()
+        lines = []
+        seen = set()
+        for h in sorted(snap["histograms"], key=lambda h: h["name"]):
+            name = PREFIX + h["name"]
+            if name not in seen:
+                seen.add(name)
+                if h["name"] in HELP: lines.append(f"# HELP {name} {HELP[h['name']]}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(h["buckets"] + ["+Inf"], h["counts"]):
+                cumulative += n
+                lines.append(f"{name}_bucket{fmt_labels(h['labels'], [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{fmt_labels(h['labels'])} {h['sum']}")
+            lines.append(f"{name}_count{fmt_labels(h['labels'])} {h['count']}")
+        for c in sorted(snap["counters"], key=lambda c: c["name"]):
+            name = PREFIX + c["name"] + "_total"
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{fmt_labels(c['labels'])} {c['value']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        # 확장자가 .json이면 JSON, 아니면 Prometheus 텍스트 (node_exporter textfile collector용)
+        data = self.to_json() if str(path).endswith(".json") else self.to_prometheus()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def dump_if_due(self, path, interval=10):
+        # rerun마다 불려도 interval 초에 한 번만 실제로 쓴다
+        with self._lock:
+            if time.time() - self._last_dump < interval: return False
+            self._last_dump = time.time()
+        self.dump(path)
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+REGISTRY = Registry()
+span = REGISTRY.span
+timed = REGISTRY.timed
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+begin_trace = REGISTRY.begin_trace
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = REGISTRY.to_json(), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = REGISTRY.to_prometheus(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve_metrics(port, host="0.0.0.0"):
+    # /metrics (Prometheus 텍스트), /metrics.json — 프로세스당 한 번만 띄운다
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
@@ -0,0 +1,112 @@
+import json
+import os
+import unicodedata
+from collections import deque
+
+# ==========================================
+# 언론사 색인 (Aho-Corasick)
+# ==========================================
+# 언론사 목록을 import 시점에 한 번만 오토마톤으로 컴파일해 두면,
+# 출처 문자열 분류 비용이 목록 크기와 무관하게 출처 문자열 길이에만 비례한다.
+
+DEFAULT_OUTLETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "outlets.json")
+
+
+def normalize_name(name):
+    return " ".join(unicodedata.normalize("NFKC", name or "").casefold().split())
+
+
+class Outlet:
+    __slots__ = ("name", "aliases", "region", "tier", "lean")
+
+    def __init__(self, name, aliases=(), region=None, tier="minor", lean=None):
+        self.name = name
+        self.aliases = tuple(aliases) or (name,)
+        self.region = region
+        self.tier = tier
+        self.lean = lean
+
+    @property
+    def is_major(self):
+        return self.tier == "major"
+
+
+class _Automaton:
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]   # 이 상태에서 끝나는 가장 긴 별칭의 (길이, Outlet)
+
+    def add(self, pattern, outlet):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            state = nxt
+        current = self.output[state]
+        if current is None or current[0] < len(pattern):
+            self.output[state] = (len(pattern), outlet)
+
+    def build(self):
+        queue = deque(self.goto[0].values())   # 루트 자식의 실패 링크는 루트(0)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                # 실패 링크 쪽에서 끝나는 별칭도 이 상태에서 끝나는 것으로 본다
+                inherited = self.output[self.fail[nxt]]
+                if inherited and (self.output[nxt] is None or self.output[nxt][0] < inherited[0]):
+                    self.output[nxt] = inherited
+
+    def search(self, text):
+        # 텍스트에 들어 있는 별칭 중 가장 긴 것 (동률이면 먼저 끝나는 것)
+        state = 0
+        best = None
+        for ch in text:
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            found = self.output[state]
+            if found and (best is None or found[0] > best[0]):
+                best = found
+        return best[1] if best else None
+
+
+class OutletIndex:
+    def __init__(self, outlets):
+        self.outlets = list(outlets)
+        self._by_region = {}
+        for outlet in self.outlets:
+            automaton = self._by_region.setdefault(outlet.region, _Automaton())
+            for alias in outlet.aliases:
+                key = normalize_name(alias)
+                if key: automaton.add(key, outlet)
+        for automaton in self._by_region.values():
+            automaton.build()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_OUTLETS_PATH):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        return cls(Outlet(**row) for row in rows)
+
+    def lookup(self, source_name, region_code):
+        automaton = self._by_region.get(region_code)
+        if automaton is None or not source_name: return None
+        return automaton.search(normalize_name(source_name))
+
+    def is_major(self, source_name, region_code):
+        outlet = self.lookup(source_name, region_code)
+        return outlet is not None and outlet.is_major
+
+
+OUTLET_INDEX = OutletIndex.from_file(os.environ.get("NEWS_DIETITIAN_OUTLETS", DEFAULT_OUTLETS_PATH))
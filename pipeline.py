@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import metrics
+from analyst import build_news_text, split_title
+from clustering import cluster_entries
+from feeds import REGION_FEEDS
+from scheduler import PREFETCH
+from session_store import EntryRecord
+
+# ==========================================
+# 브리핑 파이프라인 (피드 → 제목/출처 분리 → 묶기 → 본문 → 분석 → 저장)
+# ==========================================
+# Streamlit 없이도 돌아가므로 worker.py가 백그라운드에서 미리 계산해 둘 수 있다.
+
+BRIEFING_SIZE = 10
+
+
+def entry_to_item(entry):
+    clean_title, source_name = split_title(entry.title)
+    return {
+        "title": entry.title,
+        "clean_title": clean_title,
+        "source": source_name,
+        "link": entry.link,
+        "published": entry.get("published", ""),
+    }
+
+
+def build_briefing(analyst, fetcher, feed, region_code, category, limit=BRIEFING_SIZE, analyze=True, priority=PREFETCH, archive=None, trends=None):
+    # archive(NewsArchive)를 주면 피드 전체와 분석 결과를 검색 색인에 넣고, trends(TrendStore)를 주면 점수를 집계한다
+    if archive is not None: archive.add_feed(feed, region_code)
+    with metrics.span("briefing.cluster"):
+        clusters = cluster_entries(feed.entries)
+    total, clusters = len(clusters), clusters[:limit]
+    items = []
+    for members in clusters:
+        item = entry_to_item(members[0])
+        item["duplicates"] = [entry_to_item(m) for m in members[1:]]
+        item["analysis"] = None
+        items.append(item)
+
+    if analyze and items:
+        with metrics.span("briefing.bodies"):
+            bodies = fetcher.fetch_many([item["link"] for item in items])
+        news_texts = [build_news_text(item["title"], bodies.get(item["link"])) for item in items]
+        with metrics.span("briefing.analyze"):
+            for indices, results in analyst.analyze_batches(news_texts, region_code, priority):
+                for i, res in zip(indices, results):
+                    items[i]["analysis"] = res
+                    if archive is not None:
+                        archive.set_analysis([member["link"] for member in [items[i]] + items[i]["duplicates"]], res)
+                if trends is not None:
+                    trends.add_analyses([(items[i]["link"], items[i]["source"], items[i]["published"], res) for i, res in zip(indices, results)], region_code, category)
+
+    return {
+        "region": region_code,
+        "category": category,
+        "generated_at": time.time(),
+        "items": items,
+        "clusters": total,   # 피드 전체의 기사 묶음 수 (앱이 다음 페이지가 있는지 안다)
+    }
+
+
+
+def run_briefing(analyst, fetcher, feed_cache, briefing_store, region_code, category, limit=BRIEFING_SIZE, archive=None, trends=None):
+    feed = feed_cache.refresh(REGION_FEEDS[region_code][category])
+    briefing = build_briefing(analyst, fetcher, feed, region_code, category, limit, archive=archive, trends=trends)
+    briefing_store.save(briefing)
+    return briefing
+
+
+def run_all(analyst, fetcher, feed_cache, briefing_store, regions=None, categories=None, limit=BRIEFING_SIZE, log=print, archive=None, trends=None):
+    for region_code in regions or REGION_FEEDS:
+        for category in categories or REGION_FEEDS[region_code]:
+            started = time.time()
+            try:
+                briefing = run_briefing(analyst, fetcher, feed_cache, briefing_store, region_code, category, limit, archive, trends)
+            except Exception as e:
+                log(f"[{region_code}/{category}] failed: {e}")
+                continue
+            analyzed = sum(1 for item in briefing["items"] if item["analysis"])
+            log(f"[{region_code}/{category}] {analyzed}/{len(briefing['items'])} analyzed in {time.time() - started:.1f}s")
+
+
+# ==========================================
+# 피드 페이지 (가벼운 레코드 + 보이는 페이지만 미리 분석)
+# ==========================================
+
+_feed_clusters = OrderedDict()
+_feed_clusters_lock = threading.Lock()
+
+def feed_clusters(feed):
+    # 피드 전체를 묶어 EntryRecord 묶음 목록으로. FeedCache는 다시 받기 전까지 같은 피드 객체를
+    # 돌려주므로 rerun마다 다시 묶지 않는다 (페이지를 넘겨도 비용이 피드 길이에 비례해 늘지 않음)
+    entries = feed.entries
+    marker = (id(feed), len(entries), entries[0].get("link") if entries else None)
+    with _feed_clusters_lock:
+        if marker in _feed_clusters:
+            _feed_clusters.move_to_end(marker)
+            return _feed_clusters[marker]
+    with metrics.span("feed.cluster"):
+        clusters = [[EntryRecord.from_entry(member) for member in members] for members in cluster_entries(entries)]
+    with _feed_clusters_lock:
+        _feed_clusters[marker] = clusters
+        while len(_feed_clusters) > 32: _feed_clusters.popitem(last=False)
+    return clusters
+
+
+class AnalysisPrefetcher:
+    # 화면에 보이는 페이지와 다음 페이지의 기사를 PREFETCH 우선순위로 뒤에서 분석한다.
+    # 대기열은 max_pending 묶음(페이지)까지만 두고, 넘치면 가장 오래된 묶음(이미 지나간 페이지)을 버린다
+    def __init__(self, analyst, fetcher, max_pending=4, max_results=1000, on_result=None, failure_ttl=300, max_backoff=3600):
+        self.analyst = analyst
+        self.fetcher = fetcher
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self.failure_ttl = failure_ttl      # 처음 실패한 기사를 다시 시도하기까지 기다리는 시간 (실패할수록 두 배, max_backoff까지)
+        self.max_backoff = max_backoff
+        self.on_result = on_result          # (region_code, topic, records, results) — 아카이브/추세 기록용
+        self._pending = deque()             # (region_code, topic, [EntryRecord])
+        self._queued = set()                # 대기 중이거나 분석 중인 링크
+        self._results = OrderedDict()       # link -> 분석 결과 (세션들이 가져간다)
+        self._failures = OrderedDict()      # link -> (연속 실패 횟수, 다시 시도해도 되는 시각)
+        self._cond = threading.Condition()
+        self._thread = None
+        self.stats = {"queued": 0, "dropped": 0, "analyzed": 0, "failed": 0, "backoff": 0}
+
+    def request(self, records, region_code, topic):
+        now = time.time()
+        with self._cond:
+            fresh = [r for r in records if r.link not in self._queued and r.link not in self._results]
+            # 계속 실패하는 기사(쓸 수 없는 응답, 죽은 링크)는 rerun마다 LLM을 두 번씩 부르지 않도록 잠시 쉰다
+            waiting = [r for r in fresh if r.link in self._failures and self._failures[r.link][1] > now]
+            if waiting:
+                self.stats["backoff"] += len(waiting)
+                fresh = [r for r in fresh if r not in waiting]
+            if not fresh: return 0
+            self._pending.append((region_code, topic, fresh))
+            self._queued.update(r.link for r in fresh)
+            self.stats["queued"] += len(fresh)
+            while len(self._pending) > self.max_pending:
+                _, _, dropped = self._pending.popleft()
+                self._queued.difference_update(r.link for r in dropped)
+                self.stats["dropped"] += len(dropped)
+            self._cond.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="analysis-prefetcher", daemon=True)
+                self._thread.start()
+        return len(fresh)
+
+    def result(self, link):
+        with self._cond:
+            return self._results.get(link)
+
+    def queue_depth(self):
+        with self._cond:
+            return sum(len(records) for _, _, records in self._pending)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending: self._cond.wait()
+                region_code, topic, records = self._pending.popleft()
+            results = [None] * len(records)
+            try:
+                with metrics.span("prefetch.analyze"):
+                    bodies = self.fetcher.fetch_many([r.link for r in records])
+                    texts = [build_news_text(r.headline, bodies.get(r.link)) for r in records]
+                    for indices, batch in self.analyst.analyze_batches(texts, region_code, PREFETCH):
+                        for i, res in zip(indices, batch): results[i] = res
+            except Exception:
+                pass
+            now = time.time()
+            with self._cond:
+                for record, res in zip(records, results):
+                    self._queued.discard(record.link)
+                    if res is None:
+                        failures = self._failures.pop(record.link, (0, 0))[0] + 1
+                        self._failures[record.link] = (failures, now + min(self.failure_ttl * 2 ** (failures - 1), self.max_backoff))
+                        self.stats["failed"] += 1
+                        continue
+                    self._failures.pop(record.link, None)
+                    self._results[record.link] = res
+                    self.stats["analyzed"] += 1
+                while len(self._results) > self.max_results: self._results.popitem(last=False)
+                while len(self._failures) > self.max_results: self._failures.popitem(last=False)
+            if self.on_result:
+                try:
+                    self.on_result(region_code, topic, records, results)
+                except Exception:
+                    pass
+
+
+_shared_prefetcher = None
+_shared_lock = threading.Lock()
+
+def get_analysis_prefetcher(analyst, fetcher, **kwargs):
+    global _shared_prefetcher
+    with _shared_lock:
+        if _shared_prefetcher is None:
+            _shared_prefetcher = AnalysisPrefetcher(analyst, fetcher, **kwargs)
+        return _shared_prefetcher
@@ -0,0 +1,107 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# 토큰 예산 기반 프롬프트 구성
+# ==========================================
+# 글자 수로 자르면 한국어(음절당 토큰이 많음)와 영어(단어당 토큰이 적음)의 비용이
+# 크게 달라진다. 토크나이저 없이 문자 종류별로 토큰 수를 추정해서 예산에 맞춘다.
+
+# 모델별 입력 예산 (컨텍스트 한도가 아니라 요청당 비용/지연을 고정하기 위한 값)
+MODEL_INPUT_BUDGETS = {
+    "llama-3.3-70b-versatile": 6000,
+    "llama-3.1-8b-instant": 6000,
+}
+DEFAULT_INPUT_BUDGET = 4000
+
+_HANGUL = re.compile(r"[가-힣ᄀ-ᇿ㄰-㆏]")
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿豈-﫿]")
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+
+def estimate_tokens(text):
+    if not text: return 0
+    hangul = len(_HANGUL.findall(text))
+    cjk = len(_CJK.findall(text))
+    # Llama 3 토크나이저 기준 대략치: 한글 음절 ≈ 1토큰, 한자/가나 ≈ 1.2토큰,
+    # 영문 단어 ≈ 글자 4개당 1토큰, 나머지 기호 ≈ 2개당 1토큰
+    words = _WORD.findall(text)
+    word_tokens = sum(math.ceil(len(w) / 4) for w in words)
+    other = len(text) - hangul - cjk - sum(len(w) for w in words) - text.count(" ")
+    return hangul + math.ceil(cjk * 1.2) + word_tokens + math.ceil(max(other, 0) / 2)
+
+
+def input_budget(model):
+    return MODEL_INPUT_BUDGETS.get(model, DEFAULT_INPUT_BUDGET)
+
+
+def split_sentences(text):
+    return [s for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def fit_to_budget(text, budget):
+    # 예산을 넘으면 문장 단위로 잘라서 꼬리만 버린다 (문장 중간에서 끊지 않음)
+    if estimate_tokens(text) <= budget: return text
+    kept = []
+    used = 0
+    for sentence in split_sentences(text):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget: break
+        kept.append(sentence)
+        used += cost
+    if kept: return " ".join(kept)
+    # 첫 문장조차 안 들어가면 글자 단위로 이분 탐색
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget: lo = mid
+        else: hi = mid - 1
+    return text[:lo]
+
+
+def chunk_text(text, chunk_budget):
+    chunks = []
+    current = []
+    used = 0
+    for sentence in split_sentences(text):
+        cost = estimate_tokens(sentence) + 1
+        if cost > chunk_budget:
+            sentence = fit_to_budget(sentence, chunk_budget)
+            cost = estimate_tokens(sentence) + 1
+        if current and used + cost > chunk_budget:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += cost
+    if current: chunks.append(" ".join(current))
+    return chunks
+
+
+def condense(text, budget, summarize, chunk_budget=2500, max_workers=4, max_rounds=2):
+    # 예산 안이면 그대로, 넘치면 조각별 요약(map) 후 합쳐서(reduce) 다시 확인
+    for _ in range(max_rounds):
+        if estimate_tokens(text) <= budget: return text
+        chunks = chunk_text(text, chunk_budget)
+        if len(chunks) <= 1: break
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            summaries = list(pool.map(summarize, chunks))
+        # 요약에 실패한 조각은 원문을 예산 비율만큼 잘라서 대신 쓴다
+        share = max(budget // len(chunks), 50)
+        text = "\n".join(s if s else fit_to_budget(c, share) for s, c in zip(summaries, chunks))
+    return fit_to_budget(text, budget)
+
+
+def pack(texts, budget):
+    # 여러 본문에 예산을 고르게 나누되, 짧은 글이 남긴 몫은 긴 글에 넘겨준다
+    costs = [estimate_tokens(t) for t in texts]
+    allowance = [0] * len(texts)
+    remaining = budget
+    pending = sorted(range(len(texts)), key=lambda i: costs[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        allowance[i] = min(costs[i], share)
+        remaining -= allowance[i]
+    return allowance
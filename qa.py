@@ -0,0 +1,167 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+
+from prompting import estimate_tokens, fit_to_budget
+
+# ==========================================
+# 기사 Q&A 도우미 (답변 캐시 + 대화 기억)
+# ==========================================
+# 인기 기사에는 여러 사용자가 같은 질문("이게 나한테 무슨 영향?")을 조금씩 다르게 묻는다.
+# 질문을 정규화해서 정확히 같으면 바로, 아니면 해싱 벡터(단어 + 글자 3-gram)의 코사인 유사도가
+# 임계값 이상인 이전 답변을 재사용한다. 답변은 기사별로 묶어 TTL이 지나면 버린다.
+# 이전 대화에 기대는 후속 질문("왜?")은 맥락마다 답이 달라서 캐시하지 않는다 (스레드의 첫 질문만).
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+
+QA_CONTEXT_BUDGET = 1200    # 분석 결과로 만든 기사 맥락
+QA_HISTORY_BUDGET = 600     # 요약하지 않고 그대로 보내는 최근 대화
+QA_SUMMARY_BUDGET = 250     # 오래된 대화를 접은 요약
+
+
+def normalize_question(question):
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    return _SPACES.sub(" ", _PUNCT.sub(" ", text)).strip()
+
+
+class HashingVectorizer:
+    # 사전 없이 특징 문자열을 해시 칸에 더하는 희소 벡터 ({칸: 가중치}, L2 정규화)
+    def __init__(self, n_features=2 ** 18, ngram=3):
+        self.n_features = n_features
+        self.ngram = ngram
+
+    def features(self, text):
+        words = _WORD.findall(text)
+        yield from ("w:" + word for word in words)
+        padded = f" {text} "
+        yield from ("c:" + padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1))
+
+    def transform(self, text):
+        counts = {}
+        for feature in self.features(normalize_question(text)):
+            index = zlib.crc32(feature.encode("utf-8")) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+        weights = {index: 1 + math.log(count) for index, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {index: w / norm for index, w in weights.items()}
+
+
+def cosine(a, b):
+    if len(a) > len(b): a, b = b, a
+    return sum(w * b.get(index, 0.0) for index, w in a.items())
+
+
+class AnswerCache:
+    def __init__(self, ttl=6 * 3600, threshold=0.83, max_articles=2000, max_per_article=50, vectorizer=None):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_articles = max_articles
+        self.max_per_article = max_per_article
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self._articles = OrderedDict()   # scope -> OrderedDict(정규화된 질문 -> (벡터, 답변, 저장 시각))
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0, "expired": 0, "writes": 0}
+
+    def _entries(self, scope, now):
+        entries = self._articles.get(scope)
+        if entries is None: return None
+        self._articles.move_to_end(scope)
+        # 오래된 답변부터 들어 있으므로 앞에서부터 만료된 것을 버린다
+        while entries and now - next(iter(entries.values()))[2] > self.ttl:
+            entries.popitem(last=False)
+            self.stats["expired"] += 1
+        return entries
+
+    def get(self, scope, question):
+        # (답변, 유사도) 또는 (None, 0). scope는 (지역, 기사 링크)
+        key = normalize_question(question)
+        with self._lock:
+            entries = self._entries(scope, time.time())
+            if entries and key in entries:
+                self.stats["hits"] += 1
+                return entries[key][1], 1.0
+            best, score = None, 0.0
+            if entries:
+                # 기사당 답변 수가 max_per_article로 묶여 있어서 전부 비교해도 싸다
+                vector = self.vectorizer.transform(key)
+                for cached_vector, answer, _ in entries.values():
+                    similarity = cosine(vector, cached_vector)
+                    if similarity > score: best, score = answer, similarity
+            if best is not None and score >= self.threshold:
+                self.stats["similar_hits"] += 1
+                return best, score
+            self.stats["misses"] += 1
+            return None, score
+
+    def put(self, scope, question, answer):
+        key = normalize_question(question)
+        if not key or not answer: return
+        vector = self.vectorizer.transform(key)
+        with self._lock:
+            entries = self._articles.get(scope)
+            if entries is None:
+                entries = self._articles[scope] = OrderedDict()
+                while len(self._articles) > self.max_articles:
+                    self._articles.popitem(last=False)
+            self._articles.move_to_end(scope)
+            entries.pop(key, None)
+            entries[key] = (vector, answer, time.time())
+            while len(entries) > self.max_per_article:
+                entries.popitem(last=False)
+            self.stats["writes"] += 1
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, articles=len(self._articles), answers=sum(len(e) for e in self._articles.values()))
+
+
+def build_context(title, analysis=None, deep_dive=None):
+    # 저장된 분석 결과로 기사 맥락을 만든다 (분석 전이면 제목만)
+    lines = [f"Title: {title}"]
+    if analysis:
+        scores, balance, metrics = analysis.get("scores", {}), analysis.get("balance", {}), analysis.get("metrics", {})
+        lines += [
+            f"Summary: {analysis.get('summary', '')}",
+            f"Keywords: {', '.join(analysis.get('keywords', []))}",
+            f"Key actor: {metrics.get('who', '')} / Impact: {metrics.get('impact', '')}",
+            f"Stated claim: {balance.get('stated', '')}",
+            f"Hidden framing: {balance.get('hidden', '')}",
+            f"Rating: {balance.get('rating', '')} (fact {scores.get('fact_ratio', '')} / opinion {scores.get('opinion_ratio', '')})",
+        ]
+        deep_dive = deep_dive or analysis.get("deep_dive")
+    if deep_dive:
+        lines += [
+            f"Background: {deep_dive.get('background_context', '')}",
+            f"Fact check: {deep_dive.get('fact_check', '')}",
+            f"Missing perspectives: {deep_dive.get('missing_perspective', '')}",
+        ]
+    return fit_to_budget("\n".join(lines), QA_CONTEXT_BUDGET)
+
+
+def split_history(messages, budget=QA_HISTORY_BUDGET):
+    # (요약으로 접을 오래된 메시지, 그대로 보낼 최근 메시지) — 최근 쪽을 예산만큼 남긴다
+    used = 0
+    keep = len(messages)
+    for message in reversed(messages):
+        cost = estimate_tokens(message["content"]) + 4
+        if used + cost > budget: break
+        used += cost
+        keep -= 1
+    return messages[:keep], messages[keep:]
+
+
+_shared_answers = None
+_shared_lock = threading.Lock()
+
+def get_answer_cache(**kwargs):
+    global _shared_answers
+    with _shared_lock:
+        if _shared_answers is None:
+            _shared_answers = AnswerCache(**kwargs)
+        return _shared_answers
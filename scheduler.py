@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+# ==========================================
+# 전역 LLM 호출 스케줄러 (토큰 버킷 + 우선순위 + single-flight)
+# ==========================================
+# 프로세스 안의 모든 세션이 하나의 할당량(분당 요청 수/토큰 수)을 나눠 쓴다.
+# 자리가 나면 우선순위가 높은(숫자가 작은) 대기자부터 통과시키고,
+# 같은 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 기다린다.
+
+INTERACTIVE = 0   # Q&A, 카드 하나 열기 — 사용자가 화면 앞에서 기다리는 요청
+BATCH = 1         # Analyze All, 비교 분석
+PREFETCH = 2      # 백그라운드 선계산
+
+
+class RateLimited(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, rate_per_minute))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost, now):
+        self._refill(now)
+        cost = min(cost, self.capacity)   # 버킷보다 큰 요청도 가득 찼을 때는 통과시킨다
+        if self.tokens >= cost: return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, cost):
+        self.tokens -= min(cost, self.capacity)
+
+
+class PriorityRateLimiter:
+    def __init__(self, requests_per_minute=30, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self.stats = {"granted": 0, "timeouts": 0, "waited_seconds": 0.0}
+
+    def acquire(self, priority=BATCH, cost_tokens=0, timeout=None):
+        ticket = (priority, next(self._seq))
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] == ticket:
+                        wait = self.requests.wait_time(1, now)
+                        if self.tokens is not None:
+                            wait = max(wait, self.tokens.wait_time(cost_tokens, now))
+                        if wait == 0:
+                            self.requests.take(1)
+                            if self.tokens is not None: self.tokens.take(cost_tokens)
+                            self.stats["granted"] += 1
+                            self.stats["waited_seconds"] += now - started
+                            return
+                    else:
+                        wait = 0.5   # 앞 사람이 통과하면 notify로 깨어난다
+                    if deadline is not None:
+                        if now >= deadline:
+                            self.stats["timeouts"] += 1
+                            raise RateLimited("LLM rate limit queue timeout")
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._waiting)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    def begin(self, key):
+        # (leader 여부, Future). leader는 결과를 finish()로 넘겨야 한다
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["shared"] += 1
+                return False, future
+            future = Future()
+            self._calls[key] = future
+            self.stats["leaders"] += 1
+            return True, future
+
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None: return
+        if error is not None: future.set_exception(error)
+        else: future.set_result(result)
+
+    def do(self, key, fn):
+        leader, future = self.begin(key)
+        if not leader: return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+def get_rate_limiter(requests_per_minute=30, tokens_per_minute=None):
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = PriorityRateLimiter(requests_per_minute, tokens_per_minute)
+        return _shared_limiter
@@ -0,0 +1,178 @@
+import copy
+import math
+
+# ==========================================
+# LLM 응답 스키마 (검사 + 기본값 채우기 + 고칠 필드 목록)
+# ==========================================
+# 모델이 준 JSON을 화면이 기대하는 모양으로 맞춘다. 타입이 조금 어긋난 값("72", 11.0)은
+# 그 자리에서 고치고, 빠졌거나 쓸 수 없는 필드는 기본값을 채운 뒤 경로("scores.fact_ratio")로
+# 알려준다. 필수 필드가 빠졌으면 analyst가 그 필드만 다시 물어본다 (전체 재분석 대신).
+# 스키마는 {이름: 필드} dict이고, 값이 dict면 하위 객체다.
+
+DEFAULTED = "_defaulted"   # 결과에 붙여 두는 "기본값으로 채운 필드 경로" 목록 (캐시에도 같이 저장된다)
+
+
+class Field:
+    def __init__(self, hint, default, required=True):
+        self.hint = hint            # 다시 물어볼 때 프롬프트에 넣는 설명
+        self.default = default
+        self.required = required
+
+    def coerce(self, value):
+        return value
+
+
+class Text(Field):
+    def __init__(self, hint, default="", required=True):
+        super().__init__(hint, default, required)
+
+    def coerce(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool): value = str(value)
+        if not isinstance(value, str) or not value.strip(): raise ValueError(value)
+        return value.strip()
+
+
+class Number(Field):
+    def __init__(self, hint, low, high, default, required=True):
+        super().__init__(hint, default, required)
+        self.low = low
+        self.high = high
+
+    def coerce(self, value):
+        if isinstance(value, bool): raise ValueError(value)
+        if isinstance(value, str): value = float(value.strip().rstrip("%"))
+        if not isinstance(value, (int, float)) or math.isnan(value): raise ValueError(value)
+        # 범위를 벗어난 점수는 잘라서 쓴다 (다시 물어볼 만큼의 오류는 아님)
+        return int(round(max(self.low, min(self.high, value))))
+
+
+class Choice(Field):
+    def __init__(self, hint, choices, default, required=True):
+        super().__init__(hint, default, required)
+        self.choices = choices
+
+    def coerce(self, value):
+        value = str(value).strip().upper()
+        if value not in self.choices: raise ValueError(value)
+        return value
+
+
+class TextList(Field):
+    def __init__(self, hint, default=(), required=True):
+        super().__init__(hint, list(default), required)
+
+    def coerce(self, value):
+        if isinstance(value, str): value = value.split(",")
+        if not isinstance(value, list): raise ValueError(value)
+        items = [str(v).strip() for v in value if v is not None and str(v).strip()]
+        if not items: raise ValueError(value)
+        return items
+
+
+# 1단계(triage): 카드에 바로 보이는 필드 — 작은 모델이 빠르게 채운다
+TRIAGE = {
+    "title": Text("Unbiased Headline", required=False),
+    "summary": Text("Neutral summary (1-2 sentences)"),
+    "keywords": TextList(["tag1", "tag2", "tag3"]),
+    "sentiment_emoji": Text('"🔥" or "😐" or "🧊"', default="🧐", required=False),
+    "metrics": {
+        "who": Text("Key Actor", required=False),
+        "impact": Text("Core Impact", required=False),
+    },
+    "scores": {
+        "fact_ratio": Number("Number (0-100)", 0, 100, 50),
+        "opinion_ratio": Number("Number (0-100)", 0, 100, 50, required=False),
+    },
+    "balance": {
+        "stated": Text("Explicit Claim", required=False),
+        "hidden": Text("Implicit Bias/Context"),
+        "rating": Choice('"FACT" or "MIXED" or "OPINION"', ("FACT", "MIXED", "OPINION"), "MIXED"),
+    },
+}
+
+# 2단계(deep dive): DEEP DIVE를 펼쳤을 때만 큰 모델로 만든다
+DEEP_DIVE = {
+    "background_context": Text("Historical background or situation explaining why this news matters (2-3 sentences)", default="N/A"),
+    "fact_check": Text("Verification of key claims or clarifying potentially misleading statistics", default="N/A"),
+    "missing_perspective": Text("What viewpoints or stakeholders are omitted in this article?", default="N/A"),
+}
+
+STANCE = {
+    "stance_label": Text("Short keyword (e.g. Critical)", default="N/A"),
+    "stance_score": Number("Integer (-10 to 10)", -10, 10, 0),
+    "summary": Text("1 sentence summary"),
+}
+
+SYNTHESIS = {
+    "core_difference": Text("One sentence summary of the main conflict"),
+    "key_points": TextList(["Point 1", "Point 2", "Point 3"]),
+}
+
+COMPARISON = dict(SYNTHESIS, article_a=STANCE, article_b=STANCE)
+
+
+def validate(schema, data, prefix="", defaulted=None):
+    # (기본값이 채워진 결과, 빠졌거나 잘못된 필수 필드 경로 목록).
+    # defaulted에 list를 주면 기본값으로 채운 필드 경로를 선택 필드까지 전부 모은다
+    if not isinstance(data, dict): data = {}
+    result, problems = {}, []
+    for name, field in schema.items():
+        path = prefix + name
+        if isinstance(field, dict):
+            result[name], nested = validate(field, data.get(name), path + ".", defaulted)
+            problems += nested
+            continue
+        try:
+            if data.get(name) is None: raise ValueError(name)
+            result[name] = field.coerce(data[name])
+        except (TypeError, ValueError):
+            result[name] = copy.copy(field.default)
+            if field.required: problems.append(path)
+            if defaulted is not None: defaulted.append(path)
+    return result, problems
+
+
+def model_value(result, path):
+    # 모델이 실제로 준 값이면 그 값, 기본값으로 채운 필드면 None (집계에 가짜 값이 섞이지 않게)
+    if path in (result.get(DEFAULTED) or ()): return None
+    node = result
+    for name in path.split("."):
+        node = node.get(name) if isinstance(node, dict) else None
+    return node
+
+
+def required_paths(schema, prefix=""):
+    paths = []
+    for name, field in schema.items():
+        if isinstance(field, dict): paths += required_paths(field, prefix + name + ".")
+        elif field.required: paths.append(prefix + name)
+    return paths
+
+
+def usable(schema, problems):
+    # 필수 필드가 하나라도 제대로 왔으면 고쳐 쓸 가치가 있다 (전부 없으면 새로 분석)
+    return len(problems) < len(required_paths(schema))
+
+
+def skeleton(schema, paths):
+    # 다시 물어볼 필드만 담은 출력 형식 {"scores": {"fact_ratio": "Number (0-100)"}}
+    out = {}
+    for path in paths:
+        node, fields = out, schema
+        *parents, leaf = path.split(".")
+        for name in parents:
+            node, fields = node.setdefault(name, {}), fields[name]
+        node[leaf] = fields[leaf].hint
+    return out
+
+
+def merge(base, patch):
+    # patch의 값으로 base를 덮되 하위 객체는 필드 단위로 합친다
+    merged = dict(base) if isinstance(base, dict) else {}
+    if not isinstance(patch, dict): return merged
+    for name, value in patch.items():
+        if isinstance(value, dict) and isinstance(merged.get(name), dict):
+            merged[name] = merge(merged[name], value)
+        elif value is not None:
+            merged[name] = value
+    return merged
@@ -0,0 +1,201 @@
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+# ==========================================
+# 세션별 상태 저장소 (LRU + 메모리 계산)
+# ==========================================
+# st.session_state에 view_{link}, analysis_{link}, 채팅 기록, feedparser 항목을 그대로 쌓으면
+# 세션이 오래 살아 있을수록 메모리가 끝없이 는다. 세션마다 SessionStore 하나를 두고
+# 기사 상태와 Q&A 스레드는 오래 안 본 것부터 밀어낸다. 기사는 화면에 필요한 네 필드만 담은
+# EntryRecord로 들고 있는다. Streamlit과 무관하게 import 가능.
+
+class EntryRecord:
+    __slots__ = ("title", "source", "link", "published")
+
+    def __init__(self, title, source, link, published=""):
+        self.title = title          # 언론사 이름을 뗀 제목
+        self.source = source        # 제목에 언론사가 없으면 ""
+        self.link = link
+        self.published = published
+
+    @classmethod
+    def from_entry(cls, entry):
+        # feedparser 항목이나 브리핑 dict("제목 - 언론사" 형식의 title)에서 만든다
+        title = entry.get("title", "")
+        source = ""
+        if " - " in title: title, source = title.rsplit(" - ", 1)
+        return cls(title, source, entry.get("link", ""), entry.get("published", ""))
+
+    @property
+    def headline(self):
+        # 피드에 있던 원래 제목 — 분석 캐시 키가 이 문자열로 만들어진다
+        return f"{self.title} - {self.source}" if self.source else self.title
+
+    @property
+    def source_name(self):
+        return self.source or "NEWS"
+
+
+class ArticleState:
+    __slots__ = ("analysis", "analyzed", "open", "deep_dive")
+
+    def __init__(self):
+        self.analysis = None
+        self.deep_dive = None   # DEEP DIVE를 펼쳤을 때 따로 받아 온 2단계 결과
+        self.analyzed = False   # 분석을 시도했는지 (실패해서 analysis가 None이어도 True)
+        self.open = False
+
+
+def deep_size(obj, seen=None):
+    # 객체가 붙들고 있는 메모리 근사치 (같은 객체는 한 번만 센다)
+    if seen is None: seen = set()
+    if id(obj) in seen: return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+
+_stores = weakref.WeakSet()   # 살아 있는 세션들 (세션이 끝나면 저절로 빠진다)
+
+
+class SessionStore:
+    def __init__(self, max_articles=200, max_threads=20, max_messages=40):
+        self.max_articles = max_articles
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.articles = OrderedDict()   # link -> ArticleState
+        self.threads = OrderedDict()    # link -> [{"role", "content"}]
+        self.summaries = {}             # link -> (오래된 대화 요약, 요약에 접힌 앞쪽 메시지 수)
+        self.pages = {}                 # "지역/토픽" -> 브리핑 페이지 번호
+        self.comparison = []            # EntryRecord
+        self.comparison_duplicates = {}
+        self.comparison_query = ""
+        self.comparison_page = 0
+        self.comparison_total = 0       # 아카이브에서 이 검색어에 걸린 전체 건수
+        self.evicted = 0
+        self._lock = threading.RLock()   # 다른 세션의 스레드가 메모리를 세는 동안 구조가 바뀌지 않게
+        _stores.add(self)
+
+    def __getstate__(self):
+        return {name: value for name, value in self.__dict__.items() if name != "_lock"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        _stores.add(self)
+
+    def _article(self, link, create=False):
+        with self._lock:
+            state = self.articles.get(link)
+            if state is not None:
+                self.articles.move_to_end(link)
+            elif create:
+                state = self.articles[link] = ArticleState()
+                while len(self.articles) > self.max_articles:
+                    self.articles.popitem(last=False)
+                    self.evicted += 1
+            return state
+
+    def has_analysis(self, link):
+        state = self._article(link)
+        return state is not None and state.analyzed
+
+    def analysis(self, link):
+        state = self._article(link)
+        return state.analysis if state is not None else None
+
+    def set_analysis(self, links, result):
+        # 같은 기사의 전재본(묶음 전체)에 같은 결과 객체를 나눠준다
+        with self._lock:
+            for link in links:
+                state = self._article(link, create=True)
+                state.analysis = result
+                state.analyzed = True
+
+    def deep_dive(self, link):
+        state = self._article(link)
+        return state.deep_dive if state is not None else None
+
+    def set_deep_dive(self, links, result):
+        with self._lock:
+            for link in links:
+                self._article(link, create=True).deep_dive = result
+
+    def is_open(self, link):
+        state = self._article(link)
+        return state is not None and state.open
+
+    def set_open(self, link, value):
+        with self._lock:
+            self._article(link, create=True).open = value
+
+    def thread(self, link):
+        with self._lock:
+            messages = self.threads.get(link)
+            if messages is None: return []
+            self.threads.move_to_end(link)
+            return list(messages)
+
+    def add_message(self, link, role, content):
+        with self._lock:
+            messages = self.threads.get(link)
+            if messages is None:
+                messages = self.threads[link] = []
+                while len(self.threads) > self.max_threads:
+                    evicted_link, _ = self.threads.popitem(last=False)
+                    self.summaries.pop(evicted_link, None)
+                    self.evicted += 1
+            self.threads.move_to_end(link)
+            messages.append({"role": role, "content": content})
+            trimmed = max(0, len(messages) - self.max_messages)
+            if trimmed:
+                del messages[:trimmed]
+                if link in self.summaries:
+                    summary, folded = self.summaries[link]
+                    self.summaries[link] = (summary, max(0, folded - trimmed))
+
+    def thread_summary(self, link):
+        with self._lock:
+            return self.summaries.get(link, ("", 0))
+
+    def set_thread_summary(self, link, summary, folded):
+        with self._lock:
+            if link in self.threads: self.summaries[link] = (summary, folded)
+
+    def page(self, feed_key):
+        with self._lock:
+            return self.pages.get(feed_key, 0)
+
+    def set_page(self, feed_key, page):
+        with self._lock:
+            self.pages[feed_key] = max(0, page)
+
+    def set_comparison(self, records, duplicates, query, page=0, total=0):
+        # 현재 페이지의 레코드만 들고 있는다 (다른 페이지는 아카이브에서 다시 읽는다)
+        with self._lock:
+            self.comparison = records
+            self.comparison_duplicates = duplicates
+            self.comparison_query = query
+            self.comparison_page = page
+            self.comparison_total = total
+
+    def nbytes(self):
+        with self._lock:
+            return deep_size([self.articles, self.threads, self.summaries, self.comparison, self.comparison_duplicates, self.comparison_query])
+
+    def stats(self):
+        return {"articles": len(self.articles), "threads": len(self.threads), "comparison": len(self.comparison),
+                "evicted": self.evicted, "bytes": self.nbytes()}
+
+
+def all_sessions_stats():
+    stores = list(_stores)
+    return {"sessions": len(stores), "bytes": sum(store.nbytes() for store in stores)}
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# ==========================================
+# 디스크 기반 분석 결과 캐시 (SQLite)
+# ==========================================
+# st.cache_data는 메모리 전용이고 재배포 때마다 사라지며, None(실패)까지 캐시한다.
+# 여기서는 정상 결과만 저장하고, TTL과 LRU로 크기를 제한한다.
+
+DEFAULT_DB_PATH = os.environ.get("NEWS_DIETITIAN_DB", "news_dietitian.db")
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split())
+
+
+def content_hash(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(normalize_text(str(part)).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class AnalysisStore:
+    def __init__(self, path=DEFAULT_DB_PATH, ttl=7 * 24 * 3600, max_entries=20000, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache(accessed_at)")
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "skipped": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(kind, model, prompt_version, region_code, *content):
+        return f"{kind}:{content_hash(model, prompt_version, region_code, *content)}"
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(value)
+
+    def put(self, key, value):
+        # 실패(None)나 빈 결과는 절대 저장하지 않는다 → 일시적 오류가 영구 캐시되지 않음
+        if not value:
+            with self._lock:
+                self.stats["skipped"] += 1
+            return False
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, kind, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, key.split(":", 1)[0], payload, len(payload.encode("utf-8")), now, now),
+            )
+            self.stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def _evict(self):
+        if self.ttl:
+            cur = self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            self.stats["evictions"] += cur.rowcount
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes: return
+        # 가장 오래 사용되지 않은 항목부터 한도 안으로 들어올 때까지 제거 (LRU)
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM analysis_cache ORDER BY accessed_at ASC"):
+            if count <= self.max_entries and total <= self.max_bytes: break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM analysis_cache WHERE key = ?", victims)
+        self.stats["evictions"] += len(victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def summary(self):
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(entries=count, bytes=total, hit_rate=stats["hits"] / lookups if lookups else 0.0)
+        return stats
+
+
+# ==========================================
+# 미리 계산된 브리핑 (워커가 쓰고 UI는 읽기만)
+# ==========================================
+class BriefingStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS briefings (
+                region TEXT NOT NULL,
+                category TEXT NOT NULL,
+                generated_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (region, category)
+            )
+        """)
+        self._conn.commit()
+
+    def save(self, briefing):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO briefings (region, category, generated_at, payload) VALUES (?, ?, ?, ?)",
+                (briefing["region"], briefing["category"], briefing["generated_at"], json.dumps(briefing, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def latest(self, region, category, max_age=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, generated_at FROM briefings WHERE region = ? AND category = ?", (region, category)
+            ).fetchone()
+        if row is None: return None
+        if max_age is not None and time.time() - row[1] > max_age: return None
+        return json.loads(row[0])
+
+
+_shared_store = None
+_shared_briefings = None
+_shared_lock = threading.Lock()
+
+def get_analysis_store(path=DEFAULT_DB_PATH, **kwargs):
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = AnalysisStore(path, **kwargs)
+        return _shared_store
+
+def get_briefing_store(path=DEFAULT_DB_PATH):
+    global _shared_briefings
+    with _shared_lock:
+        if _shared_briefings is None:
+            _shared_briefings = BriefingStore(path)
+        return _shared_briefings
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 저장소 루트의 모듈(articles.py 등)과 bench/의 대역 서버(fake_groq.py)를 패키지 설치 없이 import한다
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
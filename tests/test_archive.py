@@ -0,0 +1,88 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from archive import NewsArchive
+
+
+def _feed(*items):
+    return SimpleNamespace(entries=[{"link": link, "title": title, "published": ""} for link, title in items])
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = NewsArchive(str(tmp_path / "archive.db"))
+    archive.add_entries(_feed(
+        ("https://kr.example/1", "한은, 기준금리 동결 결정 - 연합뉴스"),
+        ("https://kr.example/2", "북한 미사일 발사에 정부 긴급 회의 - KBS"),
+        ("https://kr.example/3", "반도체 수출 회복세 - 한겨레"),
+    ).entries, "KR")
+    archive.add_entries(_feed(
+        ("https://us.example/1", "Fed holds interest rates steady - Reuters"),
+        ("https://us.example/2", "Chip exports rebound in Korea - AP"),
+    ).entries, "US")
+    return archive
+
+
+def _links(archive, query, region):
+    return [hit["link"] for hit in archive.search(query, region)[0]]
+
+
+def test_hangul_query_with_particle_matches_bigrams(archive):
+    assert _links(archive, "금리를", "KR") == ["https://kr.example/1"]
+    assert _links(archive, "기준금리가", "KR") == ["https://kr.example/1"]
+
+
+def test_single_syllable_hangul_query(archive):
+    assert _links(archive, "북", "KR") == ["https://kr.example/2"]
+
+
+def test_latin_query_matches_plural_and_prefix(archive):
+    assert _links(archive, "rate", "US") == ["https://us.example/1"]
+    assert _links(archive, "export", "US") == ["https://us.example/2"]
+
+
+@pytest.mark.parametrize("query", ['"', "*", "-", "rate*", "-fed", "NEAR(", "AND OR NOT", "(", "^", ":"])
+def test_fts_special_characters_do_not_raise(archive, query):
+    hits, total = archive.search(query, "KR")
+    assert hits == [] and total == 0
+
+
+def test_fts_special_characters_around_words_are_ignored(archive):
+    assert _links(archive, '"금리*', "KR") == ["https://kr.example/1"]
+    assert _links(archive, "-fed-", "US") == ["https://us.example/1"]
+
+
+def test_results_are_limited_to_region(archive):
+    assert _links(archive, "반도체", "US") == []
+    assert _links(archive, "chip", "KR") == []
+    assert _links(archive, "chip", "US") == ["https://us.example/2"]
+
+
+def test_rss_hits_rank_first_and_respect_region(archive):
+    feed = _feed(("https://kr.example/4", "통화정책 방향 결정 회의 - 매일경제"))
+    archive.refresh("금리", "KR", lambda query: feed)
+    assert _links(archive, "금리", "KR") == ["https://kr.example/4", "https://kr.example/1"]
+    assert archive.has_results("금리", "KR")
+    assert not archive.has_results("금리", "US")
+    assert _links(archive, "금리", "US") == []
+
+
+def test_failed_add_feed_is_retried(archive, monkeypatch):
+    feed = _feed(("https://kr.example/5", "부동산 대책 발표 - 조선일보"))
+    real = archive.add_entries
+    calls = []
+
+    def flaky(entries, region_code):
+        calls.append(1)
+        if len(calls) == 1: raise sqlite3.OperationalError("database is locked")
+        return real(entries, region_code)
+
+    monkeypatch.setattr(archive, "add_entries", flaky)
+    with pytest.raises(sqlite3.OperationalError):
+        archive.add_feed(feed, "KR")
+    # 실패한 피드는 본 것으로 기록되지 않아 다음 호출에서 다시 넣는다
+    assert archive.add_feed(feed, "KR") == 1
+    assert archive.add_feed(feed, "KR") == 0
+    assert _links(archive, "부동산", "KR") == ["https://kr.example/5"]
@@ -0,0 +1,127 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import articles
+from articles import ArticleFetcher, extract_text
+
+FIRST = "정부는 오늘 새로운 부동산 대책을 발표하며 공급 확대와 대출 규제 완화를 동시에 추진한다고 밝혔다."
+SECOND = "전문가들은 이번 대책이 단기적으로 시장 심리를 안정시키겠지만 장기 효과는 지켜봐야 한다고 평가했다."
+OUTSIDE = "Related stories and other navigation text that is long enough to pass the filter."
+
+
+def test_div_body_with_br_separated_text():
+    raw = f'<html><body><div class="menu">홈</div><div id="articleBody">{FIRST}<br>{SECOND}</div><p>{OUTSIDE}</p></body></html>'
+    assert extract_text(raw) == f"{FIRST}\n\n{SECOND}"
+
+
+def test_unclosed_paragraphs_inside_article():
+    raw = f"<html><body><article><p>{FIRST}<p>{SECOND}</article><p>{OUTSIDE}</p></body></html>"
+    assert extract_text(raw) == f"{FIRST}\n\n{SECOND}"
+
+
+def test_unclosed_paragraph_at_end_of_document():
+    assert extract_text(f"<article><p>{FIRST}<p>{SECOND}") == f"{FIRST}\n\n{SECOND}"
+
+
+def test_nested_div_does_not_close_body_container():
+    raw = f'<div class="article_body"><div>{FIRST}</div><p>{SECOND}</p></div><p>{OUTSIDE}</p>'
+    assert extract_text(raw) == f"{FIRST}\n\n{SECOND}"
+
+
+def test_page_paragraphs_used_without_container():
+    assert extract_text(f"<html><body><p>{FIRST}</p><p>short</p><p>{SECOND}</p></body></html>") == f"{FIRST}\n\n{SECOND}"
+
+
+# ---------- ArticleFetcher (로컬 http.server 대역) ----------
+
+ARTICLE_HTML = f"<html><body><article><p>{FIRST}</p><p>{SECOND}</p></article></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _start(self, length=None, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if length is not None: self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/article":
+            body = ARTICLE_HTML.encode("utf-8")
+            self._start(len(body))
+            self.wfile.write(body)
+        elif self.path == "/big":
+            body = b"<html><body>" + b"<p>" + b"x" * 500_000 + b"</p></body></html>"
+            self._start(len(body))
+            self.wfile.write(body)
+        elif self.path == "/slow":
+            # 조금씩 계속 보내서 읽기 타임아웃은 안 걸리고 전체 마감 시간만 넘게 한다
+            self._start(1_000_000)
+            try:
+                for _ in range(100):
+                    self.wfile.write(b"<p>" + b"y" * 1000 + b"</p>")
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+        elif self.path == "/gnews":
+            port = self.server.server_address[1]
+            body = f'<html><body><c-wiz data-n-au="http://localhost:{port}/article"></c-wiz></body></html>'.encode()
+            self._start(len(body))
+            self.wfile.write(body)
+        else:
+            self._start(0, status=404)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_text_extracts_article(server):
+    fetcher = ArticleFetcher(timeout=2, deadline=5)
+    assert fetcher.fetch_text(f"{server}/article") == f"{FIRST}\n\n{SECOND}"
+
+
+def test_byte_cap_truncates_download(server):
+    fetcher = ArticleFetcher(max_bytes=20_000, timeout=2, deadline=5)
+    _, body = fetcher._download(f"{server}/big")
+    assert len(body) <= 20_000
+    assert fetcher.stats["truncated"] == 1
+
+
+def test_deadline_cuts_slow_download(server):
+    fetcher = ArticleFetcher(timeout=2, deadline=0.3)
+    started = time.monotonic()
+    _, body = fetcher._download(f"{server}/slow")
+    assert time.monotonic() - started < 2
+    assert 0 < len(body) < 100 * 1007
+    assert fetcher.stats["truncated"] == 1
+
+
+def test_resolve_follows_google_news_relay(server, monkeypatch):
+    # 중계 페이지(127.0.0.1)가 가리키는 원문(localhost)을 한 번 더 받는다
+    monkeypatch.setattr(articles, "GOOGLE_NEWS_HOST", server.split("//")[1])
+    fetcher = ArticleFetcher(timeout=2, deadline=5)
+    final_url, body = fetcher.resolve(f"{server}/gnews")
+    assert final_url.startswith("http://localhost:") and final_url.endswith("/article")
+    assert FIRST in body
+
+
+def test_fetch_many_returns_none_for_dead_links(server):
+    fetcher = ArticleFetcher(timeout=1, deadline=2)
+    dead = "http://127.0.0.1:9/nothing-listens-here"
+    bodies = fetcher.fetch_many([f"{server}/article", f"{server}/missing", dead, f"{server}/article"])
+    assert bodies == {f"{server}/article": f"{FIRST}\n\n{SECOND}", f"{server}/missing": None, dead: None}
+    assert fetcher.stats["errors"] == 2
+    # 실패는 failure_ttl 동안 다시 받지 않는다
+    assert fetcher.fetch_text(dead) is None and fetcher.stats["misses"] == 3
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from feeds import FeedPrefetcher
+
+
+class _CountingCache:
+    def __init__(self):
+        self.refreshed = []
+        self.lock = threading.Lock()
+
+    def refresh(self, url):
+        with self.lock:
+            self.refreshed.append(url)
+
+    def _count(self, name):
+        pass
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition(): return True
+        time.sleep(0.01)
+    return False
+
+
+def test_prefetcher_restarts_after_stop():
+    cache = _CountingCache()
+    prefetcher = FeedPrefetcher(cache, interval=60, max_workers=2)
+    prefetcher.start()
+    assert _wait_for(lambda: prefetcher.last_cycle is not None)
+    prefetcher.stop()
+    assert _wait_for(lambda: not prefetcher._thread.is_alive())
+
+    first_cycle = prefetcher.last_cycle
+    prefetcher.remember_search("https://example.com/search")
+    prefetcher.start()
+    assert _wait_for(lambda: prefetcher.last_cycle != first_cycle)
+    assert "https://example.com/search" in cache.refreshed
+    prefetcher.stop()
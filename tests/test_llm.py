@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from groq import APIConnectionError, APIStatusError
+
+from fake_groq import FakeGroqServer
+from llm import CircuitBreaker, CircuitOpenError, DeadlineExceeded, LLMBackend
+
+MESSAGES = [{"role": "system", "content": "You answer questions."}, {"role": "user", "content": "Hello?"}]
+
+
+@pytest.fixture
+def server():
+    server = FakeGroqServer().start()
+    yield server
+    server.stop()
+
+
+def _backend(server, **kwargs):
+    return LLMBackend.create("x", base_url=server.base_url, timeout=5.0, **kwargs)
+
+
+def _call(backend, **kwargs):
+    return backend.complete(model="fake", messages=MESSAGES, **kwargs)
+
+
+def test_breaker_opens_after_consecutive_failures(server):
+    server.error_rate = 1.0
+    backend = _backend(server, max_retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    for _ in range(3):
+        with pytest.raises(APIStatusError):
+            _call(backend)
+    assert backend.breaker.state == "open"
+
+    # 열린 뒤에는 서버에 요청을 보내지 않고 바로 실패한다
+    with pytest.raises(CircuitOpenError):
+        _call(backend)
+    assert server.calls == 3
+    assert backend.stats["short_circuited"] == 1
+
+
+def test_half_open_lets_one_probe_through(server):
+    server.error_rate = 1.0
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    backend = _backend(server, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(APIStatusError):
+            _call(backend)
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+
+    # 시험 호출이 실패하면 다시 열린다
+    with pytest.raises(APIStatusError):
+        _call(backend)
+    assert breaker.state == "open"
+    assert server.calls == 3
+
+    time.sleep(0.25)
+    breaker.before_call()                 # 시험 호출 한 건이 나가 있는 동안
+    with pytest.raises(CircuitOpenError):  # 다른 호출은 막힌다
+        breaker.before_call()
+    breaker.record_failure()
+
+    time.sleep(0.25)
+    server.error_rate = 0.0
+    assert _call(backend).choices[0].message.content
+    assert breaker.state == "closed"
+
+
+def test_retry_stops_at_deadline(server):
+    server.error_rate = 1.0
+    server.latency = 0.05
+    backend = _backend(server, max_retries=100, deadline=0.6, base_delay=0.05, max_delay=0.2,
+                       breaker=CircuitBreaker(failure_threshold=1000))
+    started = time.monotonic()
+    # 마지막 시도는 남은 시간을 타임아웃으로 받으므로 그 안에서 끊길 수도 있다
+    with pytest.raises((APIStatusError, APIConnectionError, DeadlineExceeded)):
+        _call(backend)
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.6 + 0.3
+    assert 1 < server.calls < 100
+    assert backend.stats["retries"] == server.calls - 1
+
+
+def test_non_retryable_error_goes_straight_to_caller(server):
+    server.error_rate = 1.0
+    server.error_status = 400
+    breaker = CircuitBreaker(failure_threshold=1)
+    backend = _backend(server, max_retries=5, breaker=breaker)
+    with pytest.raises(APIStatusError) as info:
+        _call(backend)
+    assert info.value.status_code == 400
+    assert server.calls == 1
+    assert backend.stats["retries"] == 0
+    # 요청 오류는 공급자 장애가 아니므로 브레이커를 열지 않는다
+    assert breaker.state == "closed"
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import INTERACTIVE, PREFETCH, PriorityRateLimiter, RateLimited, SingleFlight, TokenBucket
+
+
+def _wait_for(check, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline: raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+# ---------- TokenBucket ----------
+
+def test_bucket_refills_at_rate_up_to_capacity():
+    bucket = TokenBucket(60)   # 초당 1개, 최대 60개
+    now = bucket.updated
+    bucket.tokens = 0
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now + 1.0) == 0
+    bucket.take(1)
+    assert bucket.tokens == pytest.approx(0.0)
+    bucket.wait_time(1, now + 1000)
+    assert bucket.tokens == bucket.capacity
+
+
+def test_bucket_lets_oversized_request_through_when_full():
+    bucket = TokenBucket(10)
+    assert bucket.wait_time(1000, bucket.updated) == 0
+    bucket.take(1000)
+    assert bucket.tokens == 0
+
+
+# ---------- PriorityRateLimiter ----------
+
+def test_interactive_served_ahead_of_queued_prefetch():
+    limiter = PriorityRateLimiter(requests_per_minute=300)   # 0.2초마다 한 자리
+    limiter.requests.tokens = 0
+    order = []
+
+    def worker(name, priority):
+        limiter.acquire(priority, timeout=5)
+        order.append(name)
+
+    threads = [threading.Thread(target=worker, args=(f"prefetch-{n}", PREFETCH)) for n in range(2)]
+    for t in threads:
+        t.start()
+    _wait_for(lambda: limiter.queue_depth() == 2)
+    threads.append(threading.Thread(target=worker, args=("interactive", INTERACTIVE)))
+    threads[-1].start()
+    for t in threads:
+        t.join(5)
+    assert order[0] == "interactive"
+    assert sorted(order[1:]) == ["prefetch-0", "prefetch-1"]
+    assert limiter.stats["granted"] == 3
+
+
+def test_acquire_times_out_when_no_capacity():
+    limiter = PriorityRateLimiter(requests_per_minute=1)
+    limiter.requests.tokens = 0
+    with pytest.raises(RateLimited):
+        limiter.acquire(INTERACTIVE, timeout=0.05)
+    assert limiter.stats["timeouts"] == 1
+    assert limiter.queue_depth() == 0
+
+
+# ---------- SingleFlight ----------
+
+def _run_concurrently(flight, fn, n=4):
+    results, errors = [], []
+
+    def caller():
+        try:
+            results.append(flight.do("key", fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_single_flight_runs_identical_keys_once():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads, results, errors = _run_concurrently(flight, fn)
+    _wait_for(lambda: flight.stats["shared"] == 3)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert results == ["answer"] * 4 and not errors
+    assert flight.stats == {"leaders": 1, "shared": 3}
+
+
+def test_single_flight_shares_leader_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("provider down")
+
+    threads, results, errors = _run_concurrently(flight, fn)
+    _wait_for(lambda: flight.stats["shared"] == 3)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert not results
+    assert len(errors) == 4
+    assert all(isinstance(e, ValueError) and str(e) == "provider down" for e in errors)
+    # 끝난 키는 지워지므로 다음 호출은 새로 실행된다
+    assert flight.do("key", lambda: "fresh") == "fresh"
@@ -0,0 +1,118 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from analyst import Analyst
+from schemas import DEFAULTED, STANCE, TRIAGE, model_value, validate
+from storage import AnalysisStore
+
+FULL = {
+    "title": "Neutral headline",
+    "summary": "A neutral summary.",
+    "keywords": ["policy", "economy"],
+    "sentiment_emoji": "😐",
+    "metrics": {"who": "Government", "impact": "Housing supply"},
+    "scores": {"fact_ratio": 70, "opinion_ratio": 30},
+    "balance": {"stated": "Supply will rise", "hidden": "Framed as a win", "rating": "MIXED"},
+}
+
+
+def _with(**changes):
+    data = json.loads(json.dumps(FULL))
+    for path, value in changes.items():
+        *parents, leaf = path.split("__")
+        node = data
+        for name in parents: node = node[name]
+        if value is None: del node[leaf]
+        else: node[leaf] = value
+    return data
+
+
+# ---------- validate: 범위 자르기 / 타입 고치기 ----------
+
+@pytest.mark.parametrize("raw, expected", [(150, 100), (-3, 0), ("72", 72), ("55%", 55), (64.6, 65)])
+def test_fact_ratio_is_coerced_and_clamped(raw, expected):
+    result, problems = validate(TRIAGE, _with(scores__fact_ratio=raw))
+    assert result["scores"]["fact_ratio"] == expected
+    assert problems == []
+
+
+@pytest.mark.parametrize("raw, expected", [(12, 10), (-11, -10), ("-4", -4), (3.4, 3)])
+def test_stance_score_is_coerced_and_clamped(raw, expected):
+    result, problems = validate(STANCE, {"stance_label": "Critical", "stance_score": raw, "summary": "One line."})
+    assert result["stance_score"] == expected
+    assert problems == []
+
+
+def test_rating_is_normalised_or_reported():
+    assert validate(TRIAGE, _with(balance__rating=" opinion "))[0]["balance"]["rating"] == "OPINION"
+    result, problems = validate(TRIAGE, _with(balance__rating="SOMEWHAT"))
+    assert result["balance"]["rating"] == "MIXED"
+    assert problems == ["balance.rating"]
+
+
+def test_unusable_number_is_reported():
+    for raw in (True, "lots", float("nan")):
+        result, problems = validate(TRIAGE, _with(scores__fact_ratio=raw))
+        assert result["scores"]["fact_ratio"] == 50
+        assert problems == ["scores.fact_ratio"]
+
+
+# ---------- 기본값 표시 ----------
+
+def test_defaulted_paths_include_optional_fields():
+    defaulted = []
+    result, problems = validate(TRIAGE, _with(title=None, scores__opinion_ratio=None), defaulted=defaulted)
+    assert problems == []
+    assert defaulted == ["title", "scores.opinion_ratio"]
+    result[DEFAULTED] = defaulted
+    assert model_value(result, "scores.opinion_ratio") is None
+    assert model_value(result, "scores.fact_ratio") == 70
+    assert model_value(result, "balance.rating") == "MIXED"
+
+
+# ---------- analyst: 빠진 필드만 한 번 다시 묻기 ----------
+
+class _FakeLLM:
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def complete(self, priority, **kwargs):
+        self.calls.append(kwargs)
+        content = self.answers.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalysisStore(path=str(tmp_path / "analysis.db"))
+
+
+def test_missing_required_field_is_repaired_with_one_call(store):
+    llm = _FakeLLM(json.dumps(_with(balance__hidden=None)), json.dumps({"balance": {"hidden": "Framed as a win"}}))
+    result = Analyst(llm, store).analyze_news_groq("Government announces a housing plan.", "US")
+    assert len(llm.calls) == 2
+    request = llm.calls[1]["messages"][-1]["content"]
+    assert "balance.hidden" in request and "[Missing Fields (JSON Only)]:" in request
+    assert result["balance"]["hidden"] == "Framed as a win"
+    assert DEFAULTED not in result
+
+    # 고쳐진 결과는 캐시되어 다시 호출하지 않는다
+    assert Analyst(llm, store).analyze_news_groq("Government announces a housing plan.", "US") == result
+    assert len(llm.calls) == 2
+
+
+def test_failed_repair_keeps_default_and_skips_cache(store):
+    llm = _FakeLLM(json.dumps(_with(scores__fact_ratio=None)), json.dumps({"scores": {}}), json.dumps(FULL))
+    analyst = Analyst(llm, store)
+    result = analyst.analyze_news_groq("Central bank holds rates.", "US")
+    assert len(llm.calls) == 2   # 고치기는 한 번만
+    assert result["scores"]["fact_ratio"] == 50
+    assert result[DEFAULTED] == ["scores.fact_ratio"]
+    assert model_value(result, "scores.fact_ratio") is None
+
+    # 못 고친 결과는 캐시하지 않으므로 다음 요청 때 새로 분석한다
+    assert analyst.analyze_news_groq("Central bank holds rates.", "US")["scores"]["fact_ratio"] == 70
+    assert len(llm.calls) == 3
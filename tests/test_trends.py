@@ -0,0 +1,83 @@
+import pytest
+
+from schemas import DEFAULTED
+from trends import TrendStore
+
+
+def _analysis(fact, rating="FACT", emoji="😐", defaulted=None):
+    result = {
+        "sentiment_emoji": emoji,
+        "scores": {"fact_ratio": fact, "opinion_ratio": 100 - fact},
+        "balance": {"rating": rating},
+    }
+    if defaulted: result[DEFAULTED] = defaulted
+    return result
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "trends.db")
+
+
+def _row(store, outlet="Reuters"):
+    rows = {row["outlet"]: row for row in store.outlets("US")}
+    return rows.get(outlet)
+
+
+def test_reanalysis_replaces_earlier_contribution(db):
+    store = TrendStore(db)
+    store.add_analyses([("https://a/1", "Reuters", "", _analysis(50, "MIXED", defaulted=["scores.opinion_ratio"]))], "US", "World")
+    assert _row(store)["articles"] == 1
+
+    # 빈칸 없이 다시 분석된 결과가 예전 값을 대신한다 (두 번 세지 않는다)
+    assert store.add_analyses([("https://a/1", "Reuters", "", _analysis(80))], "US", "World") == 1
+    row = _row(store)
+    assert row["articles"] == 1
+    assert row["fact_ratio"] == 80
+    assert row["opinion_ratio"] == 20
+    assert row["FACT %"] == 100 and row["MIXED %"] == 0
+    assert store.stats["replaced"] == 1 and store.stats["retracted"] == 1
+
+
+def test_same_or_incomplete_result_does_not_replace(db):
+    store = TrendStore(db)
+    store.add_analyses([("https://a/1", "Reuters", "", _analysis(80))], "US", "World")
+    assert store.add_analyses([("https://a/1", "Reuters", "", _analysis(80))], "US", "World") == 0
+    assert store.add_analyses([("https://a/1", "Reuters", "", _analysis(30, defaulted=["balance.rating"]))], "US", "World") == 0
+    assert _row(store)["fact_ratio"] == 80
+
+
+def test_other_instance_picks_up_replacement(db):
+    app, worker = TrendStore(db), TrendStore(db)
+    worker.add_analyses([("https://a/1", "Reuters", "", _analysis(40, defaulted=["sentiment_emoji"]))], "US", "World")
+    assert _row(app)["fact_ratio"] == 40    # app이 옛 줄을 이미 더한 상태
+
+    worker.add_analyses([("https://a/1", "Reuters", "", _analysis(90))], "US", "World")
+    row = _row(app)
+    assert row["articles"] == 1
+    assert row["fact_ratio"] == 90
+    assert app.stats["retracted"] == 1
+
+    # 옛 줄을 본 적 없는 새 인스턴스는 취소 기록을 빼지 않는다
+    fresh = TrendStore(db)
+    assert _row(fresh)["articles"] == 1 and _row(fresh)["fact_ratio"] == 90
+    assert fresh.stats["retracted"] == 0
+
+
+def test_defaulted_values_are_excluded_from_rollups(db):
+    store = TrendStore(db)
+    store.add_analyses([
+        ("https://a/1", "Reuters", "", _analysis(50, "MIXED", "🧊", defaulted=["scores.fact_ratio", "balance.rating", "sentiment_emoji"])),
+        ("https://a/2", "Reuters", "", _analysis(90, "FACT", "🔥")),
+        ("https://b/1", "AP", "", _analysis(50, "MIXED", defaulted=["scores.fact_ratio", "scores.opinion_ratio", "balance.rating"])),
+    ], "US", "World")
+    reuters = _row(store)
+    assert reuters["articles"] == 2
+    assert reuters["fact_ratio"] == 90            # 기본값 50은 평균에 들어가지 않는다
+    assert reuters["opinion_ratio"] == 30         # opinion은 두 기사 모두 모델 값 (50, 10)
+    assert reuters["FACT %"] == 100 and reuters["MIXED %"] == 0
+    assert reuters["🔥 %"] == 100
+    ap = _row(store, "AP")
+    assert ap["articles"] == 1
+    assert ap["fact_ratio"] is None and ap["opinion_ratio"] is None
+    assert ap["MIXED %"] is None
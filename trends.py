@@ -0,0 +1,377 @@
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+
+from schemas import model_value
+from storage import DEFAULT_DB_PATH
+
+# ==========================================
+# 언론사별 추세 집계 (NumPy 열 배열 롤업)
+# ==========================================
+# 분석 결과의 점수(fact/opinion, rating, 감정, stance)를 기사마다 한 줄씩 trend_facts에 쌓고
+# (앱과 워커가 같은 DB에 쓴다), 메모리에는 (언론사, 지역, 토픽, 날짜) 묶음별 합계/개수/히스토그램만
+# 열 배열로 들고 있는다. 새 줄은 id 순서대로 한 번에 읽어 bincount로 더하므로 대시보드는
+# 원본 기록을 다시 훑지 않고 묶음 수에 비례하는 시간만 쓴다. 백분위는 5점 단위 히스토그램 기준 근사치.
+# 스키마 기본값으로 채운 필드는 NULL로 남긴다. 빈칸이 있던 기사가 나중에 온전히 분석되면 줄을 새 id로
+# 옮겨 쓰고, 옛 값은 trend_retractions에 남겨 이미 그 줄을 더한 프로세스가 빼도록 한다.
+
+RATINGS = ("FACT", "MIXED", "OPINION")
+SENTIMENTS = ("🔥", "😐", "🧊")
+SCORE_BINS = 21                 # 0-100점을 5점 단위로 (100점은 마지막 칸)
+STANCE_BINS = 21                # -10 ~ +10 정수
+UNKNOWN_OUTLETS = {"", "NEWS"}  # 제목에 언론사가 없을 때 split_title이 주는 기본값
+DAY = 86400
+
+# 묶음별 열: 이름 -> (dtype, 한 묶음당 칸 수)
+_COLUMNS = {
+    "outlet": (np.int32, None), "region": (np.int32, None), "topic": (np.int32, None), "day": (np.int32, None),
+    "articles": (np.int64, None),
+    "fact_n": (np.int64, None), "fact_sum": (np.float64, None), "fact_hist": (np.int64, SCORE_BINS),
+    "opinion_n": (np.int64, None), "opinion_sum": (np.float64, None), "opinion_hist": (np.int64, SCORE_BINS),
+    "rating": (np.int64, len(RATINGS)), "sentiment": (np.int64, len(SENTIMENTS)),
+    "stance_n": (np.int64, None), "stance_sum": (np.float64, None), "stance_hist": (np.int64, STANCE_BINS),
+}
+
+
+def day_of(published):
+    # RSS 날짜 문자열 → 1970-01-01부터 센 UTC 날짜 (없거나 못 읽으면 오늘)
+    try:
+        return int(parsedate_to_datetime(published).timestamp() // DAY)
+    except (TypeError, ValueError):
+        return int(time.time() // DAY)
+
+
+def _score(value, low, high):
+    try:
+        return max(low, min(high, float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentile(hist, q, width, offset):
+    # 묶음마다 누적 히스토그램에서 q 지점이 들어 있는 칸의 가운데 값 (빈 행은 NaN)
+    total = hist.sum(axis=1)
+    cum = hist.cumsum(axis=1)
+    idx = (cum < (q * total)[:, None]).sum(axis=1)
+    out = offset + np.minimum(idx * width + width // 2, (hist.shape[1] - 1) * width)
+    return np.where(total > 0, out, np.nan).astype(float)
+
+
+def _ratio(num, den):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / np.maximum(den, 1), np.nan)
+
+
+def _complete(row):
+    # 이 줄 종류가 채워야 하는 값이 전부 있는가 (analysis: fact/opinion/rating/sentiment, stance: stance)
+    values = row[6:10] if row[1] == "analysis" else row[10:11]
+    return all(value is not None for value in values)
+
+
+def _clean(value, digits=1):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+class TrendStore:
+    def __init__(self, path=DEFAULT_DB_PATH, chunk=65536):
+        self.path = path
+        self.chunk = chunk
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS trend_facts (
+                id INTEGER PRIMARY KEY,
+                link TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                outlet TEXT NOT NULL,
+                region TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                fact REAL,
+                opinion REAL,
+                rating INTEGER,
+                sentiment INTEGER,
+                stance REAL,
+                UNIQUE (link, kind)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS trend_retractions (
+                id INTEGER PRIMARY KEY,
+                fact_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                outlet TEXT NOT NULL,
+                region TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                fact REAL,
+                opinion REAL,
+                rating INTEGER,
+                sentiment INTEGER,
+                stance REAL
+            )
+        """)
+        self._conn.commit()
+        self._labels = {"outlet": [], "region": [], "topic": []}   # id -> 이름
+        self._ids = {"outlet": {}, "region": {}, "topic": {}}      # 이름 -> id
+        self._groups = {}                                          # (outlet, region, topic, day) id -> 묶음 번호
+        self._size = 0
+        self._cols = {name: np.zeros((0,) if width is None else (0, width), dtype) for name, (dtype, width) in _COLUMNS.items()}
+        self._last_id = 0
+        self._last_retraction = 0
+        self._memo = {}
+        self.stats = {"rows": 0, "batches": 0, "writes": 0, "replaced": 0, "retracted": 0}
+
+    # ---------- 기록 ----------
+
+    def _write(self, rows):
+        # 처음 보는 기사는 넣고, 이미 있는 줄은 새 줄이 빈칸 없이 온전하고 값이 다를 때만 바꾼다
+        rows = [row for row in rows if row[2] not in UNKNOWN_OUTLETS]
+        if not rows: return 0
+        written = 0
+        with self._lock:
+            for row in rows:
+                old = self._conn.execute(
+                    "SELECT id, kind, outlet, region, topic, day, fact, opinion, rating, sentiment, stance "
+                    "FROM trend_facts WHERE link = ? AND kind = ?", row[:2]
+                ).fetchone()
+                if old is None:
+                    self._conn.execute(
+                        "INSERT INTO trend_facts (link, kind, outlet, region, topic, day, fact, opinion, rating, sentiment, stance) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+                    )
+                elif _complete(row) and tuple(old[2:]) != tuple(row[2:]):
+                    self._conn.execute(
+                        "INSERT INTO trend_retractions (fact_id, kind, outlet, region, topic, day, fact, opinion, rating, sentiment, stance) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", old
+                    )
+                    self._conn.execute(
+                        "UPDATE trend_facts SET id = (SELECT MAX(id) + 1 FROM trend_facts), outlet = ?, region = ?, topic = ?, "
+                        "day = ?, fact = ?, opinion = ?, rating = ?, sentiment = ?, stance = ? WHERE id = ?", row[2:] + (old[0],)
+                    )
+                    self.stats["replaced"] += 1
+                else:
+                    continue
+                written += 1
+            self._conn.commit()
+            self.stats["writes"] += written
+        return written
+
+    def add_analyses(self, items, region_code, topic):
+        # items: [(link, 언론사, published, 분석 결과)] — 같은 기사는 한 번만 센다.
+        # 모델이 주지 않아 기본값으로 채운 필드(opinion 50, rating MIXED 등)는 NULL로 기록한다
+        rows = []
+        for link, outlet, published, res in items:
+            if not res: continue
+            rating = model_value(res, "balance.rating")
+            sentiment = model_value(res, "sentiment_emoji")
+            rows.append((
+                link, "analysis", outlet, region_code, topic, day_of(published),
+                _score(model_value(res, "scores.fact_ratio"), 0, 100), _score(model_value(res, "scores.opinion_ratio"), 0, 100),
+                RATINGS.index(rating) if rating in RATINGS else None,
+                SENTIMENTS.index(sentiment) if sentiment in SENTIMENTS else None,
+                None,
+            ))
+        return self._write(rows)
+
+    def add_stances(self, items, region_code, topic):
+        # items: [(link, 언론사, published, stance_score)] — 비교 탭에서 나온 기사별 입장 점수
+        rows = [
+            (link, "stance", outlet, region_code, topic, day_of(published), None, None, None, None, _score(stance, -10, 10))
+            for link, outlet, published, stance in items if _score(stance, -10, 10) is not None
+        ]
+        return self._write(rows)
+
+    # ---------- 롤업 ----------
+
+    def _label(self, kind, name):
+        ids = self._ids[kind]
+        if name not in ids:
+            ids[name] = len(self._labels[kind])
+            self._labels[kind].append(name)
+        return ids[name]
+
+    def _group(self, outlet, region, topic, day):
+        key = (self._label("outlet", outlet), self._label("region", region), self._label("topic", topic), day)
+        gid = self._groups.get(key)
+        if gid is None:
+            gid = self._groups[key] = self._size
+            self._size += 1
+            if self._size > len(self._cols["day"]): self._grow(self._size)
+            for name, value in zip(("outlet", "region", "topic", "day"), key):
+                self._cols[name][gid] = value
+        return gid
+
+    def _grow(self, need):
+        capacity = max(need, 2 * len(self._cols["day"]), 1024)
+        for name, column in self._cols.items():
+            grown = np.zeros((capacity,) + column.shape[1:], column.dtype)
+            grown[:len(column)] = column
+            self._cols[name] = grown
+
+    def _apply(self, rows, sign=1):
+        # sign=-1이면 (옮겨 쓰기 전의 옛 줄을) 빼낸다
+        gid = np.fromiter((self._group(*row[2:6]) for row in rows), dtype=np.int64, count=len(rows))
+        size, cols = self._size, self._cols
+        kind = np.array([row[1] == "analysis" for row in rows])
+        cols["articles"][:size] += sign * np.bincount(gid[kind], minlength=size)
+
+        def add_scores(prefix, values, low, width, bins):
+            ok = ~np.isnan(values)
+            g, v = gid[ok], values[ok]
+            cols[prefix + "_n"][:size] += sign * np.bincount(g, minlength=size)
+            cols[prefix + "_sum"][:size] += sign * np.bincount(g, weights=v, minlength=size)
+            b = np.minimum(((v - low) // width).astype(np.int64), bins - 1)
+            cols[prefix + "_hist"][:size] += sign * np.bincount(g * bins + b, minlength=size * bins).reshape(size, bins)
+
+        def add_codes(name, codes, width):
+            ok = codes >= 0
+            cols[name][:size] += sign * np.bincount(gid[ok] * width + codes[ok], minlength=size * width).reshape(size, width)
+
+        column = lambda i: np.array([row[i] for row in rows], dtype=float)
+        add_scores("fact", column(6), 0, 5, SCORE_BINS)
+        add_scores("opinion", column(7), 0, 5, SCORE_BINS)
+        add_scores("stance", column(10), -10, 1, STANCE_BINS)
+        add_codes("rating", np.nan_to_num(column(8), nan=-1).astype(np.int64), len(RATINGS))
+        add_codes("sentiment", np.nan_to_num(column(9), nan=-1).astype(np.int64), len(SENTIMENTS))
+
+    def sync(self):
+        # 마지막으로 읽은 id 이후의 줄(다른 프로세스가 쓴 것 포함)을 chunk 단위로 더하고, 새로 생긴 취소 기록 중
+        # 이미 더했던 줄(fact_id <= 이번 동기화 전 마지막 id)의 것만 뺀다. 한 읽기 트랜잭션 안에서 읽어야
+        # 줄을 읽은 뒤 옮겨 쓰인 경우와 처음부터 못 본 경우가 섞이지 않는다
+        with self._lock:
+            seen = self._last_id
+            self._conn.execute("BEGIN")
+            try:
+                while True:
+                    rows = self._conn.execute(
+                        "SELECT id, kind, outlet, region, topic, day, fact, opinion, rating, sentiment, stance "
+                        "FROM trend_facts WHERE id > ? ORDER BY id LIMIT ?", (self._last_id, self.chunk)
+                    ).fetchall()
+                    if not rows: break
+                    self._apply(rows)
+                    self._last_id = rows[-1][0]
+                    self.stats["rows"] += len(rows)
+                    self.stats["batches"] += 1
+                    self._memo.clear()
+                retractions = self._conn.execute(
+                    "SELECT id, kind, outlet, region, topic, day, fact, opinion, rating, sentiment, stance, fact_id "
+                    "FROM trend_retractions WHERE id > ? ORDER BY id", (self._last_retraction,)
+                ).fetchall()
+            finally:
+                self._conn.commit()
+            if not retractions: return
+            self._last_retraction = retractions[-1][0]
+            applied = [row[:11] for row in retractions if row[11] <= seen]
+            if applied:
+                self._apply(applied, sign=-1)
+                self.stats["retracted"] += len(applied)
+                self._memo.clear()
+
+    def _mask(self, region_code, topic=None, outlet=None, since_day=None):
+        cols, size = self._cols, self._size
+        mask = cols["region"][:size] == self._ids["region"].get(region_code, -1)
+        if topic is not None: mask &= cols["topic"][:size] == self._ids["topic"].get(topic, -1)
+        if outlet is not None: mask &= cols["outlet"][:size] == self._ids["outlet"].get(outlet, -1)
+        if since_day is not None: mask &= cols["day"][:size] >= since_day
+        return mask
+
+    def _rollup(self, mask, keys, count):
+        # 고른 묶음들을 keys(묶음별 언론사 번호나 날짜 번호) 기준으로 다시 합친다
+        out = {}
+        for name, column in self._cols.items():
+            if name in ("outlet", "region", "topic", "day"): continue
+            values = column[:self._size][mask]
+            if values.ndim == 1:
+                out[name] = np.bincount(keys, weights=values, minlength=count)
+            else:
+                width = values.shape[1]
+                flat = (keys[:, None] * width + np.arange(width)).ravel()
+                out[name] = np.bincount(flat, weights=values.ravel(), minlength=count * width).reshape(count, width)
+        return out
+
+    def outlets(self, region_code, topic=None, days=None, min_articles=1, drift_window=7):
+        # 언론사별 평균/백분위/비율 표. drift는 최근 drift_window일 평균 - 그 전 같은 기간 평균
+        self.sync()
+        memo_key = ("outlets", region_code, topic, days, min_articles, drift_window, int(time.time() // DAY))
+        with self._lock:
+            if memo_key in self._memo: return self._memo[memo_key]
+            today = int(time.time() // DAY)
+            mask = self._mask(region_code, topic, since_day=today - days + 1 if days else None)
+            outlet_col, day_col = self._cols["outlet"][:self._size], self._cols["day"][:self._size]
+            count = len(self._labels["outlet"])
+            by_outlet = lambda m: self._rollup(m, outlet_col[m].astype(np.int64), count)
+
+            agg = by_outlet(mask)
+            recent = by_outlet(mask & (day_col > today - drift_window))
+            prior = by_outlet(mask & (day_col <= today - drift_window) & (day_col > today - 2 * drift_window))
+            drift = _ratio(recent["fact_sum"], recent["fact_n"]) - _ratio(prior["fact_sum"], prior["fact_n"])
+
+            fact_mean = _ratio(agg["fact_sum"], agg["fact_n"])
+            opinion_mean = _ratio(agg["opinion_sum"], agg["opinion_n"])
+            stance_mean = _ratio(agg["stance_sum"], agg["stance_n"])
+            fact_p = {q: _percentile(agg["fact_hist"], q, 5, 0) for q in (0.1, 0.5, 0.9)}
+            stance_p50 = _percentile(agg["stance_hist"], 0.5, 1, -10)
+            rating_share = _ratio(agg["rating"], agg["rating"].sum(axis=1, keepdims=True)) * 100
+            sentiment_share = _ratio(agg["sentiment"], agg["sentiment"].sum(axis=1, keepdims=True)) * 100
+
+            seen = agg["articles"] + agg["stance_n"]
+            order = np.argsort(-seen, kind="stable")
+            rows = []
+            for i in order:
+                if seen[i] < min_articles: break
+                row = {
+                    "outlet": self._labels["outlet"][i],
+                    "articles": int(agg["articles"][i]),
+                    "fact_ratio": _clean(fact_mean[i]),
+                    "fact_p10": _clean(fact_p[0.1][i], 0),
+                    "fact_p50": _clean(fact_p[0.5][i], 0),
+                    "fact_p90": _clean(fact_p[0.9][i], 0),
+                    "fact_drift": _clean(drift[i]),
+                    "opinion_ratio": _clean(opinion_mean[i]),
+                }
+                row.update({f"{name} %": _clean(rating_share[i, n], 0) for n, name in enumerate(RATINGS)})
+                row.update({f"{emoji} %": _clean(sentiment_share[i, n], 0) for n, emoji in enumerate(SENTIMENTS)})
+                row.update(stance=_clean(stance_mean[i]), stance_p50=_clean(stance_p50[i], 0), stances=int(agg["stance_n"][i]))
+                rows.append(row)
+            self._memo[memo_key] = rows
+            return rows
+
+    def series(self, outlet, region_code, topic=None, days=None):
+        # 한 언론사의 날짜별 평균 (추세 그래프용)
+        self.sync()
+        with self._lock:
+            today = int(time.time() // DAY)
+            mask = self._mask(region_code, topic, outlet, since_day=today - days + 1 if days else None)
+            day_values = self._cols["day"][:self._size][mask]
+            if not len(day_values): return []
+            unique_days, keys = np.unique(day_values, return_inverse=True)
+            agg = self._rollup(mask, keys.astype(np.int64), len(unique_days))
+            fact = _ratio(agg["fact_sum"], agg["fact_n"])
+            opinion = _ratio(agg["opinion_sum"], agg["opinion_n"])
+            stance = _ratio(agg["stance_sum"], agg["stance_n"])
+        return [
+            {"day": np.datetime64(int(d), "D").astype(str), "articles": int(agg["articles"][n]),
+             "fact_ratio": _clean(fact[n]), "opinion_ratio": _clean(opinion[n]), "stance": _clean(stance[n])}
+            for n, d in enumerate(unique_days)
+        ]
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, groups=self._size, outlets=len(self._labels["outlet"]))
+
+
+_shared_trends = None
+_shared_lock = threading.Lock()
+
+def get_trend_store(path=DEFAULT_DB_PATH, **kwargs):
+    global _shared_trends
+    with _shared_lock:
+        if _shared_trends is None:
+            _shared_trends = TrendStore(path, **kwargs)
+        return _shared_trends
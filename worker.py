@@ -0,0 +1,57 @@
+import argparse
+import os
+import time
+
+import metrics
+from analyst import Analyst
+from archive import NewsArchive
+from articles import ArticleFetcher
+from feeds import REGION_FEEDS, FeedCache
+from llm import LLMBackend
+from pipeline import BRIEFING_SIZE, run_all
+from scheduler import PriorityRateLimiter
+from storage import DEFAULT_DB_PATH, AnalysisStore, BriefingStore
+from trends import TrendStore
+
+# ==========================================
+# 헤드리스 브리핑 워커
+# ==========================================
+# Streamlit 밖에서 모든 지역/토픽 브리핑을 미리 계산해 app.py가 읽는 공유 SQLite 저장소에 쓴다.
+#
+#   GROQ_API_KEY=... python worker.py --once
+#   GROQ_API_KEY=... python worker.py --interval 900 --regions KR --topics HEADLINES POLITICS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute News Dietitian briefings.")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=int, default=int(os.environ.get("WORKER_INTERVAL", 900)), help="seconds between passes")
+    parser.add_argument("--regions", nargs="+", choices=list(REGION_FEEDS), default=None)
+    parser.add_argument("--topics", nargs="+", default=None)
+    parser.add_argument("--limit", type=int, default=BRIEFING_SIZE)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--metrics-file", default=os.environ.get("METRICS_FILE"), help="write metrics after each pass (.json or Prometheus text)")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("ANALYZE_CONCURRENCY", 4)))
+    args = parser.parse_args()
+
+    store = AnalysisStore(args.db)
+    briefings = BriefingStore(args.db)
+    # 앱과 같은 Groq 계정을 쓴다면 LLM_RPM/LLM_TPM을 앱보다 낮게 잡아 할당량을 나눈다
+    limiter = PriorityRateLimiter(int(os.environ.get("LLM_RPM", 30)), int(os.environ.get("LLM_TPM", 0)) or None)
+    analyst = Analyst(LLMBackend.create(os.environ["GROQ_API_KEY"], limiter=limiter), store, concurrency=args.concurrency)
+    fetcher = ArticleFetcher(store=store)
+    feed_cache = FeedCache()
+    archive = NewsArchive(args.db)
+    trends = TrendStore(args.db)
+
+    while True:
+        started = time.time()
+        run_all(analyst, fetcher, feed_cache, briefings, args.regions, args.topics, args.limit, archive=archive, trends=trends)
+        print(f"pass finished in {time.time() - started:.1f}s · cache {store.summary()} · archive {archive.summary()}")
+        if args.metrics_file: metrics.REGISTRY.dump(args.metrics_file)
+        if args.once: break
+        time.sleep(max(0, args.interval - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    main()